@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Runs the client hot path benchmarks offscreen, from the repository root:
+#     python3 -m benchmarks [-k suite ...] [--quick] [--json out.json] [--compare base.json]
+# The trace and logging suites overwrite /tmp/errors.log.
+
+import argparse
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide2.QtWidgets import QApplication
+
+from package.qmpwrapper import QMP
+from benchmarks.cases import suites
+from benchmarks import harness
+
+class Context:
+
+    def __init__(self, quick):
+        self.quick = quick
+        self.qmp = QMP() # never connected
+        self.objects = [] # windows under test, kept alive until the end
+        self.cleanup = []
+
+    def keep(self, obj):
+        self.objects.append(obj)
+        return obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the QEMU GUI client hot paths')
+    parser.add_argument('-k', dest='suites', action='append', choices=sorted(suites), help='suite to run, may be repeated (default: all)')
+    parser.add_argument('--quick', action='store_true', help='only the smallest payload of every suite')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds to repeat every case for')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    ctx = Context(args.quick)
+
+    results = []
+    try:
+        for name in args.suites or suites:
+            for case in suites[name](ctx):
+                print(f'{case.name}...', file=sys.stderr)
+                results.append(harness.measure(case, args.min_time))
+                app.processEvents()
+    finally:
+        for fn in ctx.cleanup:
+            fn()
+
+    harness.report(results, harness.load(args.compare) if args.compare else None)
+    if args.json:
+        harness.save(results, args.json)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+from PySide2.QtCore import QObject, Signal
+
+import subprocess
+import numpy
+import sys
+
+from package.qmpwrapper import QMP, QMPDecoder
+from package.memblock import MemBlock
+from package.hexformat import format_block
+from package.pagecache import PageCache
+from package.memsearch import compile_pattern, Matcher, Search
+from package.memdiff import Diff, changed_offsets, runs
+from package.hexview import HexView
+from package.memtree import MemTree
+from package.registerview import RegisterView
+from package.tracewindow import TraceWindow
+from package.loggingwindow import LoggingWindow
+from package.timemultiplier import TimeMultiplier
+from benchmarks.harness import Case
+from benchmarks import payloads
+
+# Every suite takes the benchmark context and returns its cases. The windows are
+# built on a QMP object that is never connected, so nothing but the payloads
+# given to them reaches their handlers.
+
+suites = {}
+
+def suite(name):
+    def register(fn):
+        suites[name] = fn
+        return fn
+    return register
+
+def sizes(ctx, full, quick):
+    return quick if ctx.quick else full
+
+def label(size):
+    return f'{size // 1024} KiB' if size < 1024 * 1024 else f'{size // (1024 * 1024)} MiB'
+
+
+@suite('hexview')
+def hexview(ctx):
+    # a screenful painted with more and more memory resident, the cost should not grow
+    cases = []
+    for size in sizes(ctx, [4096, 1024 * 1024, 16 * 1024 * 1024], [4096]):
+        source = ctx.keep(resident(ctx, size))
+        view = ctx.keep(HexView(source))
+        view.resize(1000, 800)
+        view.show()
+        view.goto(size // 2)
+        cases.append(Case(f'hexview.paint[{label(size)} resident]', view.viewport().grab, volume=view.visible_rows(), unit='rows'))
+    return cases
+
+def resident(ctx, size):
+    # a page cache holding [0, size), as if it had been read while stopped
+    cache = PageCache(ctx.qmp, budget=size)
+    for addr in range(0, size, 1024 * 1024):
+        block = MemBlock.from_reply(payloads.pmem_raw(min(size, 1024 * 1024), 0, addr=addr))
+        for n in range(len(block) // cache.page_size):
+            start = n * cache.page_size
+            cache.store(addr // cache.page_size + n, (block.data[start:start + cache.page_size], [(0, cache.page_size)]))
+    return cache
+
+@suite('pagecache')
+def pagecache(ctx):
+    # revisiting resident memory while the guest is stopped, which sends nothing
+    cases = []
+    size = 4 * 1024 * 1024
+    cache = ctx.keep(resident(ctx, size))
+    cache.running = False
+    for window in sizes(ctx, [4096, 64 * 1024, 1024 * 1024], [64 * 1024]):
+        cases.append(Case(f'pagecache.read[{label(window)}]', lambda window=window: cache.read(size // 2, window), volume=window))
+        cases.append(Case(f'pagecache.fetch_hit[{label(window)}]', lambda window=window: cache.fetch(size // 2, window), volume=window))
+    # a refresh that finds memory as it was, which should cost little more than the compare
+    for window in sizes(ctx, [64 * 1024, 1024 * 1024], [64 * 1024]):
+        data = bytes(cache.read(0, window)[0])
+        cases.append(Case(f'pagecache.refresh_unchanged[{label(window)}]', lambda data=data: refresh(cache, data), volume=window))
+    return cases
+
+class Unsent:
+    # a batch that sends nothing, the replies are made up by the caller
+    def command(self, cmd, args=None, callback=None):
+        return None
+
+def refresh(cache, data):
+    # reads [0, len(data)) again and answers with data
+    batch = Unsent()
+    hashes = []
+    for first in range(0, len(data) // cache.page_size, cache.max_request):
+        cache.request(batch, list(range(first, min(first + cache.max_request, len(data) // cache.page_size))))
+        hashes.append(cache.serial)
+    for hash_ in hashes:
+        pages = cache.requests[hash_]
+        start = pages[0] * cache.page_size
+        end = (pages[-1] + 1) * cache.page_size
+        cache.handle_block(MemBlock(start, data[start:end], [(0, end - start)], hash_))
+
+@suite('memblock')
+def memblock(ctx):
+    # what turning a reply into bytes costs, done in the event loop thread
+    cases = []
+    for size in sizes(ctx, [64 * 1024, 1024 * 1024], [64 * 1024]):
+        raw = payloads.pmem_raw(size, 0)
+        cases.append(Case(f'memblock.from_reply[{label(size)}]', lambda raw=raw: MemBlock.from_reply(raw), volume=size))
+    return cases
+
+@suite('hexformat')
+def hexformat(ctx):
+    cases = []
+    for size in sizes(ctx, [64 * 1024, 1024 * 1024], [64 * 1024]):
+        # half of the block lies past the end of RAM, so it is partly unmapped
+        block = MemBlock.from_reply(payloads.pmem_raw(size, 0, addr=payloads.machine.ram_size - size // 2))
+        for group in [1, 8]:
+            for big_endian in [False, True]:
+                name = f'hexformat.format_block[{label(size)} group {group} {"big" if big_endian else "little"}]'
+                cases.append(Case(name, lambda block=block, group=group, big_endian=big_endian: format_block(block.data, block.addr, group, big_endian, block.mapped), volume=size))
+    return cases
+
+@suite('memtree')
+def memtree(ctx):
+    view = ctx.keep(MemTree(ctx.qmp, None))
+    cases = []
+    for regions in sizes(ctx, [1000, 10000], [1000]):
+        tree = payloads.mtree(regions)
+        cases.append(Case(f'memtree.update_tree[{regions} regions]', lambda tree=tree: view.update_tree(tree), view.tree.clear, len(tree), 'regions'))
+    return cases
+
+@suite('registers')
+def registers(ctx):
+    view = ctx.keep(RegisterView(ctx.qmp))
+    data = payloads.registers()
+    view.handle_registers(data) # builds the fancy view, later calls update it
+    repeat = 100
+
+    def fancy_data():
+        for n in range(repeat):
+            view.fancy_data()
+
+    def handle_registers():
+        for n in range(repeat):
+            view.handle_registers(data)
+
+    return [
+        Case(f'registers.fancy_data[x{repeat}]', fancy_data, volume=repeat * len(data['return'])),
+        Case(f'registers.handle_registers[x{repeat}]', handle_registers, volume=repeat * len(data['return']))
+    ]
+
+def write_log(text):
+    with open('/tmp/errors.log', 'w') as f:
+        f.write(text)
+
+def log_cases(ctx, prefix, window):
+    cases = []
+    for lines in sizes(ctx, [10000, 100000], [10000]):
+        text = payloads.log_lines(lines)
+        cases.append(Case(f'{prefix}.disp_output[{lines} lines]', window.disp_output, lambda text=text: write_log(text), len(text)))
+    return cases
+
+@suite('trace')
+def trace(ctx):
+    return log_cases(ctx, 'trace', ctx.keep(TraceWindow(ctx.qmp)))
+
+@suite('logging')
+def logging(ctx):
+    return log_cases(ctx, 'logging', ctx.keep(LoggingWindow(ctx.qmp)))
+
+
+class KillEvent(QObject):
+    kill = Signal()
+
+@suite('timemultiplier')
+def timemultiplier(ctx):
+    event = ctx.keep(KillEvent())
+    widget = ctx.keep(TimeMultiplier(ctx.qmp, event.kill))
+    samples = payloads.time_samples(sizes(ctx, 50, 10))
+
+    def setup():
+        widget.start()
+        widget.start_time = samples[0][1]['time_ns']
+        widget.line.set_data([], [])
+
+    def run():
+        for sample in samples:
+            widget.handle_sample(sample)
+
+    return [Case(f'timemultiplier.handle_sample[{len(samples)} samples]', run, setup, len(samples), 'samples')]
+
+@suite('memsearch')
+def memsearch(ctx):
+    # scanning one chunk of a search, which runs on the search thread
+    block = MemBlock.from_reply(payloads.pmem_raw(Search.chunk_size, 0, addr=0))
+    cases = []
+    for kind, text in [('ASCII', 'no such text'), ('Bytes', 'de ad ?? ef'), ('Bytes', '00 ?1')]:
+        matcher = Matcher(*compile_pattern(kind, text))
+        search = Search(ctx.qmp, matcher, 0, len(block))
+        search.max_results = 1 << 62 # counts every match of every run
+        cases.append(Case(f'memsearch.scan[{kind} {text}]', lambda search=search: search.scan(0, block), volume=len(block)))
+    return cases
+
+@suite('memdiff')
+def memdiff(ctx):
+    # comparing one chunk of a diff, unchanged and with a change every 4 KiB
+    before = numpy.frombuffer(MemBlock.from_reply(payloads.pmem_raw(Diff.chunk_size, 0, addr=0)).data, dtype=numpy.uint8)
+    changed = before.copy()
+    changed[::4096] ^= 1
+    cases = []
+    for name, after in [('unchanged', before.copy()), ('4 KiB apart', changed)]:
+        cases.append(Case(f'memdiff.chunk[{name}]', lambda after=after: runs(changed_offsets(before, after), 16), volume=len(before)))
+    return cases
+
+@suite('decoder')
+def decoder(ctx):
+    cases = []
+    for size in sizes(ctx, [1024 * 1024, 16 * 1024 * 1024], [1024 * 1024]):
+        stream = payloads.qmp_stream(size)
+        decoder = QMPDecoder()
+
+        def run(stream=stream, decoder=decoder):
+            # fed in the chunks a socket read hands to the protocol
+            view = memoryview(stream)
+            for offset in range(0, len(stream), 65536):
+                chunk = view[offset:offset + 65536]
+                decoder.get_buffer(len(chunk))[:len(chunk)] = chunk
+                decoder.buffer_updated(len(chunk))
+
+        cases.append(Case(f'decoder.decode[{label(size)}]', run, decoder.reset, len(stream)))
+    return cases
+
+@suite('roundtrip')
+def roundtrip(ctx):
+    # get-pmem, get-pmem-raw and get-pmem-list through a real connection to the mock server in its own process
+    server = subprocess.Popen([sys.executable, '-m', 'package.mockqmp', '--port', '0'], stdout=subprocess.PIPE, text=True)
+    ctx.cleanup.append(server.terminate)
+    port = int(server.stdout.readline().rsplit(':', 1)[1])
+
+    qmp = QMP()
+    if not qmp.sock_connect('127.0.0.1', port).result(5):
+        return []
+    ctx.cleanup.append(qmp.sock_disconnect)
+    repeat = 20
+    cases = []
+    for cmd, size in [('get-pmem', 2048), ('get-pmem', 64 * 1024), ('get-pmem-raw', 64 * 1024), ('get-pmem-raw', 1024 * 1024)]:
+        if ctx.quick and size > 64 * 1024:
+            continue
+        args = {'hash': 0, 'addr': 0, 'size': size}
+        if cmd == 'get-pmem':
+            args['grouping'] = 1
+
+        def run(cmd=cmd, args=args):
+            for n in range(repeat):
+                qmp.command(cmd, args).result(5)
+
+        cases.append(Case(f'roundtrip.{cmd}[{label(size)} x{repeat}]', run, volume=repeat * size))
+
+    # scattered values, all of a watch list in one command
+    for count in sizes(ctx, [10, 200, 4096], [200]):
+        args = {'hash': 0, 'items': [{'addr': 0x20000 + n * 0x1000, 'size': 8} for n in range(count)]}
+
+        def run(args=args):
+            for n in range(repeat):
+                qmp.command('get-pmem-list', args).result(5)
+
+        cases.append(Case(f'roundtrip.get-pmem-list[{count} items x{repeat}]', run, volume=repeat * count, unit='values'))
+    return cases
@@ -0,0 +1,88 @@
+import statistics
+import tracemalloc
+import time
+import json
+
+class Case:
+    # One measured operation. setup() runs untimed before every run(), volume is
+    # how much one run() processes, counted in unit ('B' for bytes, or items).
+
+    def __init__(self, name, run, setup=None, volume=0, unit='B'):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.volume = volume
+        self.unit = unit
+
+
+def measure(case, min_time=0.5, max_runs=50):
+    # repeats the case until min_time seconds were spent in it, at least once
+    times = []
+    while not times or (sum(times) < min_time and len(times) < max_runs):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+
+    # allocations are taken from a separate run, tracing slows everything down.
+    # Only Python allocations are seen, not those made inside Qt.
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    case.run()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        'name': case.name,
+        'runs': len(times),
+        'best': min(times),
+        'median': median,
+        'volume': case.volume,
+        'unit': case.unit,
+        'throughput': case.volume / median if case.volume and median else 0.0,
+        'peak': peak,
+        'retained': retained
+    }
+
+
+def format_rate(rate, unit):
+    if unit == 'B':
+        for prefix in ['B', 'KiB', 'MiB']:
+            if rate < 1024:
+                return f'{rate:.1f} {prefix}/s'
+            rate /= 1024
+        return f'{rate:.1f} GiB/s'
+    return f'{rate:,.0f} {unit}/s'
+
+def format_size(n):
+    for prefix in ['B', 'KiB', 'MiB']:
+        if abs(n) < 1024:
+            return f'{n:.0f} {prefix}'
+        n /= 1024
+    return f'{n:.1f} GiB'
+
+def report(results, baseline=None):
+    # prints one line per result, with the change against a baseline run if given
+    previous = {r['name']: r for r in baseline} if baseline else {}
+    width = max([len(r['name']) for r in results] + [10])
+    header = f'{"Benchmark":<{width}} {"Runs":>5} {"Median":>10} {"Best":>10} {"Throughput":>18} {"Peak":>10} {"Retained":>10}'
+    if previous:
+        header += f' {"vs Base":>8}'
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        line = f'{r["name"]:<{width}} {r["runs"]:>5} {r["median"] * 1e3:>8.2f}ms {r["best"] * 1e3:>8.2f}ms {format_rate(r["throughput"], r["unit"]):>18} {format_size(r["peak"]):>10} {format_size(r["retained"]):>10}'
+        if r['name'] in previous:
+            line += f' {r["median"] / previous[r["name"]]["median"]:>7.2f}x'
+        print(line)
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,85 @@
+import random
+import json
+
+from package.mockqmp import MockMachine, MockQMPServer
+
+# Synthetic payloads shaped like what the modified QEMU sends. Memory contents
+# and register dumps come from the mock guest so they match the mock server.
+
+machine = MockMachine(ram_size=4 * 1024 * 1024)
+server = MockQMPServer(machine)
+
+def pmem(size, hash_, addr=0x500):
+    # 'return' member of a get-pmem reply, one MemVal per byte
+    return server.get_pmem(hash_, addr, size, 1)
+
+def pmem_raw(size, hash_, addr=0x500):
+    # 'return' member of a get-pmem-raw reply
+    return server.get_pmem_raw(hash_, addr, size)
+
+def registers():
+    return {'return': machine.registers()}
+
+def mtree(regions, depth=3):
+    # 'return' member of an mtree reply with the given number of regions,
+    # listed depth first the way qmp_mtree walks the regions. Real trees are
+    # shallow and wide, the subregions are spread over depth levels.
+    fanout = round(regions ** (1 / depth)) + 1
+    tree = [{'name': 'memory', 'start': 0, 'end': -1, 'parent': ''}]
+    count = 0
+    stack = [('system', 0, 1 << 32, 'memory', 0)]
+    while stack and count < regions:
+        name, start, end, parent, level = stack.pop()
+        tree.append({'name': name, 'start': start, 'end': end, 'parent': parent})
+        count += 1
+        if level < depth:
+            step = (end - start) // fanout
+            children = [(f'{name}.{n}', start + n * step, start + (n + 1) * step, name, level + 1) for n in range(fanout)]
+            stack.extend(reversed(children))
+    tree.append({'name': 'I/O', 'start': 0, 'end': 0x10000, 'parent': ''})
+    tree.append({'name': 'io', 'start': 0, 'end': 0x10000, 'parent': 'I/O'})
+    return tree
+
+trace_events = ['memory_region_ops_read', 'memory_region_ops_write', 'kvm_vcpu_ioctl', 'cpu_in', 'cpu_out']
+
+def log_lines(lines, errors=0.1, seed=0):
+    # /tmp/errors.log contents, trace events interleaved with guest error messages
+    rng = random.Random(seed)
+    pid = 4242
+    now = 1600000000.0
+    out = []
+    for n in range(lines):
+        now += rng.random() / 1000
+        if rng.random() < errors:
+            out.append(f'Invalid read at addr 0x{rng.getrandbits(32):X}, size 4, region \'(null)\', reason: rejected\n')
+        else:
+            event = rng.choice(trace_events)
+            out.append(f'{pid}@{now:.6f}:{event} cpu 0x7f3c1c000b70 mr 0x55d0b1e4a5c0 addr 0x{rng.getrandbits(32):x} value 0x{rng.getrandbits(8):x} size 1\n')
+    return ''.join(out)
+
+def time_samples(count, rate=10, multiplier=0.9, seed=0):
+    # itc-time-metric replies taken rate times a second
+    rng = random.Random(seed)
+    virtual = 0
+    host = 1600000000 * 10 ** 9
+    samples = []
+    for n in range(count):
+        step = 10 ** 9 // rate
+        host += step
+        virtual += int(step * multiplier * (0.9 + rng.random() * 0.2))
+        samples.append([{'time_ns': virtual}, {'time_ns': host}])
+    return samples
+
+def qmp_stream(nbytes, pmem_size=4096):
+    # raw bytes of a QMP reply stream, mostly get-pmem replies with status
+    # replies and events in between
+    status = json.dumps({'return': {'status': 'running', 'singlestep': False, 'running': True}, 'id': 1}).encode() + b'\r\n'
+    event = json.dumps({'timestamp': {'seconds': 1600000000, 'microseconds': 0}, 'event': 'RESUME'}).encode() + b'\r\n'
+    reply = json.dumps({'return': pmem(pmem_size, 1), 'id': 2}).encode() + b'\r\n'
+    chunks = []
+    total = 0
+    while total < nbytes:
+        for message in [reply, status, status, event]:
+            chunks.append(message)
+            total += len(message)
+    return b''.join(chunks)
@@ -2316,8 +2316,22 @@ exit:
     fclose(f);
 }
 
+/*
+ * Whether [addr, addr + size) ends at or below 2^64, addr being an unsigned
+ * address sent as int64.
+ */
+static bool itc_range_fits(int64_t addr, int64_t size)
+{
+    return size >= 0 && (size == 0 || (uint64_t)size - 1 <= UINT64_MAX - (uint64_t)addr);
+}
+
 MemReturn *qmp_get_pmem(int64_t hash, int64_t addr, int64_t size, int64_t grouping, Error **errp)
 {
+    if (!itc_range_fits(addr, size)) {
+        error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "size",
+                   "a size that ends the range at or below 2^64");
+        return NULL;
+    }
     switch(grouping) {
         case 1:
         case 2:
@@ -2335,6 +2349,8 @@ MemReturn *qmp_get_pmem(int64_t hash, int64_t addr, int64_t size, int64_t groupi
     head->vals = NULL;
     MemValList *cur = head->vals;
     bool first = true;
+    MemRangeList *ranges = itc_mapped_ranges(addr, size); /* mapped status for the whole request */
+    MemRangeList *range = ranges;
     while (size != 0) {
         l = sizeof(buf);
         if (l > size)
@@ -2351,7 +2367,7 @@ MemReturn *qmp_get_pmem(int64_t hash, int64_t addr, int64_t size, int64_t groupi
                     cur->value->val = cur->value->val << 8;
                     cur->value->val += buf[i+j];
                 }
-                cur->value->ismapped = itc_check_mapped(addr + i);
+                cur->value->ismapped = itc_ranges_contain(&range, addr + i);
                 cur->next = NULL;
                 head->vals = cur;
                 first = false;
@@ -2360,10 +2376,10 @@ MemReturn *qmp_get_pmem(int64_t hash, int64_t addr, int64_t size, int64_t groupi
                 MemValList *temp = g_malloc0(sizeof(*temp));
                 temp->value = g_malloc0(sizeof(*temp->value));
                 temp->value->val = 0;
-                temp->value->ismapped = itc_check_mapped(addr + i);
+                temp->value->ismapped = itc_ranges_contain(&range, addr + i);
                 int j = 0;
                 for(j = 0; j < grouping && i + j < l; j++) {
-                    if(!itc_check_mapped(addr + i + j)){
+                    if(!itc_ranges_contain(&range, addr + i + j)){
                         temp->value->ismapped = false;
                     }
                     temp->value->val = temp->value->val << 8;
@@ -2377,9 +2393,100 @@ MemReturn *qmp_get_pmem(int64_t hash, int64_t addr, int64_t size, int64_t groupi
         addr += l;
         size -= l;
     }
+    qapi_free_MemRangeList(ranges);
     return head;
 }
 
+MemRaw *qmp_get_pmem_raw(int64_t hash, int64_t addr, int64_t size, Error **errp)
+{
+    MemRaw *ret;
+    uint8_t *buf;
+
+    if (size < 0 || size > ITC_PMEM_RAW_MAX) {
+        error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "size",
+                   "a size between 0 and 16 MiB");
+        return NULL;
+    }
+    if (!itc_range_fits(addr, size)) {
+        error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "size",
+                   "a size that ends the range at or below 2^64");
+        return NULL;
+    }
+
+    buf = g_malloc(size);
+    cpu_physical_memory_read(addr, buf, size);
+
+    ret = g_malloc0(sizeof(*ret));
+    ret->hash = hash;
+    ret->addr = addr;
+    ret->data = g_base64_encode(buf, size);
+    ret->mapped = itc_mapped_ranges(addr, size);
+    /* where mapped memory goes on, so readers can skip the gap up to it */
+    if (size == 0 || (uint64_t)addr + (uint64_t)size != 0) {
+        ret->has_next = itc_next_mapped((uint64_t)addr + (uint64_t)size, &ret->next);
+    }
+    g_free(buf);
+    return ret;
+}
+
+MemValues *qmp_get_pmem_list(int64_t hash, MemItemList *items, Error **errp)
+{
+    MemValues *ret;
+    MemItemList *item;
+    boolList **tail;
+    uint8_t *buf;
+    int64_t count = 0;
+    int64_t total = 0;
+
+    for (item = items; item; item = item->next) {
+        if (item->value->size < 1 || item->value->size > ITC_PMEM_ITEM_MAX) {
+            error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "size",
+                       "a size between 1 and 64");
+            return NULL;
+        }
+        if (!itc_range_fits(item->value->addr, item->value->size)) {
+            error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "size",
+                       "a size that ends the item at or below 2^64");
+            return NULL;
+        }
+        count++;
+        total += item->value->size;
+    }
+    if (count > ITC_PMEM_LIST_MAX) {
+        error_setg(errp, QERR_INVALID_PARAMETER_VALUE, "items",
+                   "at most 4096 items");
+        return NULL;
+    }
+
+    buf = g_malloc0(total ? total : 1);
+    ret = g_malloc0(sizeof(*ret));
+    ret->hash = hash;
+    tail = &ret->mapped;
+    total = 0;
+    for (item = items; item; item = item->next) {
+        int64_t addr = item->value->addr;
+        int64_t size = item->value->size;
+        /* touching ranges are merged, so a mapped item lies in the first */
+        MemRangeList *ranges = itc_mapped_ranges(addr, size);
+        boolList *mapped = g_malloc0(sizeof(*mapped));
+
+        mapped->value = ranges
+            && (uint64_t)ranges->value->start <= (uint64_t)addr
+            && (uint64_t)ranges->value->end - (uint64_t)addr >= (uint64_t)size;
+        qapi_free_MemRangeList(ranges);
+        if (mapped->value) {
+            cpu_physical_memory_read(addr, buf + total, size);
+        }
+        total += size;
+        *tail = mapped;
+        tail = &mapped->next;
+    }
+
+    ret->data = g_base64_encode(buf, total);
+    g_free(buf);
+    return ret;
+}
+
 void qmp_inject_nmi(Error **errp)
 {
     nmi_monitor_handle(monitor_get_cpu_index(), errp);
@@ -4,5 +4,15 @@
 
 MemoryMapEntryList *qmp_mtree_helper(MemoryRegion *parent, MemoryMapEntryList *mm_list);
 bool itc_check_mapped(int64_t addr);
+MemRangeList *itc_mapped_ranges(int64_t addr, int64_t size);
+bool itc_ranges_contain(MemRangeList **cur, int64_t addr);
+bool itc_next_mapped(int64_t addr, int64_t *next);
+
+/* largest block get-pmem-raw returns in one reply */
+#define ITC_PMEM_RAW_MAX (16 * 1024 * 1024)
+
+/* most items and largest item get-pmem-list reads in one reply */
+#define ITC_PMEM_LIST_MAX 4096
+#define ITC_PMEM_ITEM_MAX 64
 
 #endif
\ No newline at end of file
@@ -3145,21 +3145,119 @@ void mtree_info(bool flatview, bool dispatch_tree, bool owner)
     }
 }
 
-bool itc_check_mapped(int64_t addr) {
-    FlatRange *fr;
-    AddressSpace *as;
-    QTAILQ_FOREACH(as, &address_spaces, address_spaces_link) {
-        if(!strcmp(as->name, "memory")){
+/*
+ * Mapped parts of [addr, addr + size) in the system address space, as
+ * [start, end) ranges in address order with touching ranges merged. The
+ * FlatView is sorted, so a binary search finds the first range that can
+ * overlap and the walk stops at the first one past the end. Build it once
+ * per request and test addresses with itc_ranges_contain().
+ */
+MemRangeList *itc_mapped_ranges(int64_t addr, int64_t size)
+{
+    MemRangeList *head = NULL;
+    MemRangeList *last = NULL;
+    Int128 start = int128_make64(addr);
+    Int128 end = int128_add(start, int128_make64(size));
+    FlatView *view;
+    unsigned lo, hi;
+
+    rcu_read_lock();
+    view = address_space_to_flatview(&address_space_memory);
+
+    /* first range that ends after addr */
+    lo = 0;
+    hi = view->nr;
+    while (lo < hi) {
+        unsigned mid = lo + (hi - lo) / 2;
+        if (int128_le(addrrange_end(view->ranges[mid].addr), start)) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+
+    for (; lo < view->nr; lo++) {
+        FlatRange *fr = &view->ranges[lo];
+        uint64_t s, e;
+
+        if (int128_ge(fr->addr.start, end)) {
             break;
         }
+        /* an end of 2^64 wraps to 0, like the int64 it is sent as */
+        s = int128_getlo(int128_max(fr->addr.start, start));
+        e = int128_getlo(int128_min(addrrange_end(fr->addr), end));
+        if (last && (uint64_t)last->value->end == s) {
+            last->value->end = e;
+            continue;
+        }
+        MemRangeList *temp = g_malloc0(sizeof(*temp));
+        temp->value = g_malloc0(sizeof(*temp->value));
+        temp->value->start = s;
+        temp->value->end = e;
+        if (last) {
+            last->next = temp;
+        } else {
+            head = temp;
+        }
+        last = temp;
     }
-    FlatView *view = as->current_map;
-    FOR_EACH_FLAT_RANGE(fr, view) {
-        if(addrrange_contains(fr->addr, int128_make64(addr))) {
-            return true;
+
+    rcu_read_unlock();
+    return head;
+}
+
+/*
+ * Whether addr lies in one of the ranges from itc_mapped_ranges(). *cur is
+ * moved past the ranges below addr, so addresses must be asked in
+ * increasing order.
+ */
+bool itc_ranges_contain(MemRangeList **cur, int64_t addr)
+{
+    while (*cur && (uint64_t)(*cur)->value->end - 1 < (uint64_t)addr) { /* end may be 2^64, sent as 0 */
+        *cur = (*cur)->next;
+    }
+    return *cur && (uint64_t)(*cur)->value->start <= (uint64_t)addr;
+}
+
+/*
+ * First mapped address at or after addr in the system address space, false
+ * when nothing is mapped from addr up.
+ */
+bool itc_next_mapped(int64_t addr, int64_t *next)
+{
+    Int128 start = int128_make64(addr);
+    FlatView *view;
+    unsigned lo, hi;
+    bool found;
+
+    rcu_read_lock();
+    view = address_space_to_flatview(&address_space_memory);
+
+    /* first range that ends after addr */
+    lo = 0;
+    hi = view->nr;
+    while (lo < hi) {
+        unsigned mid = lo + (hi - lo) / 2;
+        if (int128_le(addrrange_end(view->ranges[mid].addr), start)) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
         }
     }
-    return false;
+    found = lo < view->nr;
+    if (found) {
+        *next = int128_getlo(int128_max(view->ranges[lo].addr.start, start));
+    }
+
+    rcu_read_unlock();
+    return found;
+}
+
+bool itc_check_mapped(int64_t addr) {
+    MemRangeList *ranges = itc_mapped_ranges(addr, 1);
+    bool mapped = ranges != NULL;
+    qapi_free_MemRangeList(ranges);
+    return mapped;
 }
 
 MemoryMapEntryList *qmp_mtree_helper(MemoryRegion *parent, MemoryMapEntryList *mm_list) {
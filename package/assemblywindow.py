@@ -2,11 +2,16 @@ from pygdbmi.gdbcontroller import GdbController
 from PySide2.QtWidgets import QWidget, QLineEdit, QHBoxLayout, QPushButton, QVBoxLayout, QTextEdit
 from PySide2.QtGui import QFont, QTextCharFormat, QTextCursor, QIcon
 from pprint import pprint
-from PySide2.QtCore import Qt
+from PySide2.QtCore import Qt, QTimer
 import re
 from package.constants import constants
 
 class AssemblyWindow(QWidget):
+    # answers that are not what was asked for are asked again retry_delay ms
+    # later, at most max_retries times in a row
+    retry_delay = 50
+    max_retries = 20
+
     def __init__(self, qmp):
         super().__init__()
         # self.gdb = None
@@ -18,6 +23,7 @@ class AssemblyWindow(QWidget):
         self.addr = re.compile(r"^\s*-?(0x)?[0-9a-f]+\s*$")
         self.baseAddress = -1
         self.maxAddress = -1
+        self.retries = 0
 
         self.initui()
 
@@ -91,30 +97,51 @@ class AssemblyWindow(QWidget):
 
     def set_running(self, value):
         self.running = value
+        self.retries = 0
+        if not self.running:
+            self.request_pc()
+
+    def request_pc(self):
+        if not self.running:
+            self.qmp.hmp('print ' + constants['pc'], callback=self.handle_pc)
+
+    def request_instrs(self, pc):
         if not self.running:
-            data = None
-            while True:
-                data = self.qmp.hmp_command('print ' + constants['pc'])
-                if 'return' in data:
-                        data = data['return']
-                        if not (data is dict) and self.addr.match(str(data)):
-                            break
-            pc = int(data, 0) 
-            pc = pc & 0xffffffff
-            if pc >= self.baseAddress and pc <= self.maxAddress:
-                self.clear_highlight()
-                self.highlight(pc)
-            else:
-                while True:
-                    data = self.qmp.hmp_command('x/30i ' + constants['pc'])
-                    if 'return' in data:
-                        data = data['return']
-                        if self.instr.match(str(data)):
-                            break
-                try:
-                    self.display_instrs(data, pc)
-                except:
-                    self.set_running(False)            
+            self.qmp.hmp('x/30i ' + constants['pc'], callback=lambda data: self.handle_instrs(data, pc))
+
+    def retry(self, request):
+        self.retries += 1
+        if self.retries <= self.max_retries:
+            QTimer.singleShot(self.retry_delay, request)
+
+    def handle_pc(self, data):
+        if self.running:
+            return
+        if not data or 'return' not in data or not self.addr.match(str(data['return'])):
+            if data is not None: # retry until the monitor answers with an address
+                self.retry(self.request_pc)
+            return
+        pc = int(data['return'], 0) 
+        pc = pc & 0xffffffff
+        if pc >= self.baseAddress and pc <= self.maxAddress:
+            self.retries = 0
+            self.clear_highlight()
+            self.highlight(pc)
+        else:
+            self.request_instrs(pc)
+
+    def handle_instrs(self, data, pc):
+        if self.running:
+            return
+        if not data or 'return' not in data or not self.instr.match(str(data['return'])):
+            if data is not None:
+                self.retry(lambda: self.request_instrs(pc))
+            return
+        try:
+            self.display_instrs(data['return'], pc)
+            self.retries = 0
+        except:
+            self.retry(self.request_pc)
     
     # def step_gdb(self):
     #     self.step.clicked.disconnect(self.step_gdb)
@@ -1,5 +1,11 @@
 constants = {
 	'bits': 64,
 	'block_size': 1024,
-	'pc': '$eip'
-}
\ No newline at end of file
+	'pc': '$eip',
+	'journal_entries': 1000, # responses kept in QMP.responses
+	'journal_bytes': 4 * 1024 * 1024,
+	'journal_spill': None, # file that evicted responses are appended to
+	'qmp_timeout': 5, # seconds before a command without a reply fails
+	'page_cache_bytes': 64 * 1024 * 1024, # guest memory kept by QMP.pages
+	'prefetch_in_flight': 4 # reads a memory view keeps outstanding ahead of scrolling
+}
@@ -0,0 +1,254 @@
+from PySide2.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QPushButton, QProgressBar, QListView, QFileDialog, QInputDialog
+from PySide2.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide2.QtGui import QIcon, QFont
+from datetime import datetime
+import tempfile
+import os
+
+from package.dumpfile import DumpFile
+from package.memexport import Export
+from package.memdiff import Diff, DiffResults
+
+class DiffWindow(QWidget):
+    # Compares two snapshots of memory, dump files or regions captured from
+    # the guest, and lists the runs of changed bytes. A picked run is shown in
+    # a memory dump window of the second snapshot.
+    #
+    # Captures are exported to temporary files and mapped like any other dump,
+    # so a capture costs no memory and can be compared with a later one.
+
+    def __init__(self, qmp):
+        super().__init__()
+
+        self.qmp = qmp
+        self.snapshots = [] # (name, DumpFile)
+        self.captures = [] # temporary files of the captures
+        self.export = None
+        self.diff = None
+        self.dump = None # MemDumpWindow the runs are shown in
+        self.results = DiffResults()
+
+        self.init_ui()
+
+        icon = QIcon('package/icons/nasa.png')
+        self.setWindowIcon(icon)
+
+        self.show()
+
+    def init_ui(self):
+        vbox = QVBoxLayout()
+
+        snapshots = QHBoxLayout()
+        snapshots.addWidget(QLabel('Before:'))
+        self.before = QComboBox()
+        snapshots.addWidget(self.before, 1)
+        snapshots.addWidget(QLabel('After:'))
+        self.after = QComboBox()
+        snapshots.addWidget(self.after, 1)
+        open_dump = QPushButton('Open Dump')
+        open_dump.clicked.connect(self.open_dump)
+        snapshots.addWidget(open_dump)
+        vbox.addLayout(snapshots)
+
+        capture = QHBoxLayout()
+        capture.addWidget(QLabel('Start:'))
+        self.start = QLineEdit('0x0')
+        capture.addWidget(self.start)
+        capture.addWidget(QLabel('Size:'))
+        self.size = QLineEdit()
+        capture.addWidget(self.size)
+        self.pause = QCheckBox('Stop the guest while reading')
+        capture.addWidget(self.pause)
+        self.capture_button = QPushButton('Capture')
+        self.capture_button.clicked.connect(self.toggle_capture)
+        capture.addWidget(self.capture_button)
+        vbox.addLayout(capture)
+
+        compare = QHBoxLayout()
+        compare.addWidget(QLabel('Merge runs closer than:'))
+        self.gap = QLineEdit('16')
+        compare.addWidget(self.gap)
+        self.button = QPushButton('Compare')
+        self.button.clicked.connect(self.toggle_diff)
+        compare.addWidget(self.button)
+        vbox.addLayout(compare)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 1000)
+        vbox.addWidget(self.progress)
+
+        self.model = DiffModel(self.results)
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
+        self.list.setFont(QFont('Courier New'))
+        self.list.activated.connect(lambda index: self.show_run(index.row()))
+        self.list.clicked.connect(lambda index: self.show_run(index.row()))
+        vbox.addWidget(self.list)
+
+        self.status = QLabel()
+        vbox.addWidget(self.status)
+
+        self.setLayout(vbox)
+        self.setWindowTitle('Memory Diff')
+        self.setGeometry(150, 150, 800, 500)
+
+    def add_snapshot(self, name, dump_file):
+        self.snapshots.append((name, dump_file))
+        self.before.addItem(name)
+        self.after.addItem(name)
+        # the newest snapshot is compared with the one before it
+        self.after.setCurrentIndex(len(self.snapshots) - 1)
+        self.before.setCurrentIndex(max(len(self.snapshots) - 2, 0))
+
+    def open_dump(self):
+        filename = QFileDialog.getOpenFileName(self, 'Open Memory Dump', '.', options=QFileDialog.DontUseNativeDialog)
+        if not filename[0]:
+            return
+        base, ok = QInputDialog.getText(self, 'Open Memory Dump', 'Address of the first byte:', text='0x0')
+        if not ok:
+            return
+        try:
+            self.add_snapshot(os.path.basename(filename[0]), DumpFile(filename[0], int(base, 0)))
+        except (OSError, ValueError) as e:
+            self.status.setText(f'<font color="red">Could not open {filename[0]}: {e}</font>')
+
+    def toggle_capture(self):
+        if self.export:
+            self.export.cancel()
+        else:
+            self.start_capture()
+
+    def start_capture(self):
+        try:
+            start = int(self.start.text(), 0)
+            size = int(self.size.text(), 0)
+        except ValueError:
+            self.status.setText('<font color="red">Invalid start or size</font>')
+            return
+        if size <= 0 or start < 0 or start + size > 1 << 64:
+            self.status.setText('<font color="red">Invalid range</font>')
+            return
+
+        fd, filename = tempfile.mkstemp(prefix='memdiff-', suffix='.bin')
+        os.close(fd)
+        self.captures.append(filename)
+        self.progress.setValue(0)
+        self.status.setText('Capturing...')
+        self.capture_button.setText('Cancel')
+        self.export = Export(self.qmp, start, size, filename, pause=self.pause.isChecked())
+        self.export.progress.connect(self.handle_progress)
+        self.export.finished.connect(self.handle_captured)
+        self.export.run_in_thread()
+
+    def handle_captured(self, written, reason):
+        export = self.export
+        self.export = None
+        self.capture_button.setText('Capture')
+        if reason:
+            self.status.setText(f'<font color="orange">{reason}</font>')
+            return
+        self.progress.setValue(1000)
+        name = f'Capture 0x{export.start:x} +0x{export.size:x} at {datetime.now():%H:%M:%S}'
+        try:
+            self.add_snapshot(name, DumpFile(export.filename, export.start))
+        except (OSError, ValueError) as e:
+            self.status.setText(f'<font color="red">{e}</font>')
+            return
+        self.status.setText(f'Captured {written // 1024} KiB')
+
+    def toggle_diff(self):
+        if self.diff:
+            self.diff.cancel()
+        else:
+            self.start_diff()
+
+    def start_diff(self):
+        if not self.snapshots:
+            self.status.setText('<font color="red">Open or capture two snapshots first</font>')
+            return
+        try:
+            gap = int(self.gap.text(), 0)
+        except ValueError:
+            self.status.setText('<font color="red">Invalid merge distance</font>')
+            return
+        before = self.snapshots[self.before.currentIndex()][1]
+        after = self.snapshots[self.after.currentIndex()][1]
+
+        self.results = DiffResults()
+        self.model.reset(self.results)
+        self.progress.setValue(0)
+        self.status.setText('Comparing...')
+        self.button.setText('Cancel')
+
+        self.diff = Diff(before, after, max(gap, 0))
+        self.diff.found.connect(self.model.append)
+        self.diff.progress.connect(self.handle_progress)
+        self.diff.finished.connect(self.handle_finished)
+        self.diff.run_in_thread()
+
+    def handle_progress(self, done, total):
+        self.progress.setValue(done * 1000 // total)
+
+    def handle_finished(self, runs, reason):
+        diff = self.diff
+        self.diff = None
+        self.button.setText('Compare')
+        text = f'{runs} runs, {self.results.changed} bytes changed in 0x{diff.start:x} - 0x{diff.end:x}'
+        if reason:
+            self.status.setText(f'{text}. <font color="orange">{reason}</font>')
+        else:
+            self.progress.setValue(1000)
+            self.status.setText(text)
+
+    def show_run(self, row):
+        if not 0 <= row < len(self.results):
+            return
+        start, end, count = self.results[row]
+        dump_file = self.snapshots[self.after.currentIndex()][1]
+        if self.dump is None or not self.dump.isVisible() or self.dump.dump_file is not dump_file:
+            from package.memdumpwindow import MemDumpWindow
+            self.dump = MemDumpWindow(self.qmp, start, dump_file=dump_file)
+        self.dump.select(start, end - start)
+
+    def closeEvent(self, event):
+        if self.export:
+            self.export.cancel()
+        if self.diff:
+            self.diff.cancel()
+        for filename in self.captures: # still mapped by open windows on Linux
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+        event.accept()
+
+
+class DiffModel(QAbstractListModel):
+    # Runs of a DiffResults, only the rows on screen are ever formatted
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            start, end, count = self.results[index.row()]
+            return f'0x{start:016x} - 0x{end:016x}  {count} of {end - start} bytes changed'
+        return None
+
+    def reset(self, results):
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+
+    def append(self, runs):
+        if not runs:
+            return
+        first = len(self.results)
+        self.beginInsertRows(QModelIndex(), first, first + len(runs) - 1)
+        self.results.add(runs)
+        self.endInsertRows()
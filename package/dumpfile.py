@@ -0,0 +1,86 @@
+from PySide2.QtCore import QObject, Signal
+import base64
+import mmap
+import os
+
+from package.memblock import MemBlock
+
+class DumpFile(QObject):
+    # A raw memory dump, such as pmemsave writes, as a memory source for the
+    # views that works without QEMU. The file is mapped, not read, so only the
+    # pages the views touch are loaded and dumps larger than RAM can be opened.
+    # Byte n of the file is the memory at base + n, everything else reads as
+    # unmapped. A dump never changes, so changed is never emitted.
+
+    changed = Signal(object, object)
+    invalidated = Signal(object, object)
+
+    def __init__(self, filename, base=0):
+        super().__init__()
+        self.filename = filename
+        self.base = base
+        if not 0 <= base < 1 << 64:
+            raise ValueError(f'0x{base:x} is not a physical address')
+        with open(filename, 'rb') as f:
+            length = os.fstat(f.fileno()).st_size
+            if not length:
+                raise ValueError(f'{filename} is empty')
+            # the mapping stays valid after the file is closed
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.length = min(length, (1 << 64) - base)
+        self.size = base + self.length
+
+    def loaded(self, addr):
+        return True
+
+    def bounds(self, addr, size):
+        # [lo, hi) offsets into [addr, addr + size) the file holds
+        lo = min(max(self.base - addr, 0), size)
+        hi = max(min(self.size - addr, size), lo)
+        return lo, hi
+
+    def read(self, addr, size):
+        # same as PageCache.read
+        lo, hi = self.bounds(addr, size)
+        if lo == 0 and hi == size:
+            return self.map[addr - self.base:addr - self.base + size], [(0, size)]
+        data = bytearray(size)
+        data[lo:hi] = self.map[addr + lo - self.base:addr + hi - self.base]
+        return bytes(data), [(lo, hi)] if lo < hi else []
+
+    def views(self, addr, size):
+        # zero copy (address, memoryview) of the part of [addr, addr + size) in the file
+        lo, hi = self.bounds(addr, size)
+        if lo < hi:
+            yield addr + lo, memoryview(self.map)[addr + lo - self.base:addr + hi - self.base]
+
+    def will_need(self, addr, size):
+        # starts reading [addr, addr + size) of the file in the background
+        lo, hi = self.bounds(addr, size)
+        if lo < hi and hasattr(mmap, 'MADV_WILLNEED'): # not on Windows
+            start = (addr + lo - self.base) // mmap.PAGESIZE * mmap.PAGESIZE
+            self.map.madvise(mmap.MADV_WILLNEED, start, addr + hi - self.base - start)
+
+    def block(self, addr, size):
+        end = addr + size
+        next_ = self.base if end < self.base else end if end < self.size else None
+        return MemBlock(addr, *self.read(addr, size), next_=next_)
+
+    def fetch(self, addr, size, refresh=False):
+        # everything is always there
+        return None
+
+    def invalidate(self, addr=0, size=None):
+        pass
+
+    def get_pmem_list(self, hash_, items):
+        # the 'return' member of the get-pmem-list reply QEMU would send
+        data = bytearray()
+        mapped = []
+        for item in items:
+            addr = item['addr'] & ((1 << 64) - 1)
+            lo, hi = self.bounds(addr, item['size'])
+            inside = lo == 0 and hi == item['size']
+            data += self.map[addr - self.base:addr - self.base + item['size']] if inside else bytes(item['size'])
+            mapped.append(inside)
+        return {'hash': hash_, 'data': base64.b64encode(data).decode(), 'mapped': mapped}
@@ -20,8 +20,8 @@ class ErrorWindow(QMainWindow):
 
         open('/tmp/errors.log', 'w').close()
 
-        self.qmp.hmp_command('logfile /tmp/errors.log')
-        self.qmp.hmp_command('log guest_error')
+        self.qmp.hmp('logfile /tmp/errors.log')
+        self.qmp.hmp('log guest_error')
 
         self.setWindowTitle('Error Log')
         self.setGeometry(100, 100, 600, 400)
@@ -92,11 +92,11 @@ class ErrorWindow(QMainWindow):
         if state:
             self.activated = n
  
-        self.qmp.hmp_command('log none')
+        self.qmp.hmp('log none')
 
         open('/tmp/errors.log', 'w').close()
 
-        self.qmp.hmp_command('log ' + self.buttons[self.activated].text())
+        self.qmp.hmp('log ' + self.buttons[self.activated].text())
 
     def closeEvent(self, event):
 
@@ -0,0 +1,133 @@
+from PySide2.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QPushButton, QProgressBar, QFileDialog
+from PySide2.QtGui import QIcon
+import os
+
+from package.memexport import compressions, Export
+
+class ExportWindow(QWidget):
+    # Saves a range of guest physical memory to a file on this machine
+
+    def __init__(self, qmp, start=0, size=0):
+        super().__init__()
+
+        self.qmp = qmp
+        self.export = None
+
+        self.init_ui()
+
+        icon = QIcon('package/icons/nasa.png')
+        self.setWindowIcon(icon)
+
+        self.start.setText(f'0x{start:x}')
+        self.size.setText(f'0x{size:x}')
+
+        self.show()
+
+    def init_ui(self):
+        vbox = QVBoxLayout()
+
+        grid = QGridLayout()
+        grid.addWidget(QLabel('Start:'), 0, 0)
+        self.start = QLineEdit()
+        grid.addWidget(self.start, 0, 1)
+        grid.addWidget(QLabel('Size:'), 0, 2)
+        self.size = QLineEdit()
+        grid.addWidget(self.size, 0, 3)
+
+        grid.addWidget(QLabel('File:'), 1, 0)
+        self.filename = QLineEdit()
+        grid.addWidget(self.filename, 1, 1, 1, 2)
+        browse = QPushButton('Browse')
+        browse.clicked.connect(self.browse)
+        grid.addWidget(browse, 1, 3)
+
+        grid.addWidget(QLabel('Compression:'), 2, 0)
+        self.compression = QComboBox()
+        self.compression.addItems(list(compressions))
+        self.compression.currentTextChanged.connect(self.change_compression)
+        grid.addWidget(self.compression, 2, 1)
+        self.pause = QCheckBox('Stop the guest while reading')
+        self.pause.setToolTip('Makes the file a consistent snapshot, the guest is resumed as soon as the last chunk arrives')
+        grid.addWidget(self.pause, 2, 2, 1, 2)
+        vbox.addLayout(grid)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 1000)
+        vbox.addWidget(self.progress)
+
+        bottom = QHBoxLayout()
+        self.status = QLabel()
+        bottom.addWidget(self.status)
+        self.button = QPushButton('Export')
+        self.button.clicked.connect(self.toggle_export)
+        bottom.addWidget(self.button)
+        vbox.addLayout(bottom)
+
+        self.setLayout(vbox)
+        self.setWindowTitle('Export Memory')
+        self.setGeometry(150, 150, 600, 180)
+
+    def browse(self):
+        filename = QFileDialog.getSaveFileName(self, 'Export', '.', options=QFileDialog.DontUseNativeDialog)
+        if filename[0]:
+            self.filename.setText(filename[0])
+            self.change_compression(self.compression.currentText())
+
+    def change_compression(self, compression):
+        # swaps the extension of the file name for the one of the compression
+        name = self.filename.text()
+        for other, (opener, extension) in compressions.items():
+            if extension and name.endswith(extension):
+                name = name[:-len(extension)]
+        if name:
+            self.filename.setText(name + compressions[compression][1])
+
+    def toggle_export(self):
+        if self.export:
+            self.export.cancel()
+        else:
+            self.start_export()
+
+    def start_export(self):
+        try:
+            start = int(self.start.text(), 0)
+            size = int(self.size.text(), 0)
+        except ValueError:
+            self.status.setText('<font color="red">Invalid start or size</font>')
+            return
+        if size <= 0 or start < 0 or start + size > 1 << 64:
+            self.status.setText('<font color="red">Invalid range</font>')
+            return
+        if not self.filename.text():
+            self.status.setText('<font color="red">Choose a file</font>')
+            return
+
+        self.progress.setValue(0)
+        self.status.setText('Exporting...')
+        self.button.setText('Cancel')
+        self.export = Export(self.qmp, start, size, self.filename.text(), self.compression.currentText(), self.pause.isChecked())
+        self.export.progress.connect(self.handle_progress)
+        self.export.finished.connect(self.handle_finished)
+        self.export.run_in_thread()
+
+    def handle_progress(self, done, total):
+        self.progress.setValue(done * 1000 // total)
+        self.status.setText(f'{done // 1024} of {total // 1024} KiB')
+
+    def handle_finished(self, written, reason):
+        filename = self.export.filename
+        self.export = None
+        self.button.setText('Export')
+        if reason:
+            self.status.setText(f'<font color="orange">{reason}</font>')
+            return
+        self.progress.setValue(1000)
+        try:
+            self.status.setText(f'Wrote {written // 1024} KiB to {os.path.basename(filename)} ({os.path.getsize(filename) // 1024} KiB on disk)')
+        except OSError:
+            self.status.setText(f'Wrote {written // 1024} KiB')
+
+    def closeEvent(self, event):
+        if self.export:
+            self.export.cancel()
+        event.accept()
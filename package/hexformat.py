@@ -0,0 +1,121 @@
+import numpy
+
+# Bulk formatting of guest memory for the memory dump views. Every byte is
+# looked up in 256 entry tables and a whole window is laid out with array
+# reshapes, so the cost grows linearly with the window size.
+#
+# Rows hold 16 bytes. The hex column has one field of 2 * group digits per
+# group, each followed by a space. The char column has a 3 wide cell per byte.
+# A field shows the value of its group read as a <u2, >u4, ... typed view of
+# the same bytes. In big endian mode groups are listed left to right, in little
+# endian mode the groups and the char cells run right to left, so a whole row
+# reads as one number either way. HexView.byte_rects() computes the same cells.
+
+row_size = 16
+
+def char_convert(byte):
+    if byte in range(127):
+        if byte == 0:
+            return '\\0'
+        elif byte == 9:
+            return '\\t'
+        elif byte == 10:
+            return '\\n'
+        elif byte >= 32:
+            return chr(byte)
+    return '.'
+
+# one uint16 of two hex digits, and one uint32 holding a 3 wide char cell
+# (the fourth byte is dropped), per byte value. Gathering whole words is much
+# faster than gathering rows of a 2d table.
+hex_table = numpy.frombuffer(''.join(f'{b:02x}' for b in range(256)).encode(), dtype=numpy.uint16)
+char_table = numpy.frombuffer(''.join(f'{char_convert(b):3} ' for b in range(256)).encode(), dtype=numpy.uint32)
+
+unmapped_hex = numpy.frombuffer(b'**', dtype=numpy.uint16)[0]
+unmapped_char = numpy.frombuffer(b'.   ', dtype=numpy.uint32)[0]
+
+def mapped_mask(size, mapped):
+    # bool per byte from sorted (start, end) offset ranges
+    mask = numpy.zeros(size, dtype=bool)
+    for start, end in mapped:
+        mask[start:end] = True
+    return mask
+
+def layout(cells):
+    # (rows, width) uint8 -> text with one line per row
+    rows, width = cells.shape
+    out = numpy.empty((rows, width + 1), dtype=numpy.uint8)
+    out[:, :width] = cells
+    out[:, width] = ord('\n')
+    return out.tobytes()[:-1].decode('ascii')
+
+digits = numpy.frombuffer(b'0123456789abcdef', dtype=numpy.uint8)
+
+def format_addresses(addr, size):
+    # 0x%08x of every row address
+    rows = (size + row_size - 1) // row_size
+    last = addr + (rows - 1) * row_size
+    width = max(8, (last.bit_length() + 3) // 4)
+    if width != max(8, (addr.bit_length() + 3) // 4): # the rows differ in width
+        return '\n'.join(f'0x{a:08x}' for a in range(addr, addr + size, row_size))
+    values = numpy.arange(rows, dtype=numpy.uint64) * numpy.uint64(row_size) + numpy.uint64(addr)
+    shifts = numpy.arange(4 * (width - 1), -1, -4, dtype=numpy.uint64)
+    cells = numpy.empty((rows, width + 2), dtype=numpy.uint8)
+    cells[:, 0] = ord('0')
+    cells[:, 1] = ord('x')
+    cells[:, 2:] = digits[(values[:, None] >> shifts) & numpy.uint64(15)]
+    return layout(cells)
+
+def values(buf, group=1, big_endian=False):
+    # uint8 buffer -> its groups as <u2, >u4, ... values, a view of the same memory
+    return buf.view(numpy.dtype(f'{">" if big_endian else "<"}u{group}'))
+
+def value_bytes(buf, group=1, big_endian=False):
+    # the bytes of every group in the order its value is written, most
+    # significant first. Only little endian groups are copied, byte swapped.
+    group_values = values(buf, group, big_endian)
+    return group_values.astype(group_values.dtype.newbyteorder('>'), copy=False).view(numpy.uint8)
+
+def format_block(data, addr, group=1, big_endian=False, mapped=None):
+    # returns the address, hex and char columns of data, which starts at addr
+    # (a multiple of 16). mapped lists the (start, end) offsets of the mapped
+    # parts, everything is mapped without it.
+    size = len(data)
+    if not size:
+        return '', '', ''
+    if group not in [1, 2, 4, 8]:
+        group = 1
+    rows = (size + row_size - 1) // row_size
+    groups = row_size // group
+
+    buf = numpy.zeros(rows * row_size, dtype=numpy.uint8)
+    buf[:size] = numpy.frombuffer(data, dtype=numpy.uint8)
+    hexes = hex_table[value_bytes(buf, group, big_endian)]
+    chars = char_table[buf]
+    if mapped is not None:
+        mask = mapped_mask(rows * row_size, mapped)
+        hexes = numpy.where(value_bytes(mask.view(numpy.uint8), group, big_endian).view(bool), hexes, unmapped_hex)
+        chars = numpy.where(mask, chars, unmapped_char)
+
+    hexes = hexes.view(numpy.uint8).reshape(rows, groups, 2 * group)
+    chars = chars.view(numpy.uint8).reshape(rows, row_size, 4)[:, :, :3]
+    if not big_endian:
+        hexes = hexes[:, ::-1]
+        chars = chars[:, ::-1]
+
+    fields = numpy.full((rows, groups, 2 * group + 1), ord(' '), dtype=numpy.uint8)
+    fields[:, :, :2 * group] = hexes
+    hex_text = layout(fields.reshape(rows, groups * (2 * group + 1)))
+    char_text = layout(chars.reshape(rows, row_size * 3))
+
+    tail = size % row_size
+    if tail: # the last row only shows its complete groups and its bytes, in their usual columns
+        hex_width = (tail // group) * (2 * group + 1)
+        last = hex_text.rfind('\n') + 1
+        row = hex_text[last:]
+        hex_text = hex_text[:last] + (row[:hex_width].ljust(len(row)) if big_endian else row[len(row) - hex_width:].rjust(len(row)))
+        last = char_text.rfind('\n') + 1
+        row = char_text[last:]
+        char_text = char_text[:last] + (row[:tail * 3].ljust(len(row)) if big_endian else row[len(row) - tail * 3:].rjust(len(row)))
+
+    return format_addresses(addr, size), hex_text, char_text
@@ -0,0 +1,266 @@
+from PySide2.QtWidgets import QAbstractScrollArea
+from PySide2.QtGui import QPainter, QFont, QFontMetrics, QPalette, QColor
+from PySide2.QtCore import Qt, Signal, QRect, QTimer
+import time
+
+from package.hexformat import format_block, row_size
+
+class HexView(QAbstractScrollArea):
+    # Hex and char view of a memory source that only formats and paints the
+    # rows on screen, so the cost depends on the viewport and not on how much
+    # memory is resident. Scrolls row by row over the whole source; the scroll
+    # bar is scaled when the source has more rows than a QScrollBar can count.
+    # Only the rows the source reports changed are repainted, the bytes that
+    # changed are highlighted and fade out over fade seconds.
+
+    byteSelected = Signal(object) # address of a clicked byte
+    visibleRangeChanged = Signal(object, object) # [start, end) addresses on screen
+
+    scroll_steps = 1 << 30
+    address_chars = 18 # 0x and 16 digits
+    fade = 1.5
+    highlight = QColor(255, 160, 0)
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.source.changed.connect(self.handle_changed)
+        self.source.invalidated.connect(self.handle_invalidated)
+
+        self.rows = -(-source.size // row_size) # the last row may be partial
+        self.top = 0 # first row on screen
+        self.group = 1
+        self.big_endian = False
+        self.selection = None # (address, length) drawn highlighted
+        self.updating = False
+        self.wheel = 0 # wheel movement not yet scrolled, in eighths of a degree
+        self.fader = QTimer(self)
+        self.fader.setInterval(50)
+        self.fader.timeout.connect(self.fade_step)
+
+        self.setFont(QFont('Courier New'))
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.verticalScrollBar().valueChanged.connect(self.handle_scroll)
+        self.horizontalScrollBar().valueChanged.connect(lambda value: self.viewport().update())
+        self.update_metrics()
+
+    def update_metrics(self):
+        metrics = QFontMetrics(self.font())
+        self.char_width = metrics.horizontalAdvance('0')
+        self.line_height = metrics.height()
+        self.ascent = metrics.ascent()
+        self.update_scrollbars()
+
+    def hex_chars(self):
+        return (row_size // self.group) * (2 * self.group + 1)
+
+    def columns(self):
+        # x of the address, hex and char columns, in pixels
+        address = self.char_width
+        hexes = address + (self.address_chars + 2) * self.char_width
+        chars = hexes + (self.hex_chars() + 1) * self.char_width
+        return address, hexes, chars
+
+    def visible_rows(self):
+        return max(self.viewport().height() // self.line_height, 1)
+
+    def max_top(self):
+        return max(self.rows - self.visible_rows(), 0)
+
+    def update_scrollbars(self):
+        bar = self.verticalScrollBar()
+        steps = min(self.max_top(), self.scroll_steps)
+        self.updating = True
+        bar.setRange(0, steps)
+        bar.setPageStep(self.visible_rows() if steps == self.max_top() else max(self.visible_rows() * steps // self.max_top(), 1))
+        bar.setSingleStep(1)
+        bar.setValue(self.top * steps // self.max_top() if self.max_top() else 0)
+        self.updating = False
+
+        width = self.columns()[2] + (row_size * 3 + 1) * self.char_width
+        self.horizontalScrollBar().setRange(0, max(width - self.viewport().width(), 0))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    def handle_scroll(self, value):
+        if self.updating:
+            return
+        steps = self.verticalScrollBar().maximum()
+        if steps == self.max_top(): # one step per row
+            self.set_top(value, False)
+        else:
+            self.set_top(self.max_top() * value // steps if steps else 0, False)
+
+    def set_top(self, row, move_bar=True):
+        self.top = min(max(row, 0), self.max_top())
+        if move_bar:
+            self.update_scrollbars()
+        self.fetch()
+        self.viewport().update()
+        self.visibleRangeChanged.emit(*self.visible_range())
+
+    def goto(self, addr):
+        # scrolls addr into view, near the top
+        self.set_top(addr // row_size - min(2, self.visible_rows() // 4))
+
+    def visible_range(self):
+        # [start, end) addresses of the rows on screen
+        start = self.top * row_size
+        return start, min(start + (self.visible_rows() + 1) * row_size, self.source.size)
+
+    def fetch(self, refresh=False):
+        start, end = self.visible_range()
+        return self.source.fetch(start, end - start, refresh)
+
+    def update_rows(self, start, end):
+        # repaints the rows on screen holding [start, end)
+        first, last = self.visible_range()
+        start = max(start, first)
+        end = min(end, last)
+        if start >= end:
+            return False
+        y = (start - first) // row_size * self.line_height
+        rows = (end - 1 - first) // row_size + 1 - (start - first) // row_size
+        self.viewport().update(0, y, self.viewport().width(), rows * self.line_height)
+        return True
+
+    def handle_changed(self, start, end):
+        if self.update_rows(start, end) and not self.fader.isActive():
+            self.fader.start()
+
+    def changes(self, fade=None):
+        # (address, age, offsets) of the highlighted changes on screen
+        if not hasattr(self.source, 'changes_in'):
+            return []
+        now = time.monotonic()
+        fade = fade if fade else self.fade
+        start, end = self.visible_range()
+        return [(addr, now - when, offsets) for addr, when, offsets in self.source.changes_in(start, end - start) if now - when < fade]
+
+    def fade_step(self):
+        # one more step than the fade, to paint the highlight away
+        changes = self.changes(self.fade + self.fader.interval() / 1000)
+        if not changes:
+            self.fader.stop()
+        for addr, age, offsets in changes:
+            self.update_rows(addr + int(offsets[0]), addr + int(offsets[-1]) + 1)
+
+    def handle_invalidated(self, start, end):
+        # reads what is on screen again, whatever state the guest is in
+        first, last = self.visible_range()
+        if start < last and end > first:
+            self.fetch()
+            self.viewport().update()
+
+    def set_group(self, group):
+        self.group = group if group in [1, 2, 4, 8] else 1
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def set_big_endian(self, big_endian):
+        self.big_endian = big_endian
+        self.viewport().update()
+
+    def set_selection(self, addr, length=1):
+        self.selection = (addr, length) if addr is not None else None
+        self.viewport().update()
+
+    def byte_rects(self, addr, start):
+        # hex and char cells of the byte at addr, relative to the first row at start
+        address, hexes, chars = self.columns()
+        y = (addr - start) // row_size * self.line_height
+        col = addr % row_size
+        group, pos = divmod(col, self.group)
+        if self.big_endian: # groups left to right, most significant byte first
+            x = group * (2 * self.group + 1) + pos * 2
+            c = col * 3
+        else: # groups right to left, most significant byte first
+            x = (row_size // self.group - 1 - group) * (2 * self.group + 1) + (self.group - 1 - pos) * 2
+            c = (row_size - 1 - col) * 3
+        return QRect(hexes + x * self.char_width, y, 2 * self.char_width, self.line_height), QRect(chars + c * self.char_width, y, 3 * self.char_width, self.line_height)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        painter.fillRect(event.rect(), self.palette().color(QPalette.Base))
+        painter.translate(-self.horizontalScrollBar().value(), 0)
+
+        # only the rows in the area being repainted are formatted
+        top, bottom = self.visible_range()
+        first = max(event.rect().top() // self.line_height, 0)
+        last = event.rect().bottom() // self.line_height + 1
+        start = min(top + first * row_size, bottom)
+        end = min(top + last * row_size, bottom)
+        data, mapped = self.source.read(start, end - start)
+        addresses, hexes, chars = format_block(data, start, self.group, self.big_endian, mapped)
+        address_x, hex_x, char_x = self.columns()
+
+        for addr, age, offsets in self.changes():
+            color = QColor(self.highlight)
+            color.setAlphaF(1 - age / self.fade)
+            offsets = offsets[(offsets >= start - addr) & (offsets < end - addr)]
+            for a in offsets.tolist():
+                for rect in self.byte_rects(addr + a, top):
+                    painter.fillRect(rect, color)
+
+        if self.selection:
+            addr, length = self.selection
+            for a in range(max(addr, start), min(addr + length, end)):
+                for rect in self.byte_rects(a, top):
+                    painter.fillRect(rect, Qt.cyan)
+
+        text = self.palette().color(QPalette.Text)
+        loading = self.palette().color(QPalette.Disabled, QPalette.Text)
+        for n, (address, hex_line, char_line) in enumerate(zip(addresses.split('\n'), hexes.split('\n'), chars.split('\n'))):
+            y = (first + n) * self.line_height + self.ascent
+            painter.setPen(text)
+            painter.drawText(address_x, y, address)
+            if not self.source.loaded(start + n * row_size): # not read yet
+                painter.setPen(loading)
+                hex_line = hex_line.replace('*', '?')
+                char_line = char_line.replace('.', '?')
+            painter.drawText(hex_x, y, hex_line)
+            painter.drawText(char_x, y, char_line)
+
+        painter.setPen(QColor(Qt.lightGray))
+        painter.drawLine(hex_x - self.char_width, 0, hex_x - self.char_width, self.viewport().height())
+        painter.drawLine(char_x - self.char_width // 2, 0, char_x - self.char_width // 2, self.viewport().height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.set_top(self.top)
+
+    def wheelEvent(self, event):
+        # three rows a notch, touchpads send a fraction of a notch at a time
+        self.wheel += event.angleDelta().y()
+        rows = int(self.wheel / 40)
+        if rows:
+            self.wheel -= rows * 40
+            self.set_top(self.top - rows)
+
+    def keyPressEvent(self, event):
+        moves = {
+            Qt.Key_Up: -1,
+            Qt.Key_Down: 1,
+            Qt.Key_PageUp: -self.visible_rows(),
+            Qt.Key_PageDown: self.visible_rows()
+        }
+        if event.key() in moves:
+            self.set_top(self.top + moves[event.key()])
+        elif event.key() == Qt.Key_Home:
+            self.set_top(0)
+        elif event.key() == Qt.Key_End:
+            self.set_top(self.max_top())
+        else:
+            super().keyPressEvent(event)
+
+    def mousePressEvent(self, event):
+        start = self.visible_range()[0]
+        x = event.pos().x() + self.horizontalScrollBar().value()
+        row = start + event.pos().y() // self.line_height * row_size
+        for col in range(min(row_size, self.source.size - row)):
+            hex_rect, char_rect = self.byte_rects(row + col, start)
+            if hex_rect.left() <= x < hex_rect.right() or char_rect.left() <= x < char_rect.right():
+                self.set_selection(row + col)
+                self.byteSelected.emit(row + col)
+                return
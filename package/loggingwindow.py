@@ -1,6 +1,6 @@
 from PySide2.QtWidgets import QWidget, QLabel, QShortcut, QRadioButton, QVBoxLayout, QMainWindow, QHBoxLayout, QAction, QFileDialog, QScrollArea
 from PySide2.QtGui import QFont, QKeySequence
-from PySide2.QtCore import Qt, QTimer
+from PySide2.QtCore import Qt
 import os, re
 
 class LoggingWindow(QMainWindow):
@@ -14,17 +14,17 @@ class LoggingWindow(QMainWindow):
 
         shortcut = QShortcut(QKeySequence('Ctrl+r'), self, activated=self.disp_output)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.disp_output)
-        self.timer.start(100)
+        # the guest logs nothing while it is paused
+        self.poller = self.qmp.scheduler.register('Error Log', 100, self.disp_output, needs_running=True)
 
         self.activated = 0
 
         self.length = 100
         self.text_digest = ''
 
-        self.qmp.hmp_command('logfile /tmp/errors.log')
-        self.qmp.hmp_command('log guest_error')
+        with self.qmp.batch() as batch:
+            batch.hmp('logfile /tmp/errors.log')
+            batch.hmp('log guest_error')
 
         self.setWindowTitle('Error Log')
         self.setGeometry(100, 100, 600, 400)
@@ -120,15 +120,15 @@ class LoggingWindow(QMainWindow):
         if state:
             self.activated = n
  
-        self.qmp.hmp_command('log none')
-
         open('/tmp/errors.log', 'w').close()
 
-        self.qmp.hmp_command('log ' + self.buttons[self.activated].text())
+        with self.qmp.batch() as batch:
+            batch.hmp('log none')
+            batch.hmp('log ' + self.buttons[self.activated].text())
 
     def closeEvent(self, event):
 
-        self.timer.stop()
+        self.qmp.scheduler.unregister(self.poller)
         # os.system('rm /tmp/errors.log')
         event.accept()
     
@@ -147,7 +147,7 @@ class LoggingWindow(QMainWindow):
         file_menu = bar.addMenu('File')
         options = bar.addMenu('Options')
 
-        toggle_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: self.timer.start(100) if toggle_refresh.isChecked() else self.timer.stop())
+        toggle_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: setattr(self.poller, 'enabled', toggle_refresh.isChecked()))
         toggle_refresh.setChecked(True)
         save_to_file = QAction('Save to File', self, triggered=self.export_log)
 
@@ -1,4 +1,4 @@
-from PySide2.QtWidgets import QMainWindow, QAction, QGridLayout, QPushButton, QWidget, QErrorMessage, QMessageBox, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QGraphicsView, QGraphicsScene
+from PySide2.QtWidgets import QMainWindow, QAction, QGridLayout, QPushButton, QWidget, QErrorMessage, QMessageBox, QFileDialog, QInputDialog, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QGraphicsView, QGraphicsScene
 from PySide2.QtGui import QIcon, QFont, QGuiApplication, QPixmap
 from PySide2.QtCore import QSize, Slot, Qt, Signal
 
@@ -11,10 +11,12 @@ from package.tracewindow import TraceWindow
 from package.memtree import MemTree
 from package.qmpwrapper import QMP
 from package.assemblywindow import AssemblyWindow
+from package.statswindow import StatsWindow
+from package.watchwindow import WatchWindow
+from package.dumpfile import DumpFile
+from package.diffwindow import DiffWindow
 
 from datetime import datetime, timezone
-import threading
-import time
 
 from yapsy.PluginManager import PluginManager
 import logging
@@ -39,7 +41,8 @@ class MainWindow(QMainWindow):
         self.init_ui()
 
         self.qmp.timeUpdate.connect(self.update_time)
-        self.t = TimeThread(self.qmp)
+        self.qmp.scheduler.register('Simulation Time', 500, command='itc-sim-time', args={'clock': 'virtual'}, needs_running=True)
+        self.qmp.scheduler.droppedChanged.connect(self.update_dropped)
         
         self.time_mult = TimeMultiplier(self.qmp, self.kill_thread)
 
@@ -79,13 +82,16 @@ class MainWindow(QMainWindow):
         open_ = QAction("Open Image", self)
         file_.addAction(open_)
 
+        open_dump = QAction("Open Memory Dump", self, triggered=self.open_dump)
+        file_.addAction(open_dump)
+
         exit_ = QAction("Exit", self)
         exit_.triggered.connect(self.close)
         exit_.setShortcut('Ctrl+W')
         file_.addAction(exit_)
 
         # Edit Menu Options
-        prefs = QAction("Preferences", self, triggered=lambda:self.open_new_window(Preferences(self.app, self.default_theme, self.qmp, self.t)))
+        prefs = QAction("Preferences", self, triggered=lambda:self.open_new_window(Preferences(self.app, self.default_theme, self.qmp)))
         edit.addAction(prefs)
 
         # Run Menu Options
@@ -99,6 +105,12 @@ class MainWindow(QMainWindow):
         hexdmp = QAction("Memory Dump", self, triggered=(lambda: self.open_new_window(MemDumpWindow(self.qmp)) if self.qmp.isSockValid() else None))
         tools.addAction(hexdmp)
 
+        watch = QAction("Watch", self, triggered=(lambda: self.open_new_window(WatchWindow(self.qmp)) if self.qmp.isSockValid() else None))
+        tools.addAction(watch)
+
+        diff = QAction("Memory Diff", self, triggered=lambda: self.window.append(DiffWindow(self.qmp))) # dumps need no connection
+        tools.addAction(diff)
+
         asm = QAction("Assembly View", self, triggered=(lambda: self.open_new_window(AssemblyWindow(self.qmp)) if self.qmp.isSockValid() else None))
         tools.addAction(asm)
 
@@ -117,6 +129,9 @@ class MainWindow(QMainWindow):
         trace = QAction("Trace Event Viewer", self, triggered=lambda: self.open_new_window(TraceWindow(self.qmp)))
         tools.addAction(trace)
 
+        stats = QAction("QMP Statistics", self, triggered=lambda: self.open_new_window(StatsWindow(self.qmp)))
+        tools.addAction(stats)
+
         self.addPlugins(tools)
         # Help Menu Options 
         usage = QAction("Usage Guide", self)
@@ -177,6 +192,9 @@ class MainWindow(QMainWindow):
         self.banner = QLabel('<font color="grey">Connect to QMP to get started!</font>')
         grid.addWidget(self.banner, 3)
 
+        self.dropped = QLabel()
+        grid.addWidget(self.dropped)
+
         conn_grid = QHBoxLayout()
 
         self.connect_button = QPushButton("Connect")
@@ -200,6 +218,21 @@ class MainWindow(QMainWindow):
         center.setLayout(grid)
         self.setCentralWidget(center)
 
+    def open_dump(self):
+        # a memory dump file, viewed without QEMU
+        filename = QFileDialog.getOpenFileName(self, 'Open Memory Dump', '.', options=QFileDialog.DontUseNativeDialog)
+        if not filename[0]:
+            return
+        base, ok = QInputDialog.getText(self, 'Open Memory Dump', 'Address of the first byte:', text='0x0')
+        if not ok:
+            return
+        try:
+            dump_file = DumpFile(filename[0], int(base, 0))
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, 'Open Memory Dump', f'Could not open {filename[0]}: {e}')
+            return
+        self.window.append(MemDumpWindow(self.qmp, dump_file.base, dump_file=dump_file))
+
     def throwError(self):
         msgBox = QMessageBox(self)
         msgBox.setText('Lost Connection to QMP!')
@@ -220,9 +253,19 @@ class MainWindow(QMainWindow):
             self.running_state.setText('Current State: <font color="red">Paused</font>')
 
     def handle_connect_button(self, value):
+        # Catches connectionChange, which arrives once the connection attempt has finished
         self.connect_button.setChecked(value)
         self.host.setReadOnly(value)
         self.port.setReadOnly(value)
+        if value:
+            self.time_mult.start()
+            self.banner.setText('QEMU Version ' + str(self.qmp.banner['QMP']['version']['package']))
+            self.pause_button.setEnabled(True)
+        elif self.pause_button.isEnabled(): # lost the connection
+            self.kill_thread.emit()
+            self.banner.setText('<font color="grey">Connect to QMP to get started!</font>')
+            self.running_state.setText('Current State: <font color="grey">Inactive</font>')
+            self.pause_button.setEnabled(False)
 
     def open_new_window(self, new_window):
         if self.qmp.isSockValid():
@@ -232,6 +275,11 @@ class MainWindow(QMainWindow):
         date = datetime.fromtimestamp(time / 1000000000, timezone.utc)
         self.time.setText(f'Time: {date.day - 1:02}:{date.hour:02}:{date.minute:02}:{date.second:02}') # -1 for day because it starts from 1
 
+    def update_dropped(self, dropped):
+        # polls skipped because QMP replies are slower than the poll rates
+        self.dropped.setText(f'<font color="orange">Slow replies: {dropped} polls dropped</font>')
+        self.dropped.setToolTip('\n'.join(f'{p["name"]}: {p["dropped"]} dropped, {p["in_flight"]} in flight' for p in self.qmp.scheduler.stats()))
+
     def qmp_start(self):
         if self.qmp.isSockValid():
             self.qmp.sock_disconnect()
@@ -245,31 +293,12 @@ class MainWindow(QMainWindow):
             s = self.port.text()
             if s.isnumeric():
                 self.qmp.sock_connect(self.host.text(), int(s))
-                if self.qmp.isSockValid():
-                    self.time_mult.start()
-                    self.banner.setText('QEMU Version ' + str(self.qmp.banner['QMP']['version']['package']))
-                    self.pause_button.setEnabled(True)
             else:
                 self.host.setText('127.0.0.1')
                 self.port.setText('55555')
                 self.qmp.sock_connect('127.0.0.1', 55555)
-                if self.qmp.isSockValid():
-                    self.time_mult.start()
-                    self.banner.setText('QEMU Version ' + str(self.qmp.banner['QMP']['version']['package']))
-                    self.pause_button.setEnabled(True)
-        # check if running initally
-        if self.qmp.running:
-            self.paused = False
-            self.pause_button.setText('■')
-            self.running_state.setText('Current State: <font color="green">Running</font>')
-        else:
-            self.paused = True 
-            self.pause_button.setText('▶')
-            self.running_state.setText('Current State: <font color="red">Paused</font>')
-        if not self.qmp.isAlive():
-            self.qmp.start()
-        if not self.t.isAlive():
-            self.t.start()
+            # the button stays unchecked until connectionChange reports success
+            self.connect_button.setChecked(False)
 
     def closeEvent(self, event):
         self.kill_thread.emit()
@@ -280,16 +309,3 @@ class MainWindow(QMainWindow):
         self.view = QGraphicsView(self.scene)
         self.scene.addItem(self.time_mult.chart)
         self.view.show()
-
-class TimeThread(threading.Thread):
-
-    def __init__(self, qmp):
-        super().__init__()
-        self.daemon = True
-        self.qmp = qmp
-
-    def run(self):
-        while True:
-            time.sleep(.5)
-            args = {'clock': 'virtual'}
-            self.qmp.command('itc-sim-time', args=args)
@@ -0,0 +1,34 @@
+import bisect
+import base64
+
+class MemBlock:
+    # Guest memory as returned by get-pmem-raw: the bytes and the mapped parts
+    # of the block as sorted (start, end) offsets from addr. next is the first
+    # mapped address at or after the end of the block, None if there is none.
+
+    def __init__(self, addr, data, mapped, hash_=None, next_=None):
+        self.addr = addr
+        self.data = data
+        self.mapped = mapped
+        self.hash = hash_
+        self.next = next_
+
+    @classmethod
+    def from_reply(cls, ret):
+        # 'return' member of a get-pmem-raw reply, whose addresses are int64
+        addr = ret['addr']
+        mask = (1 << 64) - 1
+        mapped = [((r['start'] - addr) & mask, (r['end'] - addr) & mask) for r in ret['mapped']]
+        next_ = ret['next'] & mask if 'next' in ret else None
+        return cls(addr & mask, base64.b64decode(ret['data']), mapped, ret['hash'], next_)
+
+    def __len__(self):
+        return len(self.data)
+
+    def view(self, start=0, end=None):
+        # zero copy slice of the bytes
+        return memoryview(self.data)[start:end]
+
+    def is_mapped(self, offset):
+        n = bisect.bisect_right(self.mapped, (offset, float('inf'))) - 1
+        return n >= 0 and offset < self.mapped[n][1]
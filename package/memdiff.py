@@ -0,0 +1,119 @@
+from PySide2.QtCore import QObject, Signal
+import threading
+import numpy
+
+def changed_offsets(x, y):
+    # sorted offsets of the bytes that differ between two uint8 arrays of the
+    # same length. Words are compared first and only the words that differ
+    # are compared byte by byte, so equal memory costs one pass.
+    n = len(x) // 8 * 8
+    words = numpy.flatnonzero(x[:n].view(numpy.uint64) != y[:n].view(numpy.uint64))
+    offsets = numpy.empty(0, dtype=numpy.int64)
+    if words.size:
+        differ = x[:n].reshape(-1, 8)[words] != y[:n].reshape(-1, 8)[words]
+        offsets = (words[:, None] * 8 + numpy.arange(8))[differ]
+    tail = numpy.flatnonzero(x[n:] != y[n:])
+    if tail.size:
+        offsets = numpy.concatenate([offsets, tail + n])
+    return offsets
+
+def runs(offsets, gap):
+    # (starts, ends, counts) of the runs of offsets, a run only has gaps of at
+    # most gap unchanged bytes
+    if not offsets.size:
+        return offsets, offsets, offsets
+    breaks = numpy.flatnonzero(numpy.diff(offsets) > gap + 1)
+    first = numpy.concatenate([[0], breaks + 1])
+    last = numpy.concatenate([breaks, [len(offsets) - 1]])
+    return offsets[first], offsets[last] + 1, last - first + 1
+
+
+class Diff(QObject):
+    # Compares two DumpFiles over the addresses both hold on a worker thread,
+    # chunk_size bytes at a time straight from their mappings, and reports the
+    # changed bytes as (start, end, changed bytes) runs in address order.
+    # Stops after max_runs runs.
+
+    progress = Signal(object, object) # bytes compared, bytes to compare
+    found = Signal(object) # new runs
+    finished = Signal(object, object) # runs, None or why the diff stopped early
+
+    chunk_size = 16 * 1024 * 1024
+    max_runs = 100000
+
+    def __init__(self, a, b, gap=16):
+        super().__init__()
+        self.a = a
+        self.b = b
+        self.gap = gap
+        self.start = max(a.base, b.base)
+        self.end = min(a.size, b.size)
+        self.cancelled = threading.Event()
+        self.runs = 0
+
+    def run_in_thread(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def array(self, dump, addr, size):
+        (_, view), = dump.views(addr, size)
+        return numpy.frombuffer(view, dtype=numpy.uint8)
+
+    def run(self):
+        reason = None
+        last = None # the run that may go on in the next chunk
+        try:
+            if self.start >= self.end:
+                raise ValueError('The snapshots do not overlap')
+            for addr in range(self.start, self.end, self.chunk_size):
+                size = min(self.chunk_size, self.end - addr)
+                for dump in [self.a, self.b]: # read from disk while this chunk is compared
+                    dump.will_need(addr + size, self.chunk_size)
+                starts, ends, counts = runs(changed_offsets(self.array(self.a, addr, size), self.array(self.b, addr, size)), self.gap)
+                found = []
+                for start, end, count in zip(starts.tolist(), ends.tolist(), counts.tolist()):
+                    if last and addr + start - last[1] <= self.gap:
+                        last = (last[0], addr + end, last[2] + count)
+                        continue
+                    if last:
+                        found.append(last)
+                    last = (addr + start, addr + end, count)
+                reason = self.report(found)
+                self.progress.emit(addr + size - self.start, self.end - self.start)
+                if self.cancelled.is_set():
+                    reason = 'Cancelled'
+                if reason:
+                    break
+            if last: # found already, even if it could have gone on
+                self.report([last])
+        except Exception as e:
+            reason = str(e) or type(e).__name__
+        self.finished.emit(self.runs, reason)
+
+    def report(self, found):
+        found = found[:self.max_runs - self.runs]
+        self.runs += len(found)
+        if found:
+            self.found.emit(found)
+        if self.runs >= self.max_runs:
+            return f'Stopped after {self.max_runs} runs'
+
+
+class DiffResults:
+    # (start, end, changed bytes) of the runs of a diff, in address order
+
+    def __init__(self):
+        self.runs = []
+        self.changed = 0
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __getitem__(self, n):
+        return self.runs[n]
+
+    def add(self, runs):
+        self.runs.extend(runs)
+        self.changed += sum(count for start, end, count in runs)
@@ -1,83 +1,63 @@
-from PySide2.QtCore import QSize, Slot, Qt, QSemaphore, QThread, Signal
-from PySide2.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QLabel, QTextEdit, QPushButton, QRadioButton, QCheckBox, QSplitter, QFileDialog, QComboBox
-from package.qmpwrapper import QMP
-from PySide2.QtGui import QFont, QTextCharFormat, QTextCursor, QIcon
+from PySide2.QtCore import Qt
+from PySide2.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QLabel, QPushButton, QRadioButton, QCheckBox, QComboBox
+from PySide2.QtGui import QIcon
 from enum import Enum
+import os
 from package.constants import constants
+from package.hexview import HexView
+from package.prefetcher import Prefetcher
+from package.searchwindow import SearchWindow
+from package.exportwindow import ExportWindow
+from package.watchwindow import WatchWindow
 
-import time
-from math import ceil
-from random import randint
-
-
-def char_convert(byte):
-    if byte in range(127):
-        if byte == 0:
-            return '\\0'
-        elif byte == 9:
-            return '\\t'
-        elif byte == 10:
-            return '\\n'
-        elif byte >= 32:
-            return chr(byte)
-    return '.'
 
 class MemDumpWindow(QWidget):
 
-    kill_signal = Signal(bool)
-
-    def __init__(self, qmp, base=0, max=constants['block_size']):
+    def __init__(self, qmp, base=0, end=None, dump_file=None):
         super().__init__()
 
-        self.flag = False
-        self.threshold = 2048 # number of resident bytes
-
         self.qmp = qmp
-        self.init_ui()
-
-        self.baseAddress = base
-        self.maxAddress = self.baseAddress
-
-        self.delta = 4 # adds a small buffer area for scrolling action to happen
-
-        self.sem = QSemaphore(1) # semaphore for controlling access to the enabling / disabling of the scroll listening
-        self.pos = self.chr_display.verticalScrollBar().value()
-
-        self.highlight_sem = QSemaphore(1) # semaphore for controlling access to highlighting state
-        self.is_highlighted = False
-        self.highlight_addr = 0
+        self.dump_file = dump_file # DumpFile shown instead of the guest
+        self.prefetcher = None
+        if dump_file:
+            self.source = dump_file
+        else:
+            self.source = qmp.pages # shared with every other memory view
+            self.prefetcher = Prefetcher(self.source, constants['prefetch_in_flight'])
 
         self.endian = Endian.little
-        self.endian_sem = QSemaphore(1)
+        self.search_window = None
+        self.export_window = None
+        self.watch_window = None
 
-        self.hash = randint(0, 0xfffffffffffffff)
+        self.init_ui()
 
         icon = QIcon('package/icons/nasa.png')
         self.setWindowIcon(icon)
 
-        self.max_size = 0xfffffffffffffff
-
-        self.qmp.pmem.connect(self.update_text)
-        self.grab_data(val=self.baseAddress, size=min(max, constants['block_size'] + base)-self.baseAddress)
+        self.address.setText(f'0x{base:x}')
+        if end is not None: # last address of a memory tree region, the default size to save
+            self.size.setText(f'0x{end - base + 1:x}')
+        self.view.goto(base)
 
-        self.t = MyThread(self)
-        self.t.timing_signal.connect(lambda:self.grab_data(val=self.baseAddress, size=self.maxAddress-self.baseAddress, grouping=self.grouping.currentText(), refresh=True))
-        self.qmp.stateChanged.connect(self.t.halt)
-        self.t.running = self.qmp.running
-        self.t.start()
+        # kept up to date together with every other window's range
+        self.subscription = None
+        if not dump_file:
+            self.subscription = self.qmp.subscriptions.subscribe(*self.view.visible_range())
+            self.view.visibleRangeChanged.connect(self.subscription.move)
 
         self.show()
-        
 
-    def init_ui(self):   
+
+    def init_ui(self):
         self.hbox = QHBoxLayout() # holds widgets for refresh button, desired address, and size to grab
         self.vbox = QVBoxLayout() # main container
-        self.lower_hbox = QSplitter() # holds memory views
-        self.lower_container = QHBoxLayout() # holds  lower_hbox and the endian_vbox
+        self.lower_container = QHBoxLayout() # holds the memory view and the endian_vbox
         self.endian_vbox = QVBoxLayout()
 
         self.hbox.addWidget(QLabel('Address:'))
         self.address = QLineEdit()
+        self.address.returnPressed.connect(lambda: self.find(self.address.text(), self.size.text()))
         self.hbox.addWidget(self.address)
 
         self.hbox.addWidget(QLabel('Size:'))
@@ -87,20 +67,23 @@ class MemDumpWindow(QWidget):
         self.hbox.addWidget(QLabel('Grouping:'))
         self.grouping = QComboBox()
         self.grouping.addItems(['1','2','4','8'])
+        self.grouping.currentTextChanged.connect(lambda text: self.view.set_group(int(text)))
         self.hbox.addWidget(self.grouping)
 
         self.search = QPushButton('Search')
-        self.search.clicked.connect(lambda:self.find(self.address.text(), constants['block_size']))
+        self.search.clicked.connect(lambda: self.find(self.address.text(), self.size.text()))
         self.hbox.addWidget(self.search)
 
+        self.find_pattern = QPushButton('Find Pattern')
+        self.find_pattern.clicked.connect(self.open_search)
+        self.hbox.addWidget(self.find_pattern)
+
         self.refresh = QPushButton('Refresh')
-        self.refresh.clicked.connect(lambda:self.grab_data(val=self.address.text(), size=self.size.text(), grouping=self.grouping.currentText(), refresh=True))
+        self.refresh.clicked.connect(self.refresh_all)
         self.hbox.addWidget(self.refresh)
 
         self.save = QPushButton('Save')
-        self.save.clicked.connect(lambda: self.save_to_file())
-        self.disable_save(self.qmp.running)
-        self.qmp.stateChanged.connect(self.disable_save)
+        self.save.clicked.connect(self.open_export)
         self.hbox.addWidget(self.save)
 
         self.auto_refresh = QCheckBox('Auto Refresh')
@@ -108,43 +91,21 @@ class MemDumpWindow(QWidget):
         self.auto_refresh.stateChanged.connect(self.auto_refresh_check)
         self.hbox.addWidget(self.auto_refresh)
 
+        if self.dump_file: # a dump never changes and is already a file
+            self.watch = QPushButton('Watch')
+            self.watch.clicked.connect(self.open_watch)
+            self.hbox.addWidget(self.watch)
+            for widget in [self.refresh, self.save, self.auto_refresh]:
+                widget.hide()
+
         self.vbox.addLayout(self.hbox)
-        
-        # textbox for addresses
-        self.addresses = QTextEdit()
-        self.addresses.setReadOnly(True)
-        self.addresses.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.addresses.setLineWrapMode(QTextEdit.NoWrap)
-        self.addresses.setCurrentFont(QFont('Courier New'))
-        self.addresses.setGeometry(0,0,150,500)
-        self.lower_hbox.addWidget(self.addresses)
-
-        # textbox for hex display of memory
-        self.mem_display = QTextEdit()
-        self.mem_display.setReadOnly(True)
-        self.mem_display.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.mem_display.setLineWrapMode(QTextEdit.NoWrap)
-        self.mem_display.setCurrentFont(QFont('Courier New'))
-        self.mem_display.setGeometry(0,0,600,500)
-        self.lower_hbox.addWidget(self.mem_display)
-        
-        # textbox for char display of memory
-        self.chr_display = QTextEdit()
-        self.chr_display.setReadOnly(True)
-        self.chr_display.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        self.chr_display.setLineWrapMode(QTextEdit.NoWrap)
-        self.chr_display.setCurrentFont(QFont('Courier New'))
-        self.mem_display.setGeometry(0,0,400,500)
-        self.lower_hbox.addWidget(self.chr_display)
-
-        self.lower_container.addWidget(self.lower_hbox)
-
-        self.mem_display.verticalScrollBar().valueChanged.connect(self.addresses.verticalScrollBar().setValue) #synchronizes addresses's scroll bar to mem_display's 
-        self.addresses.verticalScrollBar().valueChanged.connect(self.mem_display.verticalScrollBar().setValue) #synchronizes mem_display's scroll to addresses's, allowing for searching for addresses to scrol mem_display to the desired point 
-        self.chr_display.verticalScrollBar().valueChanged.connect(self.mem_display.verticalScrollBar().setValue)  
-        self.mem_display.verticalScrollBar().valueChanged.connect(self.chr_display.verticalScrollBar().setValue)  
-
-        self.chr_display.verticalScrollBar().valueChanged.connect(self.handle_scroll) # allows us to do scrolling
+
+        # paints only the rows on screen, reading pages from self.source
+        self.view = HexView(self.source)
+        self.view.byteSelected.connect(lambda addr: self.address.setText(f'0x{addr:x}'))
+        if self.prefetcher:
+            self.view.visibleRangeChanged.connect(self.prefetcher.visit)
+        self.lower_container.addWidget(self.view)
 
         # setting up endiannes selection buttons
         self.little = QRadioButton("Little Endian")
@@ -154,394 +115,85 @@ class MemDumpWindow(QWidget):
         self.big.clicked.connect(lambda:self.change_endian(Endian.big))
         self.endian_vbox.addWidget(self.little)
         self.endian_vbox.addWidget(self.big)
-        self.endian_vbox.addSpacing(400)
+        self.endian_vbox.addStretch()
 
         self.lower_container.addLayout(self.endian_vbox)
 
         self.vbox.addLayout(self.lower_container)
         self.vbox.setSpacing(10)
         self.setLayout(self.vbox)
-        self.setWindowTitle("Memory Dump")
-        self.setGeometry(100, 100, 1550, 500)
-
-    def disable_save(self, val):
-        self.save.setEnabled(not val)
-
-    def save_to_file(self):
-        try:
-            filename = QFileDialog().getSaveFileName(self, 'Save', '.', options=QFileDialog.DontUseNativeDialog)
-        except Exception as e:
-            return
-
-        if filename[0] == '':
-            return
-
-        args = {
-            'val': self.baseAddress,
-            'size': self.maxAddress - self.baseAddress,
-            'filename': filename[0]
-        }
+        self.setWindowTitle(f'Memory Dump - {os.path.basename(self.dump_file.filename)}' if self.dump_file else "Memory Dump")
+        self.setGeometry(100, 100, 1100, 500)
+
+    def open_export(self):
+        # the size given, or what is on screen
+        start, end = self.view.visible_range()
+        addr = parse_int(self.address.text(), start)
+        size = parse_int(self.size.text(), end - start)
+        if self.export_window and self.export_window.isVisible():
+            self.export_window.raise_()
+        else:
+            self.export_window = ExportWindow(self.qmp, addr, size)
 
-        self.qmp.command('pmemsave', args=args)
-        
 
+    def refresh_all(self):
+        # the view reads the pages on screen again once they are invalidated
+        start, end = self.view.visible_range()
+        self.source.invalidate(start, end - start)
 
 
     def auto_refresh_check(self, value):
-        if self.auto_refresh.checkState() == Qt.CheckState.Checked and not self.t.isRunning():
-            self.t = MyThread(self)
-            self.t.timing_signal.connect(lambda:self.grab_data(val=self.baseAddress, size=self.maxAddress-self.baseAddress, grouping=self.grouping.currentText(), refresh=True))
-            self.t.start()
-        elif self.auto_refresh.checkState() == Qt.CheckState.Unchecked:
-            self.kill_signal.emit(True)
+        if self.subscription:
+            self.subscription.enabled = self.auto_refresh.checkState() == Qt.CheckState.Checked
 
 
     def closeEvent(self, event):
-        self.kill_signal.emit(True)
-        self.qmp.pmem.disconnect(self.update_text)
-        while True:
-            if self.sem.tryAcquire(1, 1):
-                break
-            self.sem.release(10)
+        if self.subscription:
+            self.qmp.subscriptions.unsubscribe(self.subscription)
+        self.source.changed.disconnect(self.view.handle_changed)
+        self.source.invalidated.disconnect(self.view.handle_invalidated)
+        if self.prefetcher:
+            self.prefetcher.close()
         event.accept()
 
 
-    def update_text(self, value):
-        if not value or value['hash'] != self.hash: # semaphore must be held before entering this function
-            return
-        byte = value['vals']
-        if self.refresh:
-            self.clear_highlight()
-            self.addresses.clear()  # clearing to refresh data, other regions will be refilled through scrolling
-            self.mem_display.clear()
-            self.chr_display.clear()
-            
-        s = [''] * ceil((len(byte) / (16))) # hex representation of memory
-        addresses =  '' # addresses
-        count = self.baseAddress # keeps track of each 16 addresses
-        if self.pos == self.max:  # scrolling down
-            count = self.maxAddress 
-
-        self.maxAddress = max(count + (len(byte)), self.maxAddress)
- 
-
-        first = True
-        chars = [''] * len(s) # char represenation of memory
-        index = 0
-        self.endian_sem.acquire()
-        nums = ''
-        for tup in byte:
-            b = tup['val']
-            if count % 16 == 0:
-                if first:
-                    addresses += f'0x{count:08x}' 
-                    first = False
-                else:
-                    addresses += f'\n0x{count:08x}' 
-
-                    index += 1
-            count += 1
-             
-            if self.endian == Endian.big:
-                if tup['ismapped']:
-                    nums = f'{b:02x}' + nums
-                    chars[index] += f'{char_convert(b):3}'
-                else:
-                    nums = '**' + nums
-                    chars[index] += f'{".":3}'
-
-            elif self.endian == Endian.little:  
-                if tup['ismapped']:     
-                    nums += f'{b:02x}'      
-                    chars[index] = f'{char_convert(b):3}' + chars[index]
-                else:
-                    nums = '**' + nums
-                    chars[index] = f'{".":3}' + chars[index]
-
-            if count % self.group == 0:
-                if self.endian == Endian.big:
-                    s[index] += nums + ' '
-                elif self.endian == Endian.little:
-                     s[index] = nums + ' ' + s[index]
-                nums = ''
-                #print(f'"{s[index]}"')
-        self.endian_sem.release()
-
-        s = '\n'.join(s)
-        chars = '\n'.join(chars)
-
-        scroll_goto = self.pos
-
-        if self.pos > self.max - self.delta:  # scrolling down
-            self.addresses.append(addresses)
-            self.mem_display.append(s)
-            self.chr_display.append(chars)
-            if self.flag:
-                self.flag = False
-                scroll_goto = (1 - constants['block_size'] / self.threshold) * self.max
-            else:
-                scroll_goto = self.max
-
-        elif self.pos < self.min + self.delta:    # scrolling  up
-            addr_cur = self.addresses.textCursor()
-            mem_cur = self.mem_display.textCursor()
-            chr_cur = self.chr_display.textCursor()
-
-            addr_cur.setPosition(0)
-            mem_cur.setPosition(0)
-            chr_cur.setPosition(0)
-
-            self.addresses.setTextCursor(addr_cur)
-            self.mem_display.setTextCursor(mem_cur)
-            self.chr_display.setTextCursor(chr_cur)
-
-            self.addresses.insertPlainText(addresses + '\n')
-            self.mem_display.insertPlainText(s + '\n')
-            self.chr_display.insertPlainText(chars + '\n')
-            
-            if self.flag:
-                self.flag = False
-                scroll_goto = (constants['block_size'] / self.threshold) * self.max
-            else:
-                scroll_goto = self.chr_display.verticalScrollBar().maximum() - self.max
-
-        else:
-            self.addresses.setPlainText(addresses)
-            self.mem_display.setPlainText(s)
-            self.chr_display.setPlainText(chars)
-
-        self.highlight_sem.acquire()
-        if self.is_highlighted:
-            self.highlight_sem.release()
-            self.highlight(self.highlight_addr, self.group)
-        else:
-            self.highlight_sem.release()
-
-        self.chr_display.verticalScrollBar().setValue(scroll_goto)
-        self.chr_display.verticalScrollBar().valueChanged.connect(self.handle_scroll)
-        self.sem.release()
-
-
-    def grab_data(self, val=0, size=constants['block_size'], grouping=1, refresh=False):       
-        if val == None:
-            val = 0
-        if size == None:
-            size = 1024
-
-        if type(val) == str:
-            try:
-                val = int(val, 0)
-            except Exception:
-                val = 0
-        
-        if type(size) == str:
-            try:
-                size = int(size, 0)
-            except Exception:
-                size = constants['block_size']
-
-        if type(grouping) == str:
-            try:
-                grouping = int(grouping, 0)
-            except:
-                grouping = 1
-
-        if grouping not in [1, 2, 4, 8]:
-            grouping = 1
-
-        if val < 0:
-            val = 0
-        if val >= self.max_size:
+    def find(self, addr, size):
+        addr = parse_int(addr, None)
+        if addr is None or not 0 <= addr < self.source.size:
             return
-        if size < 0:
-            size = constants['block_size']
-        if size > self.threshold:
-            size = self.threshold
-        
-
-        self.sem.acquire()
-
-        val = val - (val % 16)
-        if val < self.baseAddress or refresh:
-            self.baseAddress = val
-        if size % 16 != 0:
-            size = size + (16 - (size % 16))
-        if val + size > self.max_size:
-            size = self.max_size - val
-        
-        try:
-            self.chr_display.verticalScrollBar().valueChanged.disconnect(self.handle_scroll)
-        except:
-            pass
-        self.pos = self.chr_display.verticalScrollBar().value()
-        self.max = self.chr_display.verticalScrollBar().maximum()
-        self.min = self.chr_display.verticalScrollBar().minimum()
-        self.group = grouping
-
-        self.refresh = refresh
-        if refresh: 
-            self.maxAddress = self.baseAddress
-            
-            self.highlight_sem.acquire()
-            if self.is_highlighted and self.highlight_addr not in range(val, val + size):
-                self.is_highlighted = False
-                self.pos = 0
-            self.highlight_sem.release()
-
-        args = {
-                'addr': val,
-                'size': size,
-                'hash': self.hash,
-                'grouping': 1
-                }
-        self.qmp.command('get-pmem', args=args)
+        self.view.set_selection(addr, max(parse_int(size, 1), 1))
+        self.view.goto(addr)
 
+    def select(self, addr, size):
+        self.address.setText(f'0x{addr:x}')
+        self.size.setText(str(size))
+        self.find(self.address.text(), self.size.text())
 
-    def find(self, addr, size):
-        try:
-            addr = int(addr, 0)
-        except ValueError as e:
-            print(e)
-            return
-        if self.baseAddress <= addr and addr <= self.maxAddress:
-            group = self.grouping.currentText()
-            try:
-                group = int(group, 0)
-                if group not in [1, 2, 4, 8]:
-                    group = 1
-            except:
-                group = 1
-            self.highlight(addr, group)
-            
-        else:
-            self.highlight_sem.acquire()
-            self.is_highlighted = True
-            self.highlight_addr = addr
-            self.highlight_sem.release()
-            self.grab_data(val=addr, size=size, refresh=True )
-
-
-    def clear_highlight(self):
-        fmt = QTextCharFormat()
-        fmt.setFont('Courier New')
-        # clearing past highlights
-        addr_cur = self.addresses.textCursor()  # getting cursors
-        mem_cur = self.mem_display.textCursor()
-        chr_cur = self.chr_display.textCursor()
-
-        addr_cur.select(QTextCursor.Document)   # selecting entire document
-        mem_cur.select(QTextCursor.Document)
-        chr_cur.select(QTextCursor.Document)
-        
-        addr_cur.setCharFormat(fmt) # adding format
-        mem_cur.setCharFormat(fmt)
-        chr_cur.setCharFormat(fmt)
-
-
-    def highlight(self, addr, group):
-        self.clear_highlight()
-        
-        # adding new highlights
-        fmt = QTextCharFormat()
-        fmt.setBackground(Qt.cyan)
-        fmt.setFont('Courier New')
-
-        addr_block = self.addresses.document().findBlockByLineNumber((addr - self.baseAddress) // 16) # gets linenos 
-        mem_block = self.mem_display.document().findBlockByLineNumber((addr - self.baseAddress) // 16)
-        chr_block = self.chr_display.document().findBlockByLineNumber((addr - self.baseAddress) // 16)
-
-        addr_cur = self.addresses.textCursor()  # getting cursors
-        mem_cur = self.mem_display.textCursor()
-        chr_cur = self.chr_display.textCursor()
-
-
-        char_offset = 0
-        mem_offset = 0
-        self.endian_sem.acquire()
-        if self.endian == Endian.big:
-            mem_offset = ((addr % 16) // group) * (2 * group + 1)
-            char_offset = (addr % 16) * 3
-        elif self.endian == Endian.little:
-            mem_offset = (((16 / group) - 1 )* (2 * group + 1)) - ((addr % 16) // group) * (2 * group + 1)
-            char_offset = (15*3) - ((addr % 16) * 3)
-        self.endian_sem.release()
-        addr_cur.setPosition(addr_block.position()) # getting positions
-        mem_cur.setPosition(mem_block.position() + mem_offset) # gives character offset within 16 byte line
-        chr_cur.setPosition(chr_block.position() + char_offset) # sets position of char
-
-        chr_text = self.chr_display.toPlainText()
-        if chr_text[chr_cur.position()] == '\\' and chr_cur.position() + 1 < len(chr_text) and chr_text[chr_cur.position() + 1] in ['0', 'n', 't']:
-            chr_cur.setPosition(chr_cur.position() + 2, mode=QTextCursor.KeepAnchor) 
+    def open_search(self):
+        if self.search_window and self.search_window.isVisible():
+            self.search_window.raise_()
         else:
-            chr_cur.setPosition(chr_cur.position() + 1, mode=QTextCursor.KeepAnchor) 
-
-
-        addr_cur.select(QTextCursor.LineUnderCursor)    # selects whole line
-        mem_cur.select(QTextCursor.WordUnderCursor)     # selects just one word
-
-        addr_cur.setCharFormat(fmt) # setting format
-        mem_cur.setCharFormat(fmt)
-        chr_cur.setCharFormat(fmt)
-
-        self.addresses.setTextCursor(addr_cur)
-        self.mem_display.setTextCursor(mem_cur)
-        self.chr_display.setTextCursor(chr_cur)
-        
-        self.highlight_sem.acquire()
-        self.is_highlighted = True
-        self.highlight_addr = addr
-        self.highlight_sem.release()
-
-
-    def handle_scroll(self):
-        if self.baseAddress > 0 and self.chr_display.verticalScrollBar().value() < self.chr_display.verticalScrollBar().minimum() + self.delta:
-            size = constants['block_size']
-            if self.maxAddress - self.baseAddress >= self.threshold:
-                self.flag = True
-                self.grab_data(val=self.baseAddress - constants['block_size'], size=self.threshold, refresh=True, grouping=self.grouping.currentText())
-                return
-            if self.baseAddress < size:
-                size = self.baseAddress
-            self.grab_data(val=self.baseAddress-size, size=size, grouping=self.grouping.currentText())
-        elif self.chr_display.verticalScrollBar().value() > self.chr_display.verticalScrollBar().maximum() - self.delta and self.maxAddress <= self.max_size:
-            if self.maxAddress - self.baseAddress >= self.threshold:
-                self.flag = True
-                self.grab_data(val=self.baseAddress + constants['block_size'], size=self.threshold, refresh=True, grouping=self.grouping.currentText())
-            else:
-                self.grab_data(val=self.maxAddress, grouping=self.grouping.currentText())
-      
-      
-    def change_endian(self, endian):
-        self.endian_sem.acquire()
-        if endian == Endian.little:
-            self.endian = endian
-        elif endian == Endian.big:
-            self.endian = endian
-        self.endian_sem.release()
+            self.search_window = SearchWindow(self.qmp, self, self.dump_file)
 
+    def open_watch(self):
+        if self.watch_window and self.watch_window.isVisible():
+            self.watch_window.raise_()
+        else:
+            self.watch_window = WatchWindow(self.qmp, self.dump_file)
 
-class MyThread(QThread):
-    timing_signal = Signal(bool) 
 
-    def __init__(self, mem):
-        super().__init__()
-        mem.kill_signal.connect(self.end)    
-        self.sem = QSemaphore() 
-        self.running = True
-    def run(self):
-        while True:
-            if self.sem.tryAcquire(1, 1000): # try to acquire and wait 1s to try to acquire
-                break
-            if self.running:
-                self.timing_signal.emit(True)
+    def change_endian(self, endian):
+        self.endian = endian
+        self.view.set_big_endian(endian == Endian.big)
 
-    def end(self, b):
-        self.sem.release()
 
-    def halt(self, running):
-        self.running = running
+def parse_int(text, default):
+    try:
+        return int(text, 0)
+    except (ValueError, TypeError):
+        return default
 
 
 class Endian(Enum):
     little = 1
-    big = 2
\ No newline at end of file
+    big = 2
@@ -0,0 +1,126 @@
+from PySide2.QtCore import QObject, Signal
+from collections import deque
+from random import randint
+import threading
+import bz2
+import gzip
+import lzma
+import os
+
+from package.memblock import MemBlock
+
+# file openers by compression, and the extension they usually get
+compressions = {
+    'None': (open, ''),
+    'gzip': (gzip.open, '.gz'),
+    'bz2': (bz2.open, '.bz2'),
+    'xz': (lzma.open, '.xz')
+}
+
+class Export(QObject):
+    # Copies [start, start + size) of guest physical memory to a local file on
+    # a worker thread. Reads depth get-pmem-raw chunks ahead and writes each
+    # one, compressed if asked to, as soon as it arrives, so only the chunks in
+    # flight are held in memory. Unmapped memory is written as zeros.
+    #
+    # With pause the guest is stopped for the export, so the file is a
+    # consistent snapshot, and resumed as soon as the last chunk has arrived,
+    # before it is written. A guest that was already stopped is left alone.
+
+    progress = Signal(object, object) # bytes written, bytes to write
+    finished = Signal(object, object) # bytes written, None or why the export failed
+
+    chunk_size = 4 * 1024 * 1024
+    depth = 4
+
+    def __init__(self, qmp, start, size, filename, compression='None', pause=False):
+        super().__init__()
+        self.qmp = qmp
+        self.start = start
+        self.size = size
+        self.filename = filename
+        self.compression = compression
+        self.pause = pause
+        self.hash = randint(0, 0xfffffffffffffff)
+        self.cancelled = threading.Event()
+
+    def run_in_thread(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def read(self, addr):
+        args = {
+            'hash': self.hash,
+            'addr': addr - (1 << 64) if addr >= 1 << 63 else addr, # int64 on the wire
+            'size': min(self.chunk_size, self.start + self.size - addr)
+        }
+        return self.qmp.command('get-pmem-raw', args, handler=False) # decoded once, here
+
+    def command(self, cmd):
+        reply = self.qmp.command(cmd).result()
+        if 'error' in reply:
+            raise RuntimeError(reply['error'].get('desc', f'{cmd} failed'))
+
+    def run(self):
+        written = 0
+        reason = None
+        paused = False
+        try:
+            out = compressions[self.compression][0](self.filename, 'wb')
+        except (OSError, KeyError) as e:
+            self.finished.emit(0, str(e))
+            return
+        try:
+            if self.pause and self.qmp.running:
+                self.command('stop')
+                paused = True
+            addrs = iter(range(self.start, self.start + self.size, self.chunk_size))
+            reads = deque()
+            while True:
+                while len(reads) < self.depth: # keeps depth reads in flight
+                    addr = next(addrs, None)
+                    if addr is None:
+                        break
+                    reads.append(self.read(addr))
+                if not reads:
+                    break
+                reply = reads.popleft().result()
+                if 'error' in reply:
+                    raise RuntimeError(reply['error'].get('desc', 'get-pmem-raw failed'))
+                if paused and not reads: # everything has been read
+                    self.command('cont')
+                    paused = False
+                block = MemBlock.from_reply(reply['return'])
+                out.write(zero_unmapped(block))
+                written += len(block)
+                self.progress.emit(written, self.size)
+                if self.cancelled.is_set():
+                    reason = 'Cancelled'
+                    break
+        except Exception as e:
+            reason = str(e) or type(e).__name__
+        finally:
+            if paused:
+                try:
+                    self.command('cont')
+                except Exception as e:
+                    reason = reason or f'Could not resume the guest: {e}'
+            out.close()
+            if reason: # no partial files
+                try:
+                    os.remove(self.filename)
+                except OSError:
+                    pass
+        self.finished.emit(written, reason)
+
+
+def zero_unmapped(block):
+    # the bytes of block with whatever QEMU read outside the mapped ranges zeroed
+    if block.mapped == [(0, len(block))]:
+        return block.data
+    data = bytearray(len(block))
+    for start, end in block.mapped:
+        data[start:end] = block.view(start, end)
+    return data
@@ -0,0 +1,247 @@
+from PySide2.QtCore import QObject, Signal
+from collections import deque
+from random import randint
+import threading
+import bisect
+import numpy
+
+from package.memblock import MemBlock
+
+# Pattern search over guest physical memory. A Matcher finds a compiled
+# pattern in a block of memory, a Search reads a range in large chunks with
+# several reads in flight and feeds them to a Matcher on its own thread, and
+# SearchResults keeps the sorted addresses of the matches.
+
+kinds = ['Bytes', 'ASCII', 'UTF-16 LE', 'UTF-16 BE', 'Integer']
+
+def compile_pattern(kind, text, width=4, big_endian=False):
+    # returns the bytes to look for and a mask of the bits that have to
+    # match, None when all of them do. Raises ValueError for bad input.
+    if kind == 'Bytes':
+        return parse_hex(text)
+    elif kind == 'ASCII':
+        pattern = text.encode('ascii')
+    elif kind == 'UTF-16 LE':
+        pattern = text.encode('utf-16-le')
+    elif kind == 'UTF-16 BE':
+        pattern = text.encode('utf-16-be')
+    elif kind == 'Integer':
+        value = int(text, 0)
+        if value < 0: # two's complement
+            value += 1 << (8 * width)
+        try:
+            pattern = value.to_bytes(width, 'big' if big_endian else 'little')
+        except OverflowError:
+            raise ValueError(f'{text} does not fit in {width} bytes')
+    else:
+        raise ValueError(f'unknown pattern kind {kind}')
+    if not pattern:
+        raise ValueError('empty pattern')
+    return pattern, None
+
+def parse_hex(text):
+    # 'de ad ?? e?' or 'dead??e?', a ? matches any nibble
+    digits = ''.join(text.split()).lower()
+    if digits.startswith('0x'):
+        digits = digits[2:]
+    if not digits or len(digits) % 2:
+        raise ValueError('give whole bytes of hex digits')
+    pattern = bytearray()
+    mask = bytearray()
+    for n in range(0, len(digits), 2):
+        value = 0
+        bits = 0
+        for c in digits[n:n + 2]:
+            value <<= 4
+            bits <<= 4
+            if c != '?':
+                value |= int(c, 16)
+                bits |= 0xf
+        pattern.append(value)
+        mask.append(bits)
+    if all(bits == 0xff for bits in mask):
+        return bytes(pattern), None
+    return bytes(pattern), bytes(mask)
+
+
+class Matcher:
+    # Finds a pattern in memory. Exact patterns use bytes.find, masked ones
+    # look up candidates for their first fully known byte with numpy and then
+    # narrow them down byte by byte.
+
+    def __init__(self, pattern, mask=None, align=1):
+        self.pattern = pattern
+        self.mask = mask
+        self.align = align
+        self.size = len(pattern)
+        if mask:
+            full = [n for n, bits in enumerate(mask) if bits == 0xff]
+            self.anchor = full[0] if full else None
+
+    def find(self, data, lo, hi, base=0, most=None):
+        # offsets of the first most matches lying in data[lo:hi], whose
+        # address base + offset is a multiple of align
+        if hi - lo < self.size or most == 0:
+            return []
+        if self.mask:
+            return self.find_masked(data, lo, hi, base, most)
+        found = []
+        n = data.find(self.pattern, lo, hi)
+        while n >= 0:
+            if (base + n) % self.align == 0:
+                found.append(n)
+                if len(found) == most:
+                    break
+            n = data.find(self.pattern, n + 1, hi)
+        return found
+
+    def find_masked(self, data, lo, hi, base, most):
+        window = numpy.frombuffer(data, dtype=numpy.uint8)[lo:hi]
+        starts = len(window) - self.size + 1
+        if self.anchor is None: # no byte is fully known, every offset is a candidate
+            candidates = numpy.arange(starts)
+        else:
+            candidates = numpy.flatnonzero(window[self.anchor:self.anchor + starts] == self.pattern[self.anchor])
+        for n, bits in enumerate(self.mask):
+            if not candidates.size:
+                break
+            if bits and n != self.anchor:
+                candidates = candidates[(window[candidates + n] & bits) == self.pattern[n] & bits]
+        candidates += lo
+        if self.align > 1:
+            candidates = candidates[(base % self.align + candidates) % self.align == 0] # base can exceed int64
+        return candidates[:most].tolist()
+
+
+class Search(QObject):
+    # Scans [start, end) on a worker thread with depth get-pmem-raw reads of
+    # chunk_size bytes in flight. Chunks overlap by the pattern size less one
+    # byte so matches across their boundaries are found, and only the mapped
+    # parts of memory are searched: every reply tells where mapped memory
+    # goes on, and the reads skip to there. Stops after max_results matches.
+
+    progress = Signal(object, object) # bytes scanned, bytes to scan
+    found = Signal(object) # ascending addresses of new matches
+    finished = Signal(object, object) # matches, None or why the search stopped early
+
+    chunk_size = 4 * 1024 * 1024
+    depth = 4
+    max_results = 100000
+
+    def __init__(self, qmp, matcher, start, end):
+        super().__init__()
+        self.qmp = qmp
+        self.matcher = matcher
+        self.start = start
+        self.end = end
+        self.hash = randint(0, 0xfffffffffffffff)
+        self.cancelled = threading.Event()
+        self.matches = 0
+
+    def run_in_thread(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def read(self, addr):
+        size = min(self.chunk_size + self.matcher.size - 1, self.end - addr)
+        args = {
+            'hash': self.hash,
+            'addr': addr - (1 << 64) if addr >= 1 << 63 else addr, # int64 on the wire
+            'size': size
+        }
+        return addr, self.qmp.command('get-pmem-raw', args, handler=False) # decoded once, by receive()
+
+    def receive(self, addr, future):
+        # the MemBlock read() asked for
+        reply = future.result()
+        if 'error' in reply:
+            raise RuntimeError(reply['error'].get('desc', 'get-pmem-raw failed'))
+        return MemBlock.from_reply(reply['return'])
+
+    def run(self):
+        addr = self.start # of the next read
+        reads = deque()
+        reason = None
+        try:
+            while not reason:
+                while len(reads) < self.depth and addr < self.end: # keeps depth reads in flight
+                    reads.append(self.read(addr))
+                    addr += self.chunk_size
+                if not reads:
+                    break
+                start, pending = reads.popleft()
+                block = self.receive(start, pending)
+                reason = self.scan(start, block)
+                # nothing is mapped between the end of block and block.next. A
+                # mapped overlap is left to the read of the next chunk.
+                if not block.mapped or block.mapped[-1][1] <= self.chunk_size:
+                    addr = max(addr, self.end if block.next is None else min(block.next, self.end))
+                if self.cancelled.is_set():
+                    reason = 'Cancelled'
+        except Exception as e:
+            reason = str(e) or type(e).__name__
+        self.finished.emit(self.matches, reason)
+
+    def scan(self, addr, block):
+        # matches starting in the chunk, not in the overlap with the next one
+        limit = min(self.chunk_size, len(block))
+        found = []
+        for lo, hi in block.mapped:
+            if lo >= limit:
+                break
+            hi = min(hi, limit + self.matcher.size - 1) # the match has to start in the chunk
+            found.extend(self.matcher.find(block.data, lo, hi, addr, self.max_results - self.matches - len(found)))
+        found = [addr + n for n in found]
+        self.matches += len(found)
+        if found:
+            self.found.emit(found)
+        self.progress.emit(addr + limit - self.start, self.end - self.start)
+        if self.matches >= self.max_results:
+            return f'Stopped after {self.max_results} matches'
+
+
+class DumpSearch(Search):
+    # Search of a DumpFile, whose chunks are read from the mapping when they
+    # are scanned
+
+    def __init__(self, dump, matcher, start, end):
+        super().__init__(None, matcher, start, end)
+        self.dump = dump
+
+    def read(self, addr):
+        return addr, min(self.chunk_size + self.matcher.size - 1, self.end - addr)
+
+    def receive(self, addr, size):
+        return self.dump.block(addr, size)
+
+
+class SearchResults:
+    # Sorted addresses of the matches of a search, with the length of a match
+
+    def __init__(self, length=1):
+        self.length = length
+        self.addresses = []
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __getitem__(self, n):
+        return self.addresses[n]
+
+    def add(self, addresses):
+        # chunks are scanned in order, so appending keeps the list sorted
+        self.addresses.extend(addresses)
+
+    def index(self, addr):
+        return bisect.bisect_left(self.addresses, addr)
+
+    def next(self, addr):
+        # index of the first match after addr, None past the last
+        n = bisect.bisect_right(self.addresses, addr)
+        return n if n < len(self.addresses) else None
+
+    def previous(self, addr):
+        n = bisect.bisect_left(self.addresses, addr) - 1
+        return n if n >= 0 else None
@@ -93,4 +93,4 @@ class MemTree(QWidget):
 			self.tree_sem.release()
 
 	def open_region(self, node, col):
-		self.parent.open_new_window(MemDumpWindow(self.qmp, base=int(node.text(1), 16), max=int(node.text(2), 16)))
+		self.parent.open_new_window(MemDumpWindow(self.qmp, base=int(node.text(1), 16), end=int(node.text(2), 16)))
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+# Stand-in for the modified QEMU, for testing and load testing the GUI without a
+# QEMU build. Speaks the QMP greeting and capabilities handshake and implements
+# the ITC commands from modified-qemu/misc.json on top of a synthetic RAM image.
+#
+#     python3 -m package.mockqmp --port 55555 --ram 64M --latency 0.005
+
+import argparse
+import asyncio
+import base64
+import codecs
+import json
+import random
+import struct
+import threading
+import time
+
+class MockError(Exception):
+
+    def __init__(self, error_class, desc):
+        super().__init__(desc)
+        self.error_class = error_class
+        self.desc = desc
+
+
+class MockMachine:
+    # Guest state shared by every connection: run state, clocks and a RAM image
+    # that the "guest" keeps writing to while it runs.
+
+    counter_addr = 0x1000 # u64 milliseconds of virtual time
+    ring_index_addr = 0x1008 # u32 index into the ring buffer
+    ring_addr = 0x1100 # 256 byte ring buffer, one byte written per millisecond
+    text_addr = 0x500
+    random_addr = 0x10000
+    random_size = 0x10000
+    bios_base = 0xfffc0000
+    bios_size = 0x40000
+
+    def __init__(self, ram_size=16 * 1024 * 1024, seed=0):
+        self.ram_size = ram_size
+        self.ram = bytearray(ram_size)
+        self.bios = bytearray(self.bios_size)
+        self.running = True
+        self.virtual_base = 0 # virtual clock at the last resume
+        self.resumed = time.monotonic()
+        self.ticks = 0 # virtual milliseconds already written to RAM
+
+        rng = random.Random(seed)
+        text = b'ITC QEMU GUI mock guest\n\tHello from guest physical memory!\0'
+        self.write(self.text_addr, text)
+        if self.random_addr + self.random_size <= ram_size:
+            self.write(self.random_addr, rng.getrandbits(self.random_size * 8).to_bytes(self.random_size, 'little'))
+        # a recognisable pattern in every page so views of any region show data
+        for page in range(0x20000, ram_size, 0x1000):
+            self.ram[page:page + 8] = struct.pack('<Q', page)
+        # reset vector: ljmp $0xf000,$0xe05b
+        self.bios[-16:-11] = bytes([0xea, 0x5b, 0xe0, 0x00, 0xf0])
+
+    def virtual_ns(self):
+        if self.running:
+            return self.virtual_base + int((time.monotonic() - self.resumed) * 1e9)
+        return self.virtual_base
+
+    def stop(self):
+        self.advance()
+        self.virtual_base = self.virtual_ns()
+        self.running = False
+
+    def cont(self):
+        self.resumed = time.monotonic()
+        self.running = True
+
+    def reset(self):
+        # a reboot wipes the ring the guest writes to
+        self.advance()
+        self.ram[self.ring_addr:self.ring_addr + 256] = bytes(256)
+
+    def advance(self):
+        # plays the guest's writes up to the current virtual time
+        ticks = self.virtual_ns() // 1000000
+        if ticks == self.ticks:
+            return
+        for tick in range(max(self.ticks, ticks - 256) + 1, ticks + 1):
+            self.ram[self.ring_addr + tick % 256] = tick & 0xff
+        self.ticks = ticks
+        self.write(self.counter_addr, struct.pack('<QI', ticks, ticks % 256))
+
+    def write(self, addr, data):
+        if addr + len(data) <= self.ram_size:
+            self.ram[addr:addr + len(data)] = data
+
+    def regions(self):
+        # mapped (start, end) ranges of the system address space, sorted
+        return [(0, self.ram_size), (self.bios_base, self.bios_base + self.bios_size)]
+
+    def is_mapped(self, addr):
+        return any(start <= addr < end for start, end in self.regions())
+
+    def read(self, addr, size):
+        # unmapped memory reads as zero
+        self.advance()
+        data = bytearray(size)
+        for start, end in self.regions():
+            lo = max(start, addr)
+            hi = min(end, addr + size)
+            if lo < hi:
+                source = self.ram if start == 0 else self.bios
+                data[lo - addr:hi - addr] = source[lo - start:hi - start]
+        return bytes(data)
+
+    def eip(self):
+        # wanders through a small loop after the BIOS entry point
+        return 0xe05b + self.virtual_ns() // 1000 % 0x40
+
+    def registers(self):
+        eax = self.virtual_ns() & 0xffffffff
+        lines = [
+            f'EAX={eax:08x} EBX=00000000 ECX={self.ticks & 0xffffffff:08x} EDX=00000663',
+            'ESI=00000000 EDI=00000000 EBP=00000000 ESP=00006f00',
+            f'EIP={self.eip():08x} EFL=00000002 [-------] CPL=0 II=0 A20=1 SMM=0 HLT=0',
+            'ES =0000 00000000 0000ffff 00009300',
+            'CS =f000 ffff0000 0000ffff 00009b00',
+            'SS =0000 00000000 0000ffff 00009300',
+            'DS =0000 00000000 0000ffff 00009300',
+            'FS =0000 00000000 0000ffff 00009300',
+            'GS =0000 00000000 0000ffff 00009300',
+            'LDT=0000 00000000 0000ffff 00008200',
+            'TR =0000 00000000 0000ffff 00008b00',
+            'GDT=     00000000 0000ffff',
+            'IDT=     00000000 0000ffff',
+            'CR0=60000010 CR2=00000000 CR3=00000000 CR4=00000000',
+            'DR0=00000000 DR1=00000000 DR2=00000000 DR3=00000000 ',
+            'DR6=ffff0ff0 DR7=00000400',
+            'EFER=0000000000000000',
+            'FCW=037f FSW=0000 [ST=0] FTW=00 MXCSR=00001f80',
+        ]
+        for n in range(0, 8, 2):
+            lines.append(f'FPR{n}=0000000000000000 0000 FPR{n + 1}=0000000000000000 0000')
+        for n in range(0, 8, 2):
+            lines.append(f'XMM{n:02d}={0:032x} XMM{n + 1:02d}={0:032x}')
+        return '\r\n'.join(lines) + '\r\n'
+
+    def disassemble(self, addr, count):
+        instrs = [
+            ([0x90], 'nop'),
+            ([0xb8, 0x01, 0x00, 0x00, 0x00], 'mov      $0x1, %eax'),
+            ([0x40], 'inc      %eax'),
+            ([0x89, 0xc3], 'mov      %eax, %ebx'),
+            ([0xeb, 0xfe], 'jmp      0x%x'),
+        ]
+        lines = []
+        for n in range(count):
+            code, text = instrs[n % len(instrs)]
+            if '%x' in text:
+                text = text % addr
+            hexcode = ' '.join(f'{b:02x}' for b in code)
+            lines.append(f'0x{addr:08x}:  {hexcode:<24} {text}')
+            addr += len(code)
+        return '\r\n'.join(lines) + '\r\n'
+
+    def mtree(self):
+        # same order as qmp_mtree: address space, its root region, then the
+        # subregions. Ends are the last address, as MR_SIZE gives them.
+        return [
+            {'name': 'memory', 'start': 0, 'end': -1, 'parent': ''},
+            {'name': 'system', 'start': 0, 'end': -1, 'parent': 'memory'},
+            {'name': 'pc.ram', 'start': 0, 'end': self.ram_size - 1, 'parent': 'system'},
+            {'name': 'pc.bios', 'start': self.bios_base, 'end': self.bios_base + self.bios_size - 1, 'parent': 'system'},
+            {'name': 'I/O', 'start': 0, 'end': 0xffff, 'parent': ''},
+            {'name': 'io', 'start': 0, 'end': 0xffff, 'parent': 'I/O'},
+        ]
+
+
+class MockQMPServer:
+    # QMP server on top of a MockMachine. Every reply is delayed by latency
+    # seconds (plus up to jitter seconds) and commands of one connection are
+    # answered in order, like QEMU does.
+
+    max_frame = 1024 * 1024 # longest command kept waiting for its end
+
+    trace_events = ['kvm_vm_ioctl', 'kvm_vcpu_ioctl', 'memory_region_ops_read', 'memory_region_ops_write', 'cpu_in', 'cpu_out', 'guest_mem_before_exec']
+
+    def __init__(self, machine=None, host='127.0.0.1', port=55555, latency=0.0, jitter=0.0):
+        self.machine = machine if machine else MockMachine()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.writers = []
+        self.server = None
+        self.loop = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    def start_in_thread(self):
+        # runs the server on its own event loop thread, returns the bound port
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    def send(self, writer, data):
+        writer.write(json.dumps(data).encode() + b'\r\n')
+
+    def broadcast_event(self, event, data=None):
+        now = time.time()
+        message = {'timestamp': {'seconds': int(now), 'microseconds': int(now * 1e6) % 1000000}, 'event': event}
+        if data is not None:
+            message['data'] = data
+        for writer in self.writers:
+            self.send(writer, message)
+
+    async def handle(self, reader, writer):
+        self.send(writer, {'QMP': {'version': {'qemu': {'micro': 0, 'minor': 2, 'major': 4}, 'package': 'mock'}, 'capabilities': ['oob']}})
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8')(errors='replace') # reads may split characters
+        buffer = ''
+        negotiated = False
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += text.decode(data)
+                while True: # commands may arrive back to back without separators
+                    buffer = buffer.lstrip()
+                    if not buffer:
+                        break
+                    try:
+                        request, end = decoder.raw_decode(buffer)
+                        if not isinstance(request, dict):
+                            raise ValueError('Expected a JSON object')
+                    except ValueError as e:
+                        # answers and drops a malformed command like QEMU does,
+                        # an unfinished one waits for the rest of it
+                        end = frame_end(buffer)
+                        if end is None and len(buffer) <= self.max_frame:
+                            break
+                        buffer = buffer[end or len(buffer):]
+                        self.send(writer, {'error': {'class': 'GenericError', 'desc': f'JSON parse error, {e}'}})
+                        continue
+                    buffer = buffer[end:]
+
+                    if self.latency or self.jitter:
+                        await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+                    reply = {}
+                    try:
+                        cmd = request.get('execute')
+                        if cmd == 'qmp_capabilities':
+                            negotiated = True
+                            reply['return'] = {}
+                        elif not negotiated:
+                            raise MockError('CommandNotFound', "Expecting capabilities negotiation with 'qmp_capabilities'")
+                        else:
+                            reply['return'] = self.execute(cmd, request.get('arguments', {}))
+                    except MockError as e:
+                        reply['error'] = {'class': e.error_class, 'desc': e.desc}
+                    except (KeyError, TypeError, ValueError) as e:
+                        reply['error'] = {'class': 'GenericError', 'desc': f'Invalid parameter: {e}'}
+                    if 'id' in request:
+                        reply['id'] = request['id']
+                    self.send(writer, reply)
+                    if cmd in ['stop', 'cont'] and 'return' in reply and negotiated:
+                        self.broadcast_event('STOP' if cmd == 'stop' else 'RESUME')
+                    elif cmd == 'system_reset' and 'return' in reply and negotiated:
+                        self.broadcast_event('RESET', {'guest': False, 'reason': 'host-qmp-system-reset'})
+                    if not negotiated:
+                        continue
+                    self.writers = [w for w in self.writers if not w.is_closing()]
+                    if writer not in self.writers:
+                        self.writers.append(writer)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if writer in self.writers:
+                self.writers.remove(writer)
+            writer.close()
+
+    def execute(self, cmd, args):
+        machine = self.machine
+        if cmd == 'query-status':
+            return {'status': 'running' if machine.running else 'paused', 'singlestep': False, 'running': machine.running}
+        elif cmd == 'stop':
+            machine.stop()
+            return {}
+        elif cmd == 'cont':
+            machine.cont()
+            return {}
+        elif cmd == 'system_reset':
+            machine.reset()
+            return {}
+        elif cmd == 'get-pmem':
+            return self.get_pmem(args['hash'], args['addr'], args['size'], args['grouping'])
+        elif cmd == 'get-pmem-raw':
+            return self.get_pmem_raw(args['hash'], args['addr'], args['size'])
+        elif cmd == 'get-pmem-list':
+            return self.get_pmem_list(args['hash'], args['items'])
+        elif cmd == 'mtree':
+            return machine.mtree()
+        elif cmd == 'itc-sim-time':
+            if args['clock'] in ['realtime', 'host']:
+                return {'time_ns': time.time_ns() if args['clock'] == 'host' else time.monotonic_ns()}
+            elif args['clock'] in ['virtual', 'virtual-rt']:
+                return {'time_ns': machine.virtual_ns()}
+            raise MockError('GenericError', "Invalid parameter 'clock'")
+        elif cmd == 'itc-time-metric':
+            return [{'time_ns': machine.virtual_ns()}, {'time_ns': time.time_ns()}]
+        elif cmd == 'query-memory-size-summary':
+            return {'base-memory': machine.ram_size, 'plugged-memory': 0}
+        elif cmd == 'pmemsave':
+            with open(args['filename'], 'wb') as f:
+                f.write(machine.read(args['val'], args['size']))
+            return {}
+        elif cmd == 'human-monitor-command':
+            return self.hmp(args['command-line'])
+        raise MockError('CommandNotFound', f"The command {cmd} has not been found")
+
+    def get_pmem(self, hash_, addr, size, grouping):
+        # mirrors qmp_get_pmem: big endian values of grouping bytes each
+        check_range(addr, size)
+        if grouping not in [1, 2, 4, 8]:
+            grouping = 1
+        data = self.machine.read(addr, size)
+        mask = self.mapped_mask(addr, size)
+        vals = []
+        for i in range(0, size, grouping):
+            vals.append({'val': int.from_bytes(data[i:i + grouping], 'big'), 'ismapped': all(mask[i:i + grouping])})
+        return {'hash': hash_, 'vals': vals}
+
+    def mapped_mask(self, addr, size):
+        # one byte per byte of memory, 1 where it is mapped
+        mask = bytearray(size)
+        for start, end in self.machine.regions():
+            lo = max(start, addr)
+            hi = min(end, addr + size)
+            if lo < hi:
+                mask[lo - addr:hi - addr] = b'\1' * (hi - lo)
+        return mask
+
+    def get_pmem_raw(self, hash_, addr, size):
+        # mirrors qmp_get_pmem_raw: base64 bytes, the mapped ranges and where
+        # mapped memory goes on, with addresses above 2^63 passed as negative
+        # int64 both ways
+        if size < 0 or size > 16 * 1024 * 1024:
+            raise MockError('GenericError', "Parameter 'size' expects a size between 0 and 16 MiB")
+        check_range(addr, size)
+        start = addr & (1 << 64) - 1
+        mapped = []
+        for lo, hi in self.machine.regions():
+            lo = max(lo, start)
+            hi = min(hi, start + size)
+            if lo < hi:
+                mapped.append({'start': int64(lo), 'end': int64(hi)})
+        data = self.machine.read(start, size)
+        ret = {'hash': hash_, 'addr': addr, 'data': base64.b64encode(data).decode(), 'mapped': mapped}
+        above = [max(lo, start + size) for lo, hi in self.machine.regions() if hi > start + size]
+        if above:
+            ret['next'] = int64(above[0])
+        return ret
+
+    def get_pmem_list(self, hash_, items):
+        # mirrors qmp_get_pmem_list: the items' bytes one after the other,
+        # zeros for items that are not wholly mapped
+        if any(not 1 <= item['size'] <= 64 for item in items):
+            raise MockError('GenericError', "Parameter 'size' expects a size between 1 and 64")
+        for item in items:
+            check_range(item['addr'], item['size'])
+        if len(items) > 4096:
+            raise MockError('GenericError', "Parameter 'items' expects at most 4096 items")
+        data = bytearray()
+        mapped = []
+        for item in items:
+            addr = item['addr'] & (1 << 64) - 1
+            size = item['size']
+            whole = any(start <= addr and addr + size <= end for start, end in self.machine.regions())
+            data += self.machine.read(addr, size) if whole else bytes(size)
+            mapped.append(whole)
+        return {'hash': hash_, 'data': base64.b64encode(data).decode(), 'mapped': mapped}
+
+    def hmp(self, line):
+        words = line.split()
+        if not words:
+            return ''
+        machine = self.machine
+        if line == 'info registers':
+            return machine.registers()
+        elif line == 'info trace-events':
+            return ''.join(f'{name} : state 0\r\n' for name in sorted(self.trace_events))
+        elif words[0].startswith('x/') and words[0].endswith('i'):
+            count = int(words[0][2:-1] or 1)
+            addr = machine.eip() if len(words) < 2 or words[1] in ['$eip', '$pc'] else int(words[1], 0)
+            return machine.disassemble(addr, count)
+        elif words[0] in ['print', 'p']:
+            if len(words) > 1 and words[1] in ['$eip', '$pc']:
+                return f'{machine.eip():#x}\r\n'
+            return f'{int(words[1], 0):#x}\r\n'
+        elif words[0] in ['logfile', 'log', 'trace-event']:
+            return ''
+        return f"unknown command: '{words[0]}'\r\n"
+
+
+def int64(value):
+    value &= (1 << 64) - 1
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def frame_end(text):
+    # index just past the first JSON value of text, which does not start with
+    # white space, or None when the value is not complete yet. Text before the
+    # next object that is not one is a value of its own.
+    if text[0] not in '{[':
+        n = text.find('{')
+        return n if n > 0 else len(text)
+    depth = 0
+    quoted = False
+    escaped = False
+    for i, c in enumerate(text):
+        if quoted:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                quoted = False
+        elif c == '"':
+            quoted = True
+        elif c in '{[':
+            depth += 1
+        elif c in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+def check_range(addr, size):
+    # mirrors itc_range_fits: ranges end at or below 2^64
+    if size < 0 or (addr & (1 << 64) - 1) + size > 1 << 64:
+        raise MockError('GenericError', "Parameter 'size' expects a size that ends the range at or below 2^64")
+
+def parse_size(text):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    if text[-1].upper() in units:
+        return int(text[:-1], 0) * units[text[-1].upper()]
+    return int(text, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock QMP server for the ITC QEMU GUI')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=55555)
+    parser.add_argument('--ram', type=parse_size, default=16 * 1024 * 1024, help='guest RAM size, e.g. 64M')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every reply')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many extra seconds per reply')
+    parser.add_argument('--paused', action='store_true', help='start with the guest stopped')
+    args = parser.parse_args()
+
+    machine = MockMachine(args.ram)
+    if args.paused:
+        machine.stop()
+    server = MockQMPServer(machine, args.host, args.port, args.latency, args.jitter)
+
+    async def serve():
+        port = await server.start()
+        print(f'Mock QMP listening on {args.host}:{port}', flush=True)
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+from PySide2.QtCore import QObject, Signal
+from collections import OrderedDict
+from random import randint
+import numpy
+import time
+
+class PageCache(QObject):
+    # Guest physical memory in pages of page_size bytes, read on demand with
+    # get-pmem-raw and shared by every memory view of a connection. Views
+    # read() whatever is resident and fetch() the rest; changed is emitted with
+    # the [start, end) addresses of every page that arrives. Covers the whole
+    # 64 bit physical address space.
+    #
+    # Memory cannot change while the guest is stopped, so resident pages are
+    # served without asking QEMU until the guest resumes, is reset, or memory
+    # is written through invalidate(). While it runs, fetch() reads pages again
+    # even if they are resident. The least recently read pages are dropped when
+    # the cache holds more than budget bytes.
+    #
+    # A page read again is compared with the resident copy and changed is only
+    # emitted for the bytes that differ, so refreshing memory the guest leaves
+    # alone repaints nothing. The offsets of the bytes that changed are kept in
+    # changes for diff_time seconds for the views to highlight.
+
+    changed = Signal(object, object) # addresses can exceed a C int
+    invalidated = Signal(object, object) # [start, end) that has to be read again
+
+    page_size = 4096
+    size = 1 << 64
+    max_request = 64 # pages read by one command
+    diff_time = 2.0
+
+    def __init__(self, qmp, budget=64 * 1024 * 1024):
+        super().__init__()
+        self.qmp = qmp
+        self.budget = budget
+        self.pages = OrderedDict() # page number -> (bytes, mapped (start, end) offsets), least recently read first
+        self.resident = 0 # bytes held by self.pages
+        self.pending = {} # page number -> hash of the request it is expected from
+        self.requests = {} # hash -> page numbers of a request not answered yet
+        self.changes = {} # page number -> (time, offsets of the bytes that changed)
+        self.serial = randint(0, 0xfffffffffff) << 16 # every request gets its own hash, telling it from other readers'
+        self.running = qmp.running
+        self.hits = 0
+        self.misses = 0
+
+        self.qmp.pmemBlock.connect(self.handle_block)
+        self.qmp.stateChanged.connect(self.handle_state)
+        self.qmp.guestReset.connect(self.invalidate)
+
+    def loaded(self, addr):
+        return addr // self.page_size in self.pages
+
+    def read(self, addr, size):
+        # returns the bytes of [addr, addr + size) and the mapped (start, end)
+        # offsets among them. Pages that are not resident read as unmapped zeros.
+        data = bytearray(size)
+        mapped = []
+        offset = 0
+        while offset < size:
+            n, start = divmod(addr + offset, self.page_size)
+            length = min(self.page_size - start, size - offset)
+            page = self.pages.get(n)
+            if page:
+                self.pages.move_to_end(n)
+                page_data, page_mapped = page
+                data[offset:offset + length] = page_data[start:start + length]
+                for lo, hi in page_mapped:
+                    lo = max(lo, start) - start + offset
+                    hi = min(hi, start + length) - start + offset
+                    if lo >= hi:
+                        continue
+                    if mapped and mapped[-1][1] == lo:
+                        mapped[-1] = (mapped[-1][0], hi)
+                    else:
+                        mapped.append((lo, hi))
+            offset += length
+        return bytes(data), mapped
+
+    def fetch(self, addr, size, refresh=False):
+        # requests the pages of [addr, addr + size) that are not resident, or
+        # all of them with refresh or while the guest runs, unless they are
+        # already on their way. Returns the Future of the last command sent,
+        # None if nothing was.
+        first = addr // self.page_size
+        last = min(addr + size, self.size) - 1
+        last = last // self.page_size if last >= addr else first - 1
+        refresh = refresh or bool(self.running)
+        wanted = [n for n in range(first, last + 1) if n not in self.pending and (refresh or n not in self.pages)]
+        self.hits += last + 1 - first - len(wanted)
+        self.misses += len(wanted)
+
+        future = None
+        with self.qmp.batch() as batch:
+            while wanted:
+                run = 1 # contiguous pages go out in one command
+                while run < len(wanted) and run < self.max_request and wanted[run] == wanted[0] + run:
+                    run += 1
+                future = self.request(batch, wanted[:run])
+                wanted = wanted[run:]
+        return future
+
+    def prefetch(self, addr, size):
+        # reads the first run of pages of [addr, addr + size) that are neither
+        # resident nor on their way, at most max_request of them, in a single
+        # command. Returns its Future, None if nothing was missing.
+        first = addr // self.page_size
+        last = (min(addr + size, self.size) - 1) // self.page_size
+        missing = [n for n in range(first, last + 1) if n not in self.pending and n not in self.pages]
+        if not missing:
+            return None
+        run = 1
+        while run < len(missing) and run < self.max_request and missing[run] == missing[0] + run:
+            run += 1
+        with self.qmp.batch() as batch:
+            return self.request(batch, missing[:run])
+
+    def request(self, batch, pages):
+        # one get-pmem-raw from the first to the last of pages
+        self.serial += 1
+        hash_ = self.serial
+        self.requests[hash_] = pages
+        self.pending.update((n, hash_) for n in pages)
+        start = pages[0] * self.page_size
+        args = {
+            'hash': hash_,
+            'addr': start - self.size if start >= self.size // 2 else start, # int64 on the wire
+            'size': (pages[-1] + 1 - pages[0]) * self.page_size
+        }
+        return batch.command('get-pmem-raw', args, callback=lambda data: self.request_done(data, hash_))
+
+    def request_done(self, data, hash_):
+        # the pages of a failed request can be asked for again. A reply is
+        # delivered before its block, which retires the request itself.
+        if not data or 'return' not in data:
+            self.forget(self.requests.pop(hash_, []), hash_)
+
+    def forget(self, pages, hash_):
+        for n in pages:
+            if self.pending.get(n) == hash_:
+                del self.pending[n]
+
+    def handle_block(self, block):
+        pages = self.requests.pop(block.hash, None)
+        if pages is None: # another reader's, or asked for before an invalidate()
+            return
+        now = time.monotonic()
+        first = block.addr // self.page_size
+        spans = [] # [start, end) addresses that changed, in order
+        for n in range(len(block) // self.page_size):
+            if self.pending.get(first + n) != block.hash: # invalidated since
+                continue
+            start = n * self.page_size
+            end = start + self.page_size
+            data = block.data[start:end]
+            mapped = [(max(lo, start) - start, min(hi, end) - start) for lo, hi in block.mapped if lo < end and hi > start]
+            old = self.pages.get(first + n)
+            if old and old[1] != mapped:
+                lo, hi = 0, self.page_size
+            elif old:
+                if old[0] == data: # the usual case, nothing to repaint
+                    self.pages.move_to_end(first + n)
+                    continue
+                diff = numpy.flatnonzero(numpy.frombuffer(old[0], dtype=numpy.uint8) != numpy.frombuffer(data, dtype=numpy.uint8))
+                self.changes[first + n] = (now, diff)
+                lo, hi = int(diff[0]), int(diff[-1]) + 1
+            else:
+                lo, hi = 0, self.page_size
+            self.store(first + n, (data, mapped))
+            lo += block.addr + start
+            hi += block.addr + start
+            if spans and spans[-1][1] == lo:
+                spans[-1] = (spans[-1][0], hi)
+            else:
+                spans.append((lo, hi))
+        self.forget(pages, block.hash)
+        self.evict()
+        self.changes = {n: change for n, change in self.changes.items() if now - change[0] < self.diff_time and n in self.pages}
+        for start, end in spans:
+            self.changed.emit(start, end)
+
+    def changes_in(self, addr, size):
+        # yields (address, time, offsets) of the pages of [addr, addr + size)
+        # that changed when they were last read, offsets being a numpy array
+        # of the bytes that did, relative to address
+        if not self.changes:
+            return
+        first = addr // self.page_size
+        last = (min(addr + size, self.size) - 1) // self.page_size
+        for n in range(first, last + 1):
+            change = self.changes.get(n)
+            if change:
+                yield n * self.page_size, change[0], change[1]
+
+    def store(self, n, page):
+        old = self.pages.pop(n, None)
+        if old:
+            self.resident -= len(old[0])
+        self.pages[n] = page
+        self.resident += len(page[0])
+
+    def evict(self):
+        # drops the least recently read pages until the budget is met
+        while self.resident > self.budget and self.pages:
+            self.resident -= len(self.pages.popitem(last=False)[1][0])
+
+    def handle_state(self, running):
+        # pages read while the guest ran may be older than the last
+        # instruction, and pages read while it was stopped go stale on resume
+        if running != self.running:
+            self.running = running
+            self.invalidate()
+
+    def invalidate(self, addr=0, size=None):
+        # forgets [addr, addr + size), everything without a size. Replies to
+        # requests sent before are dropped for the pages they cover.
+        if size is None:
+            self.pages.clear()
+            self.pending.clear()
+            self.requests.clear()
+            self.changes.clear()
+            self.resident = 0
+            self.invalidated.emit(0, self.size)
+            return
+        first = addr // self.page_size
+        last = (min(addr + size, self.size) - 1) // self.page_size
+        if last - first < len(self.pages):
+            numbers = range(first, last + 1)
+        else:
+            numbers = [n for n in self.pages if first <= n <= last]
+        for n in numbers:
+            page = self.pages.pop(n, None)
+            if page:
+                self.resident -= len(page[0])
+            self.changes.pop(n, None)
+        for n in [n for n in self.pending if first <= n <= last]:
+            del self.pending[n]
+        self.invalidated.emit(first * self.page_size, (last + 1) * self.page_size)
@@ -0,0 +1,161 @@
+from PySide2.QtCore import QObject, QTimer, Signal
+from concurrent.futures import Future
+import json
+import time
+
+class Poller:
+    # A periodic job owned by the PollScheduler.
+    # With a command the scheduler sends it and calls callback(reply) in the GUI
+    # thread (callback may be None when a QMP handler consumes the reply). A
+    # successful reply that goes to a callback skips the QMP handlers and the
+    # response journal, which would otherwise get one entry per tick.
+    # Without one callback() is called on every tick and may return a Future to
+    # have it tracked as the poller's request.
+
+    def __init__(self, name, interval, callback, command=None, args=None, needs_running=False, max_in_flight=1):
+        self.name = name
+        self.interval = interval # target period in ms
+        self.period = interval # current period, longer than interval while replies lag
+        self.callback = callback
+        self.command = command
+        self.args = args # dict or a function returning the arguments at poll time
+        self.needs_running = needs_running # nothing to poll while the guest is paused
+        self.enabled = True
+
+        self.stale = True # polled once more after every run state change
+        self.next_due = 0
+        self.latency = 0 # smoothed round-trip time in seconds
+
+        # Backpressure: at most max_in_flight requests are outstanding, ticks
+        # that come due while the limit is reached are dropped and counted
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.sent = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def set_interval(self, interval):
+        self.interval = interval
+        self.period = interval
+        self.next_due = 0
+
+    def busy(self):
+        return self.in_flight >= self.max_in_flight
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'period': self.period,
+            'latency': self.latency,
+            'in_flight': self.in_flight,
+            'sent': self.sent,
+            'completed': self.completed,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
+
+
+class PollScheduler(QObject):
+    # Owns all periodic work. Pollers that are due on a tick are issued in one
+    # QMP batch, identical requests share a single command, a poller's ticks are
+    # dropped while it has max_in_flight requests outstanding and its period
+    # grows while replies lag behind it. Pollers that need a running guest are
+    # polled once after the guest stops and then left alone until it resumes.
+    # All poller bookkeeping happens in the GUI thread.
+
+    droppedChanged = Signal(int) # total ticks dropped by all pollers
+
+    max_backoff = 8 # period never grows past max_backoff * interval
+
+    def __init__(self, qmp, tick=25):
+        super().__init__()
+        self.qmp = qmp
+        self.pollers = []
+        self.requests = {} # (command, arguments) -> in flight Future
+        self.running = qmp.running
+        self.qmp.stateChanged.connect(self.handle_state)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(tick)
+
+    def register(self, name, interval, callback=None, command=None, args=None, needs_running=False, max_in_flight=1):
+        poller = Poller(name, interval, callback, command, args, needs_running, max_in_flight)
+        self.pollers.append(poller)
+        return poller
+
+    def unregister(self, poller):
+        if poller in self.pollers:
+            self.pollers.remove(poller)
+
+    def stats(self):
+        return [poller.stats() for poller in self.pollers]
+
+    def dropped(self):
+        return sum(poller.dropped for poller in self.pollers)
+
+    def handle_state(self, running):
+        self.running = running
+        for poller in self.pollers:
+            poller.stale = True
+            poller.next_due = 0
+
+    def tick(self):
+        now = time.monotonic()
+        connected = self.qmp.isSockValid()
+        self.requests = {key: future for key, future in self.requests.items() if not future.done()}
+
+        dropped = 0
+        with self.qmp.batch() as batch:
+            for poller in list(self.pollers):
+                if not poller.enabled or now < poller.next_due:
+                    continue
+                if poller.needs_running and not self.running and not poller.stale:
+                    continue
+                if poller.command and not connected:
+                    continue
+                poller.next_due = now + poller.period / 1000
+                if poller.busy():
+                    poller.dropped += 1
+                    dropped += 1
+                    continue
+                poller.stale = False
+
+                if poller.command:
+                    args = poller.args() if callable(poller.args) else poller.args
+                    handler = poller.callback is None
+                    key = (poller.command, json.dumps(args, sort_keys=True), handler)
+                    future = self.requests.get(key)
+                    if not future: # first poller asking for it this round sends it
+                        future = batch.command(poller.command, args, handler=handler)
+                        self.requests[key] = future
+                    if poller.callback:
+                        future.add_done_callback(lambda f, callback=poller.callback: self.deliver(f, callback))
+                else:
+                    future = poller.callback()
+
+                if isinstance(future, Future):
+                    poller.in_flight += 1
+                    poller.sent += 1
+                    future.add_done_callback(lambda f, poller=poller, start=now: self.qmp.bridge.deliver.emit(self.completed, (poller, f, start, time.monotonic())))
+
+        if dropped:
+            self.droppedChanged.emit(self.dropped())
+
+    def deliver(self, future, callback):
+        data = None if future.cancelled() or future.exception() else future.result()
+        self.qmp.bridge.deliver.emit(callback, data)
+
+    def completed(self, args):
+        # adapts the poller's period to how long its replies take
+        poller, future, start, end = args
+        poller.in_flight -= 1
+        if future.cancelled() or future.exception():
+            poller.failed += 1
+        else:
+            poller.completed += 1
+        latency = end - start
+        poller.latency = latency if not poller.latency else 0.8 * poller.latency + 0.2 * latency
+        poller.period = min(max(poller.interval, 2000 * poller.latency), self.max_backoff * poller.interval)
@@ -4,7 +4,7 @@ from PySide2.QtCore import Qt
 
 class Preferences(QMainWindow):
 
-    def __init__(self, app, default, qmp, tt):
+    def __init__(self, app, default, qmp):
 
         QMainWindow.__init__(self)
 
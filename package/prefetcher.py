@@ -0,0 +1,83 @@
+from PySide2.QtCore import QObject, Signal
+import time
+
+class Prefetcher(QObject):
+    # Reads memory ahead of a scrolling view so the rows are resident before
+    # they come on screen. visit() is given every range the view shows; the
+    # scroll direction and speed decide how far ahead to read, at least a
+    # screen and at most max_ahead bytes, and a screen is read behind as well.
+    # Never more than max_in_flight reads are outstanding, each one finished
+    # starts the next.
+
+    finished = Signal() # emitted from the event loop thread, delivered queued
+
+    lookahead = 0.5 # seconds of scrolling read ahead
+    idle = 0.5 # seconds without a visit after which the view stopped
+
+    def __init__(self, source, max_in_flight=4, max_ahead=1024 * 1024):
+        super().__init__()
+        self.source = source
+        self.max_in_flight = max_in_flight
+        self.max_ahead = max_ahead
+        self.in_flight = []
+        self.visible = None # (start, end) last shown
+        self.seen = 0 # time of the last visit
+        self.speed = 0.0 # bytes a second, negative scrolling up
+        self.direction = 1
+        self.pumping = False
+        self.finished.connect(self.pump)
+        self.source.invalidated.connect(self.handle_invalidated)
+
+    def close(self):
+        self.source.invalidated.disconnect(self.handle_invalidated)
+        self.visible = None
+
+    def handle_invalidated(self, start, end):
+        self.pump()
+
+    def visit(self, start, end):
+        now = time.monotonic()
+        if self.visible:
+            moved = start - self.visible[0]
+            elapsed = now - self.seen
+            if elapsed > self.idle:
+                self.speed = 0.0
+            elif elapsed > 0:
+                self.speed = 0.7 * self.speed + 0.3 * moved / elapsed
+            if moved:
+                self.direction = 1 if moved > 0 else -1
+        self.visible = (start, end)
+        self.seen = now
+        self.pump()
+
+    def ranges(self):
+        # [start, end) to read, nearest first
+        start, end = self.visible
+        screen = max(end - start, 1)
+        ahead = int(min(max(abs(self.speed) * self.lookahead, screen), self.max_ahead))
+        if self.direction > 0:
+            return [(end, min(end + ahead, self.source.size)), (max(start - screen, 0), start)]
+        return [(max(start - ahead, 0), start), (end, min(end + screen, self.source.size))]
+
+    def pump(self):
+        if self.pumping or not self.visible:
+            return
+        self.pumping = True
+        try:
+            self.in_flight = [future for future in self.in_flight if not future.done()]
+            for start, end in self.ranges():
+                while len(self.in_flight) < self.max_in_flight and start < end:
+                    future = self.source.prefetch(start, end - start)
+                    if future is None: # all resident or on their way
+                        break
+                    if future.done() and future.exception(): # not connected
+                        return
+                    future.add_done_callback(self.request_done)
+                    self.in_flight.append(future)
+        finally:
+            self.pumping = False
+
+    def request_done(self, future):
+        # called in the event loop thread
+        if not future.cancelled() and not future.exception():
+            self.finished.emit()
@@ -0,0 +1,125 @@
+import threading
+import math
+
+class CommandStats:
+    # Traffic counters of one command. Round-trip latencies go into a log
+    # histogram with four buckets per power of two microseconds.
+
+    buckets_per_octave = 4
+    num_buckets = 32 * buckets_per_octave
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.replies = 0 # replies and events received
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.decode_time = 0.0 # seconds spent parsing the replies
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_latency = 0.0
+        self.histogram = [0] * self.num_buckets
+
+    def add_latency(self, latency):
+        us = max(latency * 1e6, 1)
+        index = min(int(math.log2(us) * self.buckets_per_octave), self.num_buckets - 1)
+        self.histogram[index] += 1
+        self.max_latency = max(self.max_latency, latency)
+
+    def percentile(self, p):
+        # upper bound of the bucket holding the p-th percentile, in seconds
+        total = sum(self.histogram)
+        if not total:
+            return 0.0
+        target = total * p / 100
+        seen = 0
+        for index, n in enumerate(self.histogram):
+            seen += n
+            if seen >= target:
+                return min(2 ** ((index + 1) / self.buckets_per_octave) / 1e6, self.max_latency)
+        return self.max_latency
+
+    def snapshot(self):
+        return {
+            'name': self.name,
+            'count': self.count,
+            'errors': self.errors,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'decode_time': self.decode_time / self.replies if self.replies else 0.0,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max_latency
+        }
+
+
+class QMPStats:
+    # Per command traffic statistics of a QMP connection. Updated from the
+    # event loop thread, read with snapshot() from anywhere.
+
+    def __init__(self):
+        self.commands = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        stats = self.commands.get(name)
+        if not stats:
+            stats = self.commands[name] = CommandStats(name)
+        return stats
+
+    def sent(self, name, nbytes):
+        with self.lock:
+            stats = self.get(name)
+            stats.count += 1
+            stats.bytes_sent += nbytes
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+    def received(self, name, nbytes, latency, decode_time, error=False):
+        with self.lock:
+            stats = self.get(name)
+            stats.in_flight -= 1
+            stats.replies += 1
+            stats.bytes_received += nbytes
+            stats.decode_time += decode_time
+            stats.add_latency(latency)
+            if error:
+                stats.errors += 1
+
+    def failed(self, name):
+        # timed out or lost with the connection
+        with self.lock:
+            stats = self.get(name)
+            stats.in_flight -= 1
+            stats.errors += 1
+
+    def event(self, name, nbytes, decode_time):
+        with self.lock:
+            stats = self.get('event ' + name)
+            stats.count += 1
+            stats.replies += 1
+            stats.bytes_received += nbytes
+            stats.decode_time += decode_time
+
+    def malformed(self, nbytes):
+        # a line of the stream that is not JSON
+        with self.lock:
+            stats = self.get('malformed')
+            stats.count += 1
+            stats.errors += 1
+            stats.bytes_received += nbytes
+
+    def snapshot(self):
+        with self.lock:
+            return [stats.snapshot() for stats in self.commands.values()]
+
+    def reset(self):
+        # keeps the in flight depth, those replies are still to come
+        with self.lock:
+            for name, stats in self.commands.items():
+                fresh = self.commands[name] = CommandStats(name)
+                fresh.in_flight = fresh.max_in_flight = stats.in_flight
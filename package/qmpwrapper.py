@@ -1,13 +1,192 @@
 from PySide2 import QtCore
+from concurrent.futures import Future, TimeoutError
+import itertools
 import threading
-import socket
+import asyncio
 import json
 import time
 
-class QMP(threading.Thread, QtCore.QObject):
+from package.constants import constants
+from package.responsejournal import ResponseJournal
+from package.pollscheduler import PollScheduler
+from package.pagecache import PageCache
+from package.subscriptions import Subscriptions
+from package.qmpstats import QMPStats
+from package.memblock import MemBlock
+
+class QMPDecoder:
+    # Incremental decoder for the newline framed QMP stream. Data is received
+    # straight into self.buffer, every complete line is parsed and only the
+    # partial tail is kept (moved to the front) for the next read.
+
+    def __init__(self, size=65536, malformed=None):
+        self.size = size # the buffer shrinks back to this after a large message
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.length = 0 # number of valid bytes in the buffer
+        self.scanned = 0 # bytes of the tail already known to hold no newline
+        self.malformed = malformed # called with the size of every line that is not JSON
+
+    def get_buffer(self, sizehint=4096):
+        # returns a writable view of the free space, growing the buffer if needed
+        if len(self.buffer) - self.length < sizehint:
+            size = len(self.buffer)
+            while size - self.length < sizehint:
+                size *= 2
+            buffer = bytearray(size)
+            buffer[:self.length] = self.view[:self.length]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        return self.view[self.length:]
+
+    def buffer_updated(self, nbytes):
+        # call after nbytes were written into the view from get_buffer()
+        self.length += nbytes
+        return self.decode()
+
+    def feed(self, data):
+        self.get_buffer(len(data))[:len(data)] = data
+        return self.buffer_updated(len(data))
+
+    def decode(self):
+        messages = [] # (message, encoded size, seconds spent parsing it)
+        start = 0
+        end = self.buffer.find(b'\n', self.scanned, self.length)
+        while end >= 0:
+            line = self.buffer[start:end]
+            if line and not line.isspace(): # QEMU terminates messages with \r\n
+                begin = time.perf_counter()
+                try:
+                    data = json.loads(line)
+                except ValueError: # skipped, the lines after it are still good
+                    if self.malformed:
+                        self.malformed(end + 1 - start)
+                else:
+                    messages.append((data, end + 1 - start, time.perf_counter() - begin))
+            start = end + 1
+            end = self.buffer.find(b'\n', start, self.length)
+
+        tail = self.length - start
+        if start:
+            self.view[:tail] = self.view[start:self.length]
+        self.length = tail
+        self.scanned = tail
+        if len(self.buffer) > self.size and tail * 4 <= len(self.buffer):
+            self.shrink()
+        return messages
+
+    def shrink(self):
+        # gives back the memory a large message grew the buffer to
+        size = self.size
+        while size < self.length * 2:
+            size *= 2
+        buffer = bytearray(size)
+        buffer[:self.length] = self.view[:self.length]
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    def reset(self):
+        self.length = 0
+        self.scanned = 0
+
+
+class QMPEngine:
+    # A single asyncio event loop, running in a daemon thread, that serves every
+    # QMP connection. Connection setup, reads, writes and timeouts all happen here.
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if not cls._instance:
+            cls._instance = QMPEngine()
+        return cls._instance
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        # runs a coroutine on the loop and returns a concurrent Future for its result
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, fn, *args):
+        self.loop.call_soon_threadsafe(fn, *args)
+
+
+class QMPProtocol(asyncio.BufferedProtocol):
+    # Non-blocking transport side of a QMP connection. The transport reads
+    # directly into the decoder's buffer and complete messages go to the QMP object.
+
+    def __init__(self, qmp):
+        self.qmp = qmp
+        self.decoder = QMPDecoder(malformed=qmp.stats.malformed)
+
+    def get_buffer(self, sizehint):
+        return self.decoder.get_buffer(max(sizehint, 4096))
+
+    def buffer_updated(self, nbytes):
+        self.qmp.handle_messages(self.decoder.buffer_updated(nbytes))
+
+    def connection_lost(self, exc):
+        self.qmp.connection_lost(self)
+
+
+class QMPBridge(QtCore.QObject):
+    # Delivers callbacks to the GUI thread through a queued signal
+
+    deliver = QtCore.Signal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.deliver.connect(self.call, QtCore.Qt.QueuedConnection)
+
+    @QtCore.Slot(object, object)
+    def call(self, callback, data):
+        callback(data)
+
+
+def hmp_name(line):
+    # statistics name of a human monitor command: the command without its
+    # arguments, so 'info registers' and 'info mtree' are counted apart
+    words = line.split()
+    return 'hmp ' + ' '.join(words[:2] if words[:1] == ['info'] else words[:1])
+
+
+class QMPBatch:
+    # Collects commands and hands them to the event loop together so they are
+    # written with a single send:
+    #     with qmp.batch() as batch:
+    #         batch.command('query-status')
+    #         batch.hmp('info registers', callback=...)
+
+    def __init__(self, qmp):
+        self.qmp = qmp
+        self.entries = []
+
+    def command(self, cmd, args=None, callback=None, handler=True):
+        future = self.qmp.make_future(callback)
+        self.entries.append((cmd, args, future, handler))
+        return future
+
+    def hmp(self, cmd, callback=None):
+        return self.command('human-monitor-command', args={'command-line': cmd}, callback=callback)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.qmp.submit(self.entries)
+        self.entries = []
+
+
+class QMP(QtCore.QObject):
 
     stateChanged = QtCore.Signal(bool)
     pmem = QtCore.Signal(list)
+    pmemBlock = QtCore.Signal(object)
+    guestReset = QtCore.Signal()
     memoryMap = QtCore.Signal(list)
     timeUpdate = QtCore.Signal(tuple)
     memSizeInfo = QtCore.Signal(int)
@@ -16,31 +195,51 @@ class QMP(threading.Thread, QtCore.QObject):
     timeMetric = QtCore.Signal(list)
     extraData = QtCore.Signal(dict)
 
-    def __init__(self):
+    def __init__(self, engine=None):
 
         QtCore.QObject.__init__(self)
-        threading.Thread.__init__(self)
-        
-        # Kill thread when parent dies
-        self.daemon = True 
 
-        # Socket creation
-        self.sock = None
-        self.isValid = False
-        self.sock_sem = QtCore.QSemaphore(1)
+        # Every QMP object shares one event loop unless given its own engine
+        self.engine = engine if engine else QMPEngine.instance()
+        self.loop = self.engine.loop
+        self.bridge = QMPBridge()
 
-        self.responses = []
-    
+        # Connection state, the transport is only touched from the event loop
+        self.transport = None
+        self.protocol = None
+        self.greeting = None
         self.isValid = False
         self.sock_sem = QtCore.QSemaphore(1)
 
-        self.banner = None
+        self.stats = QMPStats() # traffic statistics per command
+        self.responses = ResponseJournal(constants['journal_entries'], constants['journal_bytes'], constants['journal_spill'])
+
+        # Commands waiting for their reply, keyed by the QMP id they were sent with
+        self.pending = {}
+        self.ids = itertools.count()
+
+        # Commands submitted from other threads, written by the next flush()
+        self.queue = []
+        self.queue_lock = threading.Lock()
+        self.flush_scheduled = False
+
+        # Reply handlers keyed by the command that produced the reply, each is
+        # called with the 'return' member of the reply
+        self.handlers = {}
+        self.register_handler('query-status', self.handle_status)
+        self.register_handler('get-pmem', lambda ret: setattr(self, 'p_mem', ret))
+        self.register_handler('get-pmem-raw', lambda ret: setattr(self, 'p_mem_block', MemBlock.from_reply(ret))) # decoded off the GUI thread
+        self.register_handler('mtree', lambda ret: setattr(self, 'memorymap', ret))
+        self.register_handler('itc-time-metric', lambda ret: setattr(self, 'metric', ret))
+        self.register_handler('itc-sim-time', lambda ret: setattr(self, 'time', ret['time_ns']))
+        self.register_handler('query-memory-size-summary', lambda ret: setattr(self, 'mem_size', ret['base-memory']))
 
-        # self.sock_connect(host, port)
+        self.banner = None
 
         # QMP setup
         self._running = None
         self._p_mem = None
+        self._p_mem_block = None
         self._time = None
         self._mem_size = None
         self._connected = False
@@ -49,134 +248,221 @@ class QMP(threading.Thread, QtCore.QObject):
 
         self.ready = False
 
-    def run(self):
-        while self.ready:
-            data = self.listen()
-            if data == 'lost_conn':
-                self.running = None
-                break
-            # Handle Async QMP Messages 
-            if 'timestamp' in data:
-                if data['event'] == 'STOP':
-                    self.running = False
-                elif data['event'] == 'RESUME': 
-                    self.running = True
-                elif data['event'] == 'SHUTDOWN':
-                    self.sock_disconnect()
-            # Handle Status Return Messages
-            elif 'return' in data and 'running' in data['return'] and len(str(data['return'])) < 250:
-                self.running = data['return']['running']
-            elif 'return' in data and 'hash' in data['return'] and 'vals' in data['return']:
-                self.p_mem = data['return']
-            elif 'return' in data and type(data['return']) == list and len(data['return']) > 0 and 'name' in data['return'][0]:
-                self.memorymap = data['return']
-            elif 'return' in data and type(data['return']) == list and len(data['return']) == 2 and 'time_ns' in data['return'][0]:
-                self.metric = data['return']
-            elif 'return' in data and 'time_ns' in data['return']:
-                self.time = data['return']['time_ns']
-            elif 'return' in data and 'base-memory' in data['return']:
-                self.mem_size = data['return']['base-memory']        
+        # Owns every periodic poll of this connection
+        self.scheduler = PollScheduler(self)
+
+        # Guest memory shared by every memory view of this connection, and the
+        # ranges of it the views keep up to date
+        self.pages = PageCache(self, constants['page_cache_bytes'])
+        self.subscriptions = Subscriptions(self, self.pages)
+
+    def handle_messages(self, messages):
+        for data, nbytes, decode_time in messages:
+            self.handle_message(data, nbytes, decode_time)
+
+    def handle_message(self, data, nbytes=0, decode_time=0):
+        # Called in the event loop thread; signals reach the GUI queued
+        # Handle Async QMP Messages 
+        if 'event' in data:
+            self.stats.event(data['event'], nbytes, decode_time)
+            if data['event'] == 'STOP':
+                self.running = False
+            elif data['event'] == 'RESUME': 
+                self.running = True
+            elif data['event'] == 'RESET':
+                self.guestReset.emit()
+            elif data['event'] == 'SHUTDOWN':
+                self.sock_disconnect()
+        # Handle Greeting
+        elif 'QMP' in data:
+            if self.greeting and not self.greeting.done():
+                self.greeting.set_result(data)
+        # Handle Command Replies
+        else:
+            cmd, handle = self.resolve(data, nbytes, decode_time) if 'id' in data else (None, True)
+            handlers = self.handlers.get(cmd) if handle else None
+            if 'return' in data and (handlers or not handle):
+                # replies sent with handler=False only go to their future
+                for handler in handlers or []:
+                    handler(data['return'])
             else:
+                if data.get('return') != {}:
+                    self.responses.append(data, nbytes)
                 self.extraData.emit(data)
-            self.newdata = data           
-
-    def listen(self):
-        if self.isSockValid():
-            total_data = bytearray() # handles large returns
-            while self.connected:
-                try:
-                    data = self.sock.recv(4096)
-                except OSError:
-                    return ''
-                total_data.extend(data)
-                if len(data) < 4095:
-                    break
-
-            data = total_data.decode().split('\n')[0]
-            data = json.loads(data)
-            if 'time_ns' not in str(data) and "{'return': \{\}}" not in str(data):
-                self.responses.append(data)
-            # {'return': {'status': 'running', 'singlestep': False, 'running': True}}
-            if 'return' in data and 'running' in data['return'] and len(str(data)) < 250:
-                self.running = data['return']['running']
-                self.ready = True
-            return data
-        return ''
-
-
-    def command(self, cmd, args=None):
-        if self.isSockValid():
-            qmpcmd = json.dumps({'execute': cmd})
-            if args:
-                qmpcmd = json.dumps({'execute': cmd, 'arguments': args})
-            try:
-                self.sock.sendall(qmpcmd.encode())
-            except BrokenPipeError:
-                if self.isSockValid():
-                    self.sock_disconnect()
-
-    def hmp_command(self, cmd):
-        if self.isSockValid():
-            hmpcmd = json.dumps({'execute': 'human-monitor-command', 'arguments': {'command-line': cmd}})
-            # try:
-            self.sock.sendall(hmpcmd.encode())
-            # except BrokenPipeError:
-            #     if self.isSockValid():
-            #         self.sock_disconnect()
-            #         return None
-            time.sleep(0.05) # wait for listen to capture data and place it in responses dictionary
-            data = self.responses[-1]
-            return data
-        return None
-
-    def sock_disconnect(self):
+        self.newdata = data
+
+    def handle_status(self, value):
+        # {'status': 'running', 'singlestep': False, 'running': True}
+        self.running = value['running']
+        self.ready = True
+
+    def register_handler(self, cmd, handler):
+        # lets windows and plugins receive the replies of a command, in the event loop thread
+        self.handlers.setdefault(cmd, []).append(handler)
+
+    def unregister_handler(self, cmd, handler):
+        if handler in self.handlers.get(cmd, []):
+            self.handlers[cmd].remove(handler)
+
+    def command(self, cmd, args=None, callback=None, handler=True):
+        # Never blocks. Returns a Future that resolves to the reply carrying the
+        # same id; callback, if given, is called in the GUI thread with the reply
+        # or with None if the command failed or timed out. With handler=False
+        # the reply skips the handlers registered for cmd, for bulk readers
+        # that decode their own replies.
+        with self.batch() as batch:
+            return batch.command(cmd, args, callback, handler)
+
+    def hmp(self, cmd, callback=None):
+        return self.command('human-monitor-command', args={'command-line': cmd}, callback=callback)
+
+    def hmp_command(self, cmd, timeout=1):
+        # blocking variant of hmp() for scripts and plugins
         try:
-            self.sock_sem.acquire()
-            self.sock.close()
-            self.sock = None
-            self.isValid = False
-            self.connected = False
-            self.running = False
-            self.ready = False
-        except OSError as e:
-            print(e)
-        finally:
-            self.sock_sem.release()
+            return self.hmp(cmd).result(timeout)
+        except (TimeoutError, ConnectionError):
+            return None
+
+    def batch(self):
+        return QMPBatch(self)
+
+    def make_future(self, callback=None):
+        future = Future()
+        if callback:
+            future.add_done_callback(lambda f: self.bridge.deliver.emit(callback, None if f.cancelled() or f.exception() else f.result()))
+        return future
+
+    def submit(self, entries):
+        # queues (cmd, args, future, handler) entries for the event loop, which is woken
+        # at most once for everything queued before it runs
+        if not entries:
+            return
+        if not self.isSockValid():
+            for cmd, args, future, handler in entries:
+                future.set_exception(ConnectionError('QMP is not connected'))
+            return
+        with self.queue_lock:
+            self.queue.extend(entries)
+            wake = not self.flush_scheduled
+            self.flush_scheduled = True
+        if wake:
+            self.engine.call(self.flush)
+
+    def flush(self):
+        with self.queue_lock:
+            entries = self.queue
+            self.queue = []
+            self.flush_scheduled = False
+        self.send(entries)
+
+    def send(self, entries):
+        # Event loop side of submit(). Every command is written in one go and
+        # QEMU answers them in order, the ids pair each reply with its future.
+        if not self.transport or self.transport.is_closing():
+            for cmd, args, future, handler in entries:
+                future.set_exception(ConnectionError('QMP is not connected'))
+            return
+        now = time.perf_counter()
+        timeout = self.loop.time() + constants['qmp_timeout']
+        data = []
+        for cmd, args, future, handler in entries:
+            id_ = next(self.ids)
+            name = hmp_name(args['command-line']) if cmd == 'human-monitor-command' else cmd
+            timer = self.loop.call_at(timeout, self.expire, id_)
+            self.pending[id_] = (cmd, future, timer, name, now, handler)
+            qmpcmd = {'execute': cmd, 'id': id_}
+            if args:
+                qmpcmd['arguments'] = args
+            data.append(json.dumps(qmpcmd).encode())
+            self.stats.sent(name, len(data[-1]))
+        self.transport.write(b''.join(data))
+
+    def resolve(self, data, nbytes=0, decode_time=0):
+        # completes the future waiting on this reply and returns the command
+        # name and whether its handlers get the reply
+        entry = self.pending.pop(data['id'], None)
+        if entry:
+            cmd, future, timer, name, start, handler = entry
+            timer.cancel()
+            self.stats.received(name, nbytes, time.perf_counter() - start, decode_time, 'error' in data)
+            if not future.done():
+                future.set_result(data)
+            return cmd, handler
+        return None, True
+
+    def expire(self, id_):
+        entry = self.pending.pop(id_, None)
+        if entry:
+            self.stats.failed(entry[3])
+            if not entry[1].done():
+                entry[1].set_exception(TimeoutError(f'no reply to {entry[0]}'))
+
+    def fail_pending(self):
+        pending = self.pending
+        self.pending = {}
+        for cmd, future, timer, name, start, handler in pending.values():
+            timer.cancel()
+            self.stats.failed(name)
+            if not future.done():
+                future.set_exception(ConnectionError('lost connection to QMP'))
 
     def sock_connect(self, host, port):
+        # Never blocks. connectionChange reports the outcome once the
+        # capabilities negotiation has finished.
+        return self.engine.submit(self.open_connection(host, port))
+
+    async def open_connection(self, host, port):
+        timeout = constants['qmp_timeout']
+        self.greeting = self.loop.create_future()
         try:
-            self.sock_sem.acquire()
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.settimeout(1)
-            self.sock.connect((host, port))
-            self.isValid = True
-            self.connected = True
-            self.banner = json.loads(self.sock.recv(256))
-        except OSError as e:
-            self.isValid = False
+            self.transport, self.protocol = await asyncio.wait_for(self.loop.create_connection(lambda: QMPProtocol(self), host, port), timeout)
+            self.banner = await asyncio.wait_for(self.greeting, timeout)
+            negotiation = [('qmp_capabilities', None, Future(), True), ('query-status', None, Future(), True)]
+            self.send(negotiation)
+            for cmd, args, future, handler in negotiation:
+                await asyncio.wrap_future(future)
+        except (OSError, asyncio.TimeoutError, TimeoutError, ConnectionError):
+            self.close_connection()
             self.connected = False
-        finally:
-            self.sock_sem.release()
-
-        self.command('qmp_capabilities')
-        self.command('query-status')
+            return False
+        self.sock_sem.acquire()
+        self.isValid = True
+        self.sock_sem.release()
+        self.connected = True
+        return True
 
- 
-        #if not self.isAlive():
-        #    print(self.listen()) # pluck empty return object
-        #    print(self.listen()) # grab running state
+    def close_connection(self):
+        # event loop side of sock_disconnect()
+        self.sock_sem.acquire()
+        self.isValid = False
+        self.sock_sem.release()
+        if self.transport:
+            self.transport.close()
+        self.transport = None
+        self.protocol = None
+        self.fail_pending()
+        self.responses.close() # here, the loop thread being the only one writing to it
+
+    def connection_lost(self, protocol):
+        if protocol is not self.protocol: # an earlier connection that was already replaced
+            return
+        self.close_connection()
+        self.connected = False
+        self.running = None
+        self.ready = False
 
-        while not self.ready:
-            self.command('query-status')
-            self.listen()
+    def sock_disconnect(self):
+        self.sock_sem.acquire()
+        self.isValid = False
+        self.sock_sem.release()
+        self.engine.call(self.close_connection)
+        self.connected = False
+        self.running = False
+        self.ready = False
 
     def reconnect(self, host, port):
         self.sock_disconnect()
-        self.sock_connect(host, port)
-
-        while not self.ready:
-            self.command('query-status')
-            self.listen()
+        return self.sock_connect(host, port)
               
     def isSockValid(self):
         self.sock_sem.acquire()
@@ -205,6 +491,15 @@ class QMP(threading.Thread, QtCore.QObject):
         self._p_mem = value
         self.pmem.emit(value)
 
+    @property
+    def p_mem_block(self):
+        return self._p_mem_block
+
+    @p_mem_block.setter
+    def p_mem_block(self, value):
+        self._p_mem_block = value
+        self.pmemBlock.emit(value)
+
 
     @property
     def memorymap(self):
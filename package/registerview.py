@@ -1,6 +1,6 @@
 from PySide2.QtWidgets import QMainWindow, QWidget, QLabel, QGridLayout, QShortcut, QLineEdit, QAction, QFileDialog
 from PySide2.QtGui import QKeySequence, QFont
-from PySide2.QtCore import Qt, QTimer
+from PySide2.QtCore import Qt
 import re
 
 class RegisterView(QMainWindow):
@@ -18,14 +18,11 @@ class RegisterView(QMainWindow):
         self.fancy = True
         self.registers = None
 
-        self.init_ui()
-        self.create_fancy()
+        self.prev = []
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(lambda: self.fancy_update() if self.fancy else self.ugly_update())
-        self.timer.start(100)
+        self.init_ui()
 
-        self.prev = []
+        self.poller = self.qmp.scheduler.register('CPU Registers', 100, self.handle_registers, command='human-monitor-command', args={'command-line': 'info registers'}, needs_running=True)
 
         self.menu_bar()
         self.show()
@@ -43,10 +40,32 @@ class RegisterView(QMainWindow):
         center.setLayout(self.grid)
         self.setCentralWidget(center)
 
-        if self.fancy:
+        self.fancy_list = []
+        self.lab = None
+
+        if self.registers:
+            self.handle_registers(self.registers)
+        self.request_registers()
+
+    def request_registers(self):
+
+        self.qmp.hmp('info registers', callback=self.handle_registers)
+
+    def handle_registers(self, data):
+
+        if not data or 'return' not in data:
+            return
+
+        self.registers = data
+
+        if self.fancy and not self.fancy_list:
             self.create_fancy()
-        else:
+        elif self.fancy:
+            self.fancy_update()
+        elif not self.lab:
             self.create_ugly()
+        else:
+            self.ugly_update()
 
     def create_fancy(self):
 
@@ -95,11 +114,8 @@ class RegisterView(QMainWindow):
    
     def fancy_data(self):
 
-        data = self.qmp.hmp_command('info registers')
-        self.registers = data
-
         d = {}
-        for e in filter(None, re.split('=| |\r\n', data['return'])): # string to dictionary
+        for e in filter(None, re.split('=| |\r\n', self.registers['return'])): # string to dictionary
             if not re.match('[0-9a-f]+', e) and '[' not in e:
                 temp = e
                 d[e] = ''
@@ -112,30 +128,26 @@ class RegisterView(QMainWindow):
 
         self.grid.setSpacing(15)
 
-        data = self.qmp.hmp_command('info registers')
-        self.registers = data
-
-        self.lab = QLabel(data['return'], self)
+        self.lab = QLabel(self.registers['return'], self)
         self.lab.setFont(QFont('Monospace', 12))
 
         self.grid.addWidget(self.lab, 0, 0)
 
     def ugly_update(self):
 
-        data = self.qmp.hmp_command('info registers')
-
-        self.lab.setText(data['return'])
+        self.lab.setText(self.registers['return'])
     
     def switch_view(self):
 
-        self.timer.stop()
-
         self.fancy = not self.fancy
 
         self.init_ui()
-
-        self.timer.start()
     
+    def closeEvent(self, event):
+
+        self.qmp.scheduler.unregister(self.poller)
+        event.accept()
+
     def export_registers(self):
 
         name = QFileDialog.getSaveFileName(self, 'Save File', '', 'Text files (*.txt)')
@@ -152,7 +164,7 @@ class RegisterView(QMainWindow):
         file_menu = bar.addMenu('File')
         options = bar.addMenu('Options')
 
-        toggle_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: self.timer.start(100) if toggle_refresh.isChecked() else self.timer.stop())
+        toggle_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: setattr(self.poller, 'enabled', toggle_refresh.isChecked()))
         toggle_ugly = QAction('Text View', self, checkable=True, triggered=lambda:self.switch_view())
         save_to_file = QAction('Save to File', self, triggered=self.export_registers)
 
@@ -0,0 +1,48 @@
+from collections import deque
+import json
+
+class ResponseJournal:
+    # Bounded history of QMP responses. At most max_entries responses and
+    # max_bytes of encoded size are kept; evicted responses are appended to
+    # the spill file (one compact JSON document per line) when one is given.
+
+    def __init__(self, max_entries=1000, max_bytes=4 * 1024 * 1024, spill=None):
+        self.entries = deque()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0 # encoded size of the kept responses
+
+        self.spill = spill
+        self.spill_file = None
+
+    def append(self, data, nbytes):
+        self.entries.append((data, nbytes))
+        self.size += nbytes
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            evicted, evicted_bytes = self.entries.popleft()
+            self.size -= evicted_bytes
+            if self.spill:
+                self.write_spill(evicted)
+
+    def write_spill(self, data):
+        if not self.spill_file:
+            self.spill_file = open(self.spill, 'a', buffering=1)
+        self.spill_file.write(json.dumps(data, separators=(',', ':')) + '\n')
+
+    def close(self):
+        if self.spill_file:
+            self.spill_file.close()
+            self.spill_file = None
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def __getitem__(self, index):
+        return self.entries[index][0]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return (data for data, nbytes in self.entries)
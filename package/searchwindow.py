@@ -0,0 +1,224 @@
+from PySide2.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QPushButton, QProgressBar, QListView
+from PySide2.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide2.QtGui import QIcon, QFont
+import os
+
+from package.memsearch import kinds, compile_pattern, Matcher, Search, DumpSearch, SearchResults
+
+class SearchWindow(QWidget):
+    # Searches a range of guest physical memory for a pattern and lists the
+    # matches, which are shown in a memory dump window when picked
+
+    def __init__(self, qmp, dump=None, dump_file=None):
+        super().__init__()
+
+        self.qmp = qmp
+        self.dump = dump # MemDumpWindow the matches are shown in
+        self.dump_file = dump_file # DumpFile searched instead of the guest
+        self.search = None
+        self.results = SearchResults()
+
+        self.init_ui()
+
+        icon = QIcon('package/icons/nasa.png')
+        self.setWindowIcon(icon)
+
+        # the end of RAM, or of the dump, is the default end of the range
+        if self.dump_file:
+            self.start.setText(f'0x{self.dump_file.base:x}')
+            self.handle_mem_size(self.dump_file.size)
+            self.setWindowTitle(f'Memory Search - {os.path.basename(self.dump_file.filename)}')
+        else:
+            self.qmp.memSizeInfo.connect(self.handle_mem_size)
+            if self.qmp.mem_size:
+                self.handle_mem_size(self.qmp.mem_size)
+            else:
+                self.qmp.command('query-memory-size-summary')
+
+        self.show()
+
+    def init_ui(self):
+        vbox = QVBoxLayout()
+
+        pattern = QHBoxLayout()
+        pattern.addWidget(QLabel('Find:'))
+        self.kind = QComboBox()
+        self.kind.addItems(kinds)
+        self.kind.currentTextChanged.connect(self.handle_kind)
+        pattern.addWidget(self.kind)
+        self.value = QLineEdit()
+        self.value.setPlaceholderText('de ad ?? ef')
+        self.value.returnPressed.connect(self.toggle_search)
+        pattern.addWidget(self.value)
+        pattern.addWidget(QLabel('Width:'))
+        self.width = QComboBox()
+        self.width.addItems(['1', '2', '4', '8'])
+        self.width.setCurrentText('4')
+        pattern.addWidget(self.width)
+        self.big_endian = QCheckBox('Big Endian')
+        pattern.addWidget(self.big_endian)
+        self.aligned = QCheckBox('Aligned')
+        self.aligned.setToolTip('Only match integers at multiples of their width and UTF-16 at even addresses')
+        pattern.addWidget(self.aligned)
+        vbox.addLayout(pattern)
+
+        bounds = QHBoxLayout()
+        bounds.addWidget(QLabel('Start:'))
+        self.start = QLineEdit('0x0')
+        bounds.addWidget(self.start)
+        bounds.addWidget(QLabel('End:'))
+        self.end = QLineEdit()
+        bounds.addWidget(self.end)
+        self.button = QPushButton('Search')
+        self.button.clicked.connect(self.toggle_search)
+        bounds.addWidget(self.button)
+        vbox.addLayout(bounds)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 1000)
+        vbox.addWidget(self.progress)
+
+        self.model = ResultsModel(self.results)
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True) # keeps long result lists fast
+        self.list.setFont(QFont('Courier New'))
+        self.list.activated.connect(lambda index: self.show_result(index.row()))
+        self.list.clicked.connect(lambda index: self.show_result(index.row()))
+        vbox.addWidget(self.list)
+
+        navigation = QHBoxLayout()
+        self.status = QLabel()
+        navigation.addWidget(self.status)
+        previous = QPushButton('Previous')
+        previous.clicked.connect(lambda: self.step(-1))
+        navigation.addWidget(previous, 0, Qt.AlignRight)
+        next_ = QPushButton('Next')
+        next_.clicked.connect(lambda: self.step(1))
+        navigation.addWidget(next_)
+        vbox.addLayout(navigation)
+
+        self.handle_kind(self.kind.currentText())
+        self.setLayout(vbox)
+        self.setWindowTitle('Memory Search')
+        self.setGeometry(150, 150, 700, 500)
+
+    def handle_kind(self, kind):
+        self.width.setEnabled(kind == 'Integer')
+        self.big_endian.setEnabled(kind == 'Integer')
+        self.aligned.setEnabled(kind in ['Integer', 'UTF-16 LE', 'UTF-16 BE'])
+
+    def handle_mem_size(self, size):
+        if not self.end.text():
+            self.end.setText(f'0x{size:x}')
+
+    def toggle_search(self):
+        if self.search:
+            self.search.cancel()
+        else:
+            self.start_search()
+
+    def start_search(self):
+        kind = self.kind.currentText()
+        width = int(self.width.currentText())
+        try:
+            pattern, mask = compile_pattern(kind, self.value.text(), width, self.big_endian.isChecked())
+            start = int(self.start.text(), 0)
+            end = int(self.end.text(), 0)
+        except ValueError as e:
+            self.status.setText(f'<font color="red">{e}</font>')
+            return
+        if not 0 <= start < end <= 1 << 64:
+            self.status.setText('<font color="red">Invalid range</font>')
+            return
+
+        align = 1
+        if self.aligned.isChecked():
+            align = width if kind == 'Integer' else 2 if kind.startswith('UTF-16') else 1
+
+        self.results = SearchResults(len(pattern))
+        self.model.reset(self.results)
+        self.progress.setValue(0)
+        self.status.setText('Searching...')
+        self.button.setText('Cancel')
+
+        if self.dump_file:
+            self.search = DumpSearch(self.dump_file, Matcher(pattern, mask, align), start, end)
+        else:
+            self.search = Search(self.qmp, Matcher(pattern, mask, align), start, end)
+        self.search.found.connect(self.model.append)
+        self.search.progress.connect(self.handle_progress)
+        self.search.finished.connect(self.handle_finished)
+        self.search.run_in_thread()
+
+    def handle_progress(self, done, total):
+        self.progress.setValue(done * 1000 // total)
+        self.status.setText(f'{len(self.results)} matches, {done // (1024 * 1024)} of {total // (1024 * 1024)} MiB')
+
+    def handle_finished(self, matches, reason):
+        self.search = None
+        self.button.setText('Search')
+        if reason:
+            self.status.setText(f'{matches} matches. <font color="orange">{reason}</font>')
+        else:
+            self.progress.setValue(1000)
+            self.status.setText(f'{matches} matches')
+
+    def show_result(self, row):
+        if not 0 <= row < len(self.results):
+            return
+        self.list.setCurrentIndex(self.model.index(row))
+        addr = self.results[row]
+        if self.dump is None or not self.dump.isVisible():
+            from package.memdumpwindow import MemDumpWindow # it opens this window too
+            self.dump = MemDumpWindow(self.qmp, addr, dump_file=self.dump_file)
+        self.dump.select(addr, self.results.length)
+
+    def step(self, direction):
+        # the match after or before the current one
+        if not len(self.results):
+            return
+        row = self.list.currentIndex().row()
+        if row < 0:
+            row = 0 if direction > 0 else len(self.results) - 1
+        else:
+            addr = self.results[row]
+            row = self.results.next(addr) if direction > 0 else self.results.previous(addr)
+        if row is not None:
+            self.show_result(row)
+
+    def closeEvent(self, event):
+        if self.search:
+            self.search.cancel()
+        if not self.dump_file:
+            self.qmp.memSizeInfo.disconnect(self.handle_mem_size)
+        event.accept()
+
+
+class ResultsModel(QAbstractListModel):
+    # Addresses of a SearchResults, only the rows on screen are ever formatted
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return f'0x{self.results[index.row()]:016x}'
+        return None
+
+    def reset(self, results):
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+
+    def append(self, addresses):
+        if not addresses:
+            return
+        first = len(self.results)
+        self.beginInsertRows(QModelIndex(), first, first + len(addresses) - 1)
+        self.results.add(addresses)
+        self.endInsertRows()
@@ -0,0 +1,136 @@
+from PySide2.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QSplitter
+from PySide2.QtGui import QFont
+from PySide2.QtCore import Qt
+
+class StatsWindow(QMainWindow):
+
+    command_columns = ['Command', 'Requests', 'Errors', 'In Flight', 'Max In Flight', 'Sent', 'Received', 'p50', 'p90', 'p99', 'Max', 'Decode']
+    poller_columns = ['Poller', 'Interval', 'Period', 'Latency', 'In Flight', 'Sent', 'Completed', 'Failed', 'Dropped']
+
+    def __init__(self, qmp):
+
+        QMainWindow.__init__(self)
+
+        self.qmp = qmp
+
+        self.init_ui()
+
+        self.poller = self.qmp.scheduler.register('QMP Statistics', 1000, self.update_stats)
+        self.update_stats()
+
+        self.show()
+
+    def init_ui(self):
+
+        self.setWindowTitle('QMP Statistics')
+        self.setGeometry(100, 100, 1000, 500)
+
+        vbox = QVBoxLayout()
+        toolbar = QHBoxLayout()
+
+        self.summary = QLabel()
+        toolbar.addWidget(self.summary)
+
+        reset = QPushButton('Reset')
+        reset.clicked.connect(self.reset)
+        toolbar.addWidget(reset, 0, Qt.AlignRight)
+
+        vbox.addLayout(toolbar)
+
+        self.commands = self.make_table(self.command_columns)
+        self.pollers = self.make_table(self.poller_columns)
+
+        split = QSplitter(Qt.Vertical)
+        split.addWidget(self.commands)
+        split.addWidget(self.pollers)
+        split.setStretchFactor(0, 2)
+        vbox.addWidget(split)
+
+        center = QWidget()
+        center.setLayout(vbox)
+        self.setCentralWidget(center)
+
+    def make_table(self, columns):
+
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setFont(QFont('Courier New'))
+        return table
+
+    def fill_table(self, table, rows):
+
+        table.setRowCount(len(rows))
+        for y, row in enumerate(rows):
+            for x, value in enumerate(row):
+                item = table.item(y, x)
+                if not item:
+                    item = QTableWidgetItem()
+                    if x:
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    table.setItem(y, x, item)
+                item.setText(value)
+
+    def update_stats(self):
+
+        commands = sorted(self.qmp.stats.snapshot(), key=lambda c: c['name'])
+        self.fill_table(self.commands, [[
+            c['name'],
+            str(c['count']),
+            str(c['errors']),
+            str(c['in_flight']),
+            str(c['max_in_flight']),
+            format_bytes(c['bytes_sent']),
+            format_bytes(c['bytes_received']),
+            format_time(c['p50']),
+            format_time(c['p90']),
+            format_time(c['p99']),
+            format_time(c['max']),
+            format_time(c['decode_time'])
+        ] for c in commands])
+
+        pollers = self.qmp.scheduler.stats()
+        self.fill_table(self.pollers, [[
+            p['name'],
+            f'{p["interval"]:.0f} ms',
+            f'{p["period"]:.0f} ms',
+            format_time(p['latency']),
+            str(p['in_flight']),
+            str(p['sent']),
+            str(p['completed']),
+            str(p['failed']),
+            str(p['dropped'])
+        ] for p in pollers])
+
+        requests = sum(c['count'] for c in commands)
+        received = sum(c['bytes_received'] for c in commands)
+        self.summary.setText(f'{requests} requests, {format_bytes(received)} received, {self.qmp.scheduler.dropped()} polls dropped')
+
+    def reset(self):
+
+        self.qmp.stats.reset()
+        self.update_stats()
+
+    def closeEvent(self, event):
+
+        self.qmp.scheduler.unregister(self.poller)
+        event.accept()
+
+
+def format_bytes(n):
+    if n < 1024:
+        return f'{n} B'
+    for unit in ['KiB', 'MiB']:
+        n /= 1024
+        if n < 1024:
+            return f'{n:.1f} {unit}'
+    return f'{n / 1024:.1f} GiB'
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f} s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.1f} ms'
+    return f'{seconds * 1e6:.0f} us'
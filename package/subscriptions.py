@@ -0,0 +1,74 @@
+from PySide2.QtCore import QObject
+
+class Subscription:
+    # A range of guest memory [start, end) a window wants kept up to date.
+    # The window reads it from the page cache, which reports what changed.
+
+    def __init__(self, service, start, end):
+        self.service = service
+        self.start = start
+        self.end = end
+        self.enabled = True
+
+    def move(self, start, end):
+        self.start = start
+        self.end = end
+        self.service.load(self)
+
+
+class Subscriptions(QObject):
+    # Refreshes the memory every window subscribed to with one poller. On each
+    # tick the subscribed ranges are rounded to pages and overlapping or
+    # adjacent ones are merged, so memory shown by several windows is read
+    # once. Replies land in the page cache, whose changed signal tells the
+    # windows what to repaint.
+
+    def __init__(self, qmp, cache, interval=1000):
+        super().__init__()
+        self.qmp = qmp
+        self.cache = cache
+        self.subscriptions = []
+        self.cache.invalidated.connect(self.handle_invalidated)
+
+        # memory can only change while the guest runs
+        self.poller = self.qmp.scheduler.register('Memory Subscriptions', interval, self.refresh, needs_running=True)
+        self.poller.enabled = False
+
+    def subscribe(self, start, end):
+        subscription = Subscription(self, start, end)
+        self.subscriptions.append(subscription)
+        self.poller.enabled = True
+        self.load(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        self.poller.enabled = bool(self.subscriptions)
+
+    def load(self, subscription):
+        # reads what is not resident
+        self.cache.fetch(subscription.start, subscription.end - subscription.start)
+
+    def ranges(self):
+        # the enabled ranges, page aligned, merged and sorted
+        page = self.cache.page_size
+        ranges = sorted((s.start // page * page, -(-s.end // page) * page) for s in self.subscriptions if s.enabled and s.start < s.end)
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def refresh(self):
+        future = None
+        for start, end in self.ranges():
+            future = self.cache.fetch(start, end - start, refresh=True) or future
+        return future
+
+    def handle_invalidated(self, start, end):
+        for subscription in self.subscriptions:
+            if subscription.enabled and subscription.start < end and subscription.end > start:
+                self.cache.fetch(subscription.start, subscription.end - subscription.start)
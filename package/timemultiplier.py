@@ -1,10 +1,9 @@
 from package.qmpwrapper import QMP
-from PySide2.QtCore import QSemaphore, Signal, QObject, QThread, Qt
+from PySide2.QtCore import QSemaphore, Signal, QObject, Qt
 from PySide2.QtGui import QPainter, QFont
 from PySide2.QtWidgets import QVBoxLayout, QWidget, QHBoxLayout, QPushButton, QSpinBox, QLabel
 
 import time
-from threading import Thread
 from datetime import datetime, timezone
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -25,6 +24,9 @@ class TimeMultiplier(QWidget):
         self.qmp.timeMetric.connect(self.handle_sample)
 
         self.kill_event = event
+        self.kill_event.connect(self.stop)
+        self.updateRate.connect(self.update_rate)
+        self.poller = None
 
         self.data = 0
 
@@ -133,11 +135,17 @@ class TimeMultiplier(QWidget):
         self.start_time = self.real_prev
         self.data = []
         self.lim_data = [] # data within limit
-        self.t = SamplingThread()
-        self.kill_event.connect(self.t.end_thread)
-        self.t.sample.connect(self.get_time)
-        self.updateRate.connect(self.t.update) 
-        self.t.start()
+        self.stop()
+        self.poller = self.qmp.scheduler.register('Time Multiplier', 1000 / self.rate_value, command='itc-time-metric')
+
+    def stop(self):
+        if self.poller:
+            self.qmp.scheduler.unregister(self.poller)
+            self.poller = None
+
+    def update_rate(self, rate):
+        if self.poller:
+            self.poller.set_interval(1000 / rate)
 
     def handle_sample(self, val):
         self.sem.acquire()
@@ -187,24 +195,3 @@ class TimeMultiplier(QWidget):
         med = numpy.median(self.lim_data)
         self.plot_med.setText(f'Median: {med:.03f}')
     
-    def get_time(self):
-        self.qmp.command('itc-time-metric')
-
-class SamplingThread(QThread):
-    sample = Signal()
-    def __init__(self):
-        super().__init__()
-        self.sem = QSemaphore()
-        self.rate = 10
-        
-    def run(self):
-        while True:
-            if self.sem.tryAcquire(1, (1.0/self.rate) * 1000):
-                break
-            self.sample.emit()
-
-    def end_thread(self):
-        self.sem.release()
-
-    def update(self, rate):
-        self.rate = rate
\ No newline at end of file
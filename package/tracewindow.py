@@ -1,6 +1,6 @@
 from PySide2.QtWidgets import QMainWindow, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget, QLabel, QHBoxLayout, QLineEdit, QPushButton, QCompleter, QAction, QCheckBox, QSplitter, QScrollArea, QFileDialog
 from PySide2.QtGui import Qt, QFont 
-from PySide2.QtCore import QTimer, QSize
+from PySide2.QtCore import QSize
 
 import os, re
 
@@ -14,19 +14,19 @@ class TraceWindow(QMainWindow):
 
         os.system('rm /tmp/errors.log 2>/dev/null')
 
-        self.trace_events = self.qmp.hmp_command('info trace-events')
-        self.qmp.hmp_command('logfile /tmp/errors.log')
+        self.qmp.hmp('logfile /tmp/errors.log')
 
-        self.trace_events = sorted(self.trace_events['return'].split('\r\n'))[1:]
+        self.trace_events = []
         self.activated = []
 
         self.length = 100
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.disp_output)
-        self.timer.start(100)
+        # the guest writes no trace events while it is paused
+        self.poller = self.qmp.scheduler.register('Trace Events', 100, self.disp_output, needs_running=True)
 
         self.init_ui()
+
+        self.qmp.hmp('info trace-events', callback=self.populate_tree)
     
     def init_ui(self):
 
@@ -39,7 +39,7 @@ class TraceWindow(QMainWindow):
         export_log = QAction('Save to File', self, triggered=lambda: self.save_log())
 
         options = bar.addMenu('Options')
-        auto_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: self.timer.start(100) if auto_refresh.isChecked() else self.timer.stop())
+        auto_refresh = QAction('Auto Refresh', self, checkable=True, triggered=lambda: setattr(self.poller, 'enabled', auto_refresh.isChecked()))
         auto_refresh.setChecked(True)
 
         options.addAction(auto_refresh)
@@ -54,20 +54,6 @@ class TraceWindow(QMainWindow):
         self.top = []
         self.lst = []
 
-        for n, event in enumerate(self.trace_events):
-            word = event.split('_')[0]
-            if word not in self.top:
-                self.top.append(word)
-                item = QTreeWidgetItem(self.tree)
-                self.lst.append(item)
-                item.setText(0, word)
-            subitem = QTreeWidgetItem(item)
-            subitem.setText(0, '    ' + event.split(' : ')[0])
-            # subitem.setCheckState(0, Qt.Unchecked)
-            cbox = QCheckBox()
-            cbox.stateChanged.connect(lambda state, text=subitem.text(0): self.handle_checked(state, text))
-            self.tree.setItemWidget(subitem, 0, cbox)
-        
         # self.tree.setColumnWidth(0, 25)
 
         self.tracelist = QLabel()
@@ -130,6 +116,29 @@ class TraceWindow(QMainWindow):
         self.setCentralWidget(center)
         self.show()
 
+    def populate_tree(self, data):
+
+        if not data or 'return' not in data:
+            return
+
+        self.trace_events = sorted(data['return'].split('\r\n'))[1:]
+
+        for n, event in enumerate(self.trace_events):
+            word = event.split('_')[0]
+            if word not in self.top:
+                self.top.append(word)
+                item = QTreeWidgetItem(self.tree)
+                self.lst.append(item)
+                item.setText(0, word)
+            subitem = QTreeWidgetItem(item)
+            subitem.setText(0, '    ' + event.split(' : ')[0])
+            # subitem.setCheckState(0, Qt.Unchecked)
+            cbox = QCheckBox()
+            cbox.stateChanged.connect(lambda state, text=subitem.text(0): self.handle_checked(state, text))
+            self.tree.setItemWidget(subitem, 0, cbox)
+
+        self.completer.model().setStringList(self.top)
+
     def disp_output(self):
 
         self.shorten_file()
@@ -175,18 +184,19 @@ class TraceWindow(QMainWindow):
     def handle_checked(self, state, text):
 
         if state:
-            self.qmp.hmp_command('trace-event %s on' % text.strip())
+            self.qmp.hmp('trace-event %s on' % text.strip())
             self.activated.append(text)
         else:
-            self.qmp.hmp_command('trace-event %s off' % text.strip())
+            self.qmp.hmp('trace-event %s off' % text.strip())
             self.activated.remove(text)
     
     def closeEvent(self, event):
 
-        self.timer.stop()
+        self.qmp.scheduler.unregister(self.poller)
 
-        for e in self.activated:
-            self.qmp.hmp_command('trace-event %s off' % e.strip())
+        with self.qmp.batch() as batch:
+            for e in self.activated:
+                batch.hmp('trace-event %s off' % e.strip())
         
         os.system('rm /tmp/errors.log')
 
@@ -0,0 +1,248 @@
+from PySide2.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QAction, QFileDialog
+from PySide2.QtGui import QFont, QColor
+from PySide2.QtCore import Qt
+from random import randint
+import base64
+import struct
+import json
+import os
+
+# struct code of every type a value can be shown as
+types = {
+    'u8': 'B', 'i8': 'b',
+    'u16': 'H', 'i16': 'h',
+    'u32': 'I', 'i32': 'i',
+    'u64': 'Q', 'i64': 'q',
+    'f32': 'f', 'f64': 'd'
+}
+
+class WatchWindow(QMainWindow):
+    # Values scattered through guest memory, all read by one get-pmem-list per
+    # tick of a single poller and decoded with one struct unpack. Values of a
+    # DumpFile are read from the dump when the list changes.
+
+    columns = ['Name', 'Address', 'Type', 'Value', 'Hex']
+    max_items = 4096 # get-pmem-list reads at most this many
+
+    def __init__(self, qmp, dump_file=None):
+
+        QMainWindow.__init__(self)
+
+        self.qmp = qmp
+        self.dump_file = dump_file
+
+        self.items = [] # {'name', 'addr', 'type'}
+        self.big_endian = False
+        self.layout_changed()
+
+        self.init_ui()
+
+        self.poller = None # a dump never changes
+        if not self.dump_file:
+            self.poller = self.qmp.scheduler.register('Watch', 500, self.handle_values, command='get-pmem-list', args=self.args, needs_running=True)
+            self.poller.enabled = False # nothing to watch yet
+
+        self.menu_bar()
+        self.show()
+
+    def init_ui(self):
+
+        self.setWindowTitle(f'Watch - {os.path.basename(self.dump_file.filename)}' if self.dump_file else 'Watch')
+        self.setGeometry(100, 100, 800, 500)
+
+        vbox = QVBoxLayout()
+        toolbar = QHBoxLayout()
+
+        toolbar.addWidget(QLabel('Address:'))
+        self.address = QLineEdit()
+        self.address.returnPressed.connect(self.add_from_toolbar)
+        toolbar.addWidget(self.address)
+
+        toolbar.addWidget(QLabel('Type:'))
+        self.type = QComboBox()
+        self.type.addItems(list(types))
+        self.type.setCurrentText('u32')
+        toolbar.addWidget(self.type)
+
+        toolbar.addWidget(QLabel('Name:'))
+        self.name = QLineEdit()
+        self.name.returnPressed.connect(self.add_from_toolbar)
+        toolbar.addWidget(self.name)
+
+        add = QPushButton('Add')
+        add.clicked.connect(self.add_from_toolbar)
+        toolbar.addWidget(add)
+
+        remove = QPushButton('Remove')
+        remove.clicked.connect(self.remove_selected)
+        toolbar.addWidget(remove)
+
+        self.endian = QComboBox()
+        self.endian.addItems(['Little Endian', 'Big Endian'])
+        self.endian.currentTextChanged.connect(lambda text: self.set_big_endian(text == 'Big Endian'))
+        toolbar.addWidget(self.endian)
+
+        vbox.addLayout(toolbar)
+
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setFont(QFont('Courier New'))
+        vbox.addWidget(self.table)
+
+        self.status = QLabel()
+        vbox.addWidget(self.status)
+
+        center = QWidget()
+        center.setLayout(vbox)
+        self.setCentralWidget(center)
+
+    def menu_bar(self):
+
+        bar = self.menuBar()
+
+        file_menu = bar.addMenu('File')
+        options = bar.addMenu('Options')
+
+        load = QAction('Load Watch List', self, triggered=self.load)
+        save = QAction('Save Watch List', self, triggered=self.save)
+        file_menu.addAction(load)
+        file_menu.addAction(save)
+
+        toggle_refresh = QAction('Auto Refresh', self, checkable=True, triggered=self.enable_poller)
+        toggle_refresh.setChecked(True)
+        toggle_refresh.setEnabled(self.poller is not None)
+        options.addAction(toggle_refresh)
+        self.toggle_refresh = toggle_refresh
+
+    def layout_changed(self):
+        # the items or the endianness changed: a new hash tells replies to the
+        # old layout apart, and one struct decodes every value of a reply
+        self.hash = randint(0, 0xfffffffffffffff)
+        self.request = {
+            'hash': self.hash,
+            'items': [{'addr': item['addr'] - (1 << 64) if item['addr'] >= 1 << 63 else item['addr'], 'size': struct.calcsize(types[item['type']])} for item in self.items]
+        }
+        self.format = struct.Struct(('>' if self.big_endian else '<') + ''.join(types[item['type']] for item in self.items))
+        self.offsets = [0]
+        for item in self.items:
+            self.offsets.append(self.offsets[-1] + struct.calcsize(types[item['type']]))
+        self.values = [None] * len(self.items)
+
+    def args(self):
+        return self.request
+
+    def add_from_toolbar(self):
+        try:
+            addr = int(self.address.text(), 0)
+        except ValueError:
+            self.status.setText('<font color="red">Invalid address</font>')
+            return
+        self.add([{'name': self.name.text(), 'addr': addr, 'type': self.type.currentText()}])
+        self.name.clear()
+
+    def add(self, items):
+        items = [item for item in items if item['type'] in types and 0 <= item['addr'] <= (1 << 64) - struct.calcsize(types[item['type']])]
+        items = items[:self.max_items - len(self.items)]
+        if not items:
+            self.status.setText(f'<font color="red">Nothing added, at most {self.max_items} values can be watched</font>')
+            return
+        for item in items:
+            row = len(self.items)
+            self.items.append(item)
+            self.table.insertRow(row)
+            for col, text in enumerate([item['name'], f'0x{item["addr"]:x}', item['type'], '', '']):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        self.items_changed()
+
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            del self.items[row]
+            self.table.removeRow(row)
+        self.items_changed()
+
+    def items_changed(self):
+        self.layout_changed()
+        self.enable_poller()
+        self.status.setText(f'{len(self.items)} values')
+        self.poll()
+
+    def enable_poller(self):
+        if self.poller:
+            self.poller.enabled = bool(self.items) and self.toggle_refresh.isChecked()
+
+    def set_big_endian(self, big_endian):
+        self.big_endian = big_endian
+        self.layout_changed()
+        self.poll()
+
+    def poll(self):
+        # reads the values now, the poller leaves a stopped guest alone
+        if self.items and self.dump_file:
+            self.handle_values({'return': self.dump_file.get_pmem_list(self.hash, self.request['items'])})
+        elif self.items:
+            self.qmp.command('get-pmem-list', self.args(), callback=self.handle_values)
+
+    def handle_values(self, data):
+
+        if not data or 'return' not in data:
+            if data and 'error' in data:
+                self.status.setText(f'<font color="red">{data["error"].get("desc", "get-pmem-list failed")}</font>')
+            return
+        ret = data['return']
+        if ret['hash'] != self.hash: # asked for before the items changed
+            return
+
+        raw = base64.b64decode(ret['data'])
+        if len(raw) != self.format.size:
+            return
+        values = self.format.unpack(raw)
+        changed = QColor(255, 160, 0, 80)
+        for row, (value, mapped, item) in enumerate(zip(values, ret['mapped'], self.items)):
+            old = self.values[row]
+            if not mapped:
+                value = None
+            if value != old or old is None:
+                self.table.item(row, 3).setText(format_value(value, item['type']) if mapped else 'unmapped')
+                self.table.item(row, 4).setText(raw[self.offsets[row]:self.offsets[row + 1]].hex() if mapped else '')
+            # changed since the last read
+            color = changed if old is not None and value != old else QColor(Qt.transparent)
+            for col in [3, 4]:
+                self.table.item(row, col).setBackground(color)
+            self.values[row] = value
+
+    def load(self):
+        name = QFileDialog.getOpenFileName(self, 'Load Watch List', '', 'Watch lists (*.json)')
+        if not name[0]:
+            return
+        try:
+            with open(name[0]) as f:
+                items = [{'name': str(item.get('name', '')), 'addr': int(str(item['addr']), 0), 'type': item.get('type', 'u32')} for item in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            self.status.setText(f'<font color="red">Could not load {name[0]}: {e}</font>')
+            return
+        self.add(items)
+
+    def save(self):
+        name = QFileDialog.getSaveFileName(self, 'Save Watch List', '', 'Watch lists (*.json)')
+        if not name[0]:
+            return
+        with open(name[0], 'w') as f:
+            json.dump([{'name': item['name'], 'addr': f'0x{item["addr"]:x}', 'type': item['type']} for item in self.items], f, indent=1)
+
+    def closeEvent(self, event):
+
+        if self.poller:
+            self.qmp.scheduler.unregister(self.poller)
+        event.accept()
+
+
+def format_value(value, type_):
+    if type_.startswith('f'):
+        return f'{value:g}'
+    return str(value)
@@ -0,0 +1,28 @@
+from package.hexformat import format_block
+
+def test_full_rows():
+    addresses, hexes, chars = format_block(bytes(range(32)), 0x1000, 1, True)
+    assert addresses.split('\n') == ['0x00001000', '0x00001010']
+    assert hexes.split('\n')[0] == ' '.join(f'{b:02x}' for b in range(16)) + ' '
+
+def test_little_endian_groups_run_right_to_left():
+    addresses, hexes, chars = format_block(bytes(range(16)), 0, 4)
+    assert hexes == '0f0e0d0c 0b0a0908 07060504 03020100 '
+
+def test_partial_last_row_keeps_its_columns():
+    data = bytes(range(20))
+    for big_endian in [False, True]:
+        for group in [1, 2, 4, 8]:
+            addresses, hexes, chars = format_block(data, 0, group, big_endian)
+            full, partial = hexes.split('\n')
+            assert len(partial) == len(full)
+            full, partial = chars.split('\n')
+            assert len(partial) == len(full)
+    addresses, hexes, chars = format_block(data, 0, 2)
+    assert hexes.split('\n')[1] == ' ' * 30 + '1312 1110 '
+    addresses, hexes, chars = format_block(data, 0, 2, True)
+    assert hexes.split('\n')[1] == '1011 1213 ' + ' ' * 30
+
+def test_unmapped_bytes():
+    addresses, hexes, chars = format_block(bytes(16), 0, 1, True, [(4, 8)])
+    assert hexes == '** ' * 4 + '00 ' * 4 + '** ' * 8
@@ -0,0 +1,82 @@
+import numpy
+
+from package.dumpfile import DumpFile
+from package.memdiff import Diff, changed_offsets, runs
+
+def arrays(size, changes):
+    x = numpy.zeros(size, dtype=numpy.uint8)
+    y = x.copy()
+    y[changes] = 1
+    return x, y
+
+def test_equal_memory():
+    x, y = arrays(64, [])
+    assert changed_offsets(x, y).tolist() == []
+
+def test_changed_offsets_are_sorted():
+    changes = [0, 7, 8, 9, 30, 63]
+    assert changed_offsets(*arrays(64, changes)).tolist() == changes
+
+def test_tail_that_is_not_a_whole_word():
+    changes = [3, 16, 17, 19]
+    assert changed_offsets(*arrays(20, changes)).tolist() == changes
+    assert changed_offsets(*arrays(5, [4])).tolist() == [4]
+
+def test_runs_merge_across_small_gaps():
+    starts, ends, counts = runs(numpy.array([0, 1, 2, 5, 20, 40, 41]), 2)
+    assert starts.tolist() == [0, 20, 40]
+    assert ends.tolist() == [6, 21, 42]
+    assert counts.tolist() == [4, 1, 2]
+
+def test_runs_without_gaps():
+    starts, ends, counts = runs(numpy.array([0, 2, 3]), 0)
+    assert list(zip(starts.tolist(), ends.tolist(), counts.tolist())) == [(0, 1, 1), (2, 4, 2)]
+
+def test_no_runs():
+    starts, ends, counts = runs(numpy.empty(0, dtype=numpy.int64), 16)
+    assert starts.size == ends.size == counts.size == 0
+
+def dump(tmp_path, name, data, base=0):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return DumpFile(str(path), base)
+
+def diff(a, b, **attrs):
+    found = []
+    finished = []
+    d = Diff(a, b, gap=0)
+    for name, value in attrs.items():
+        setattr(d, name, value)
+    d.found.connect(found.extend)
+    d.finished.connect(lambda runs, reason: finished.append((runs, reason)))
+    d.run()
+    return found, finished[0]
+
+def test_runs_across_chunks(tmp_path):
+    before = bytearray(64)
+    after = bytearray(64)
+    after[14:18] = b'\1\1\1\1'
+    after[40] = 1
+    found, finished = diff(dump(tmp_path, 'a', before), dump(tmp_path, 'b', after), chunk_size=16)
+    assert found == [(14, 18, 4), (40, 41, 1)]
+    assert finished == (2, None)
+
+def test_last_run_is_kept_when_stopped(tmp_path):
+    after = bytearray(64)
+    after[1] = after[3] = after[5] = 1
+    found, finished = diff(dump(tmp_path, 'a', bytes(64)), dump(tmp_path, 'b', after), chunk_size=16, max_runs=2)
+    assert found == [(1, 2, 1), (3, 4, 1)]
+    assert finished == (2, 'Stopped after 2 runs')
+
+def test_last_run_is_kept_when_cancelled(tmp_path):
+    after = bytearray(64)
+    after[15:17] = b'\1\1'
+    a = dump(tmp_path, 'a', bytes(64))
+    b = dump(tmp_path, 'b', after)
+    d = Diff(a, b, gap=0)
+    d.chunk_size = 16
+    found = []
+    d.found.connect(found.extend)
+    d.cancel()
+    d.run()
+    assert found == [(15, 16, 1)]
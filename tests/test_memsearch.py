@@ -0,0 +1,117 @@
+from concurrent.futures import Future
+import time
+import pytest
+
+from package.memsearch import Matcher, Search, compile_pattern, parse_hex
+from package.mockqmp import MockQMPServer, MockMachine, MockError
+
+class MockQMP:
+    # answers commands straight from a mock machine, no connection involved
+    def __init__(self, machine):
+        self.server = MockQMPServer(machine)
+        self.reads = 0
+
+    def command(self, cmd, args=None, callback=None, handler=True):
+        self.reads += cmd == 'get-pmem-raw'
+        future = Future()
+        try:
+            future.set_result({'return': self.server.execute(cmd, args)})
+        except MockError as e:
+            future.set_result({'error': {'class': e.error_class, 'desc': e.desc}})
+        return future
+
+def search(qmp, matcher, start, end):
+    results = []
+    finished = []
+    s = Search(qmp, matcher, start, end)
+    s.found.connect(results.extend)
+    s.finished.connect(lambda matches, reason: finished.append(reason))
+    s.run()
+    return results, finished[0]
+
+def test_exact_matches_overlap():
+    matcher = Matcher(b'aa')
+    assert matcher.find(b'aaaxaa', 0, 6) == [0, 1, 4]
+
+def test_matches_stay_within_the_window():
+    matcher = Matcher(b'ab')
+    data = b'abxabxab'
+    assert matcher.find(data, 1, 7) == [3]
+    assert matcher.find(data, 0, 1) == []
+
+def test_alignment_uses_the_address():
+    matcher = Matcher(b'\x01', align=4)
+    data = bytes([1] * 16)
+    assert matcher.find(data, 0, 16) == [0, 4, 8, 12]
+    assert matcher.find(data, 0, 16, base=0x1002) == [2, 6, 10, 14]
+
+def test_masked_pattern():
+    pattern, mask = parse_hex('de ?? e?')
+    assert pattern == b'\xde\x00\xe0'
+    assert mask == b'\xff\x00\xf0'
+    matcher = Matcher(pattern, mask)
+    data = b'\xde\x12\xe5\xde\x34\xf5\xde\x00\xef'
+    assert matcher.find(data, 0, len(data)) == [0, 6]
+
+def test_masked_pattern_without_a_known_byte():
+    pattern, mask = parse_hex('?1 ?2')
+    matcher = Matcher(pattern, mask)
+    data = b'\x11\x22\x31\x42\x00'
+    assert matcher.find(data, 0, len(data)) == [0, 2]
+
+def test_hex_without_wildcards_is_exact():
+    assert parse_hex('0xdead beef') == (b'\xde\xad\xbe\xef', None)
+
+@pytest.mark.parametrize('text', ['', 'abc', 'zz'])
+def test_bad_hex(text):
+    with pytest.raises(ValueError):
+        parse_hex(text)
+
+def test_compile_pattern():
+    assert compile_pattern('ASCII', 'hi') == (b'hi', None)
+    assert compile_pattern('UTF-16 LE', 'hi') == (b'h\x00i\x00', None)
+    assert compile_pattern('UTF-16 BE', 'hi') == (b'\x00h\x00i', None)
+    assert compile_pattern('Integer', '0x1234', 2) == (b'\x34\x12', None)
+    assert compile_pattern('Integer', '0x1234', 4, big_endian=True) == (b'\x00\x00\x12\x34', None)
+    assert compile_pattern('Integer', '-1', 2) == (b'\xff\xff', None)
+
+@pytest.mark.parametrize('kind, text', [('Integer', '0x10000'), ('ASCII', ''), ('Float', '1')])
+def test_bad_patterns(kind, text):
+    with pytest.raises(ValueError):
+        compile_pattern(kind, text, 2)
+
+def test_most_limits_the_matches():
+    data = bytes(64)
+    assert Matcher(b'\0').find(data, 0, 64, most=3) == [0, 1, 2]
+    assert Matcher(b'\0', align=8).find(data, 0, 64, base=4, most=2) == [4, 12]
+    assert Matcher(b'\0').find(data, 0, 64, most=0) == []
+    pattern, mask = parse_hex('0?')
+    assert Matcher(pattern, mask, align=4).find(data, 0, 64, base=(1 << 64) - 2, most=2) == [2, 6]
+
+def test_search_stops_at_max_results():
+    qmp = MockQMP(MockMachine(1 << 20))
+    s = Search(qmp, Matcher(b'\0'), 0, 1 << 20)
+    s.max_results = 10
+    found = []
+    s.found.connect(found.extend)
+    s.run()
+    assert found == list(range(10))
+
+def test_search_skips_unmapped_memory():
+    machine = MockMachine(1 << 20)
+    machine.write(0x1234, b'needle')
+    machine.bios[0x100:0x106] = b'needle'
+    qmp = MockQMP(machine)
+    begin = time.monotonic()
+    results, reason = search(qmp, Matcher(b'needle'), 0, 1 << 64)
+    assert time.monotonic() - begin < 10
+    assert results == [0x1234, MockMachine.bios_base + 0x100]
+    assert reason is None
+    assert qmp.reads < 16
+
+def test_search_across_chunks_and_to_the_end_of_a_mapping():
+    machine = MockMachine(Search.chunk_size + (1 << 20))
+    machine.write(Search.chunk_size - 3, b'needle')
+    machine.write(machine.ram_size - 6, b'needle')
+    results, reason = search(MockQMP(machine), Matcher(b'needle'), 0, 1 << 32)
+    assert results[:2] == [Search.chunk_size - 3, machine.ram_size - 6]
@@ -0,0 +1,50 @@
+import json
+import socket
+import time
+import pytest
+
+from package.mockqmp import MockQMPServer, MockMachine, frame_end
+
+@pytest.fixture
+def client():
+    server = MockQMPServer(MockMachine(1 << 20), port=0)
+    port = server.start_in_thread()
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    replies = sock.makefile('rb')
+    replies.readline() # greeting
+    sock.sendall(b'{"execute": "qmp_capabilities"}')
+    assert 'return' in json.loads(replies.readline())
+    yield sock, lambda: json.loads(replies.readline())
+    sock.close()
+    server.stop()
+
+def test_frame_end():
+    assert frame_end('{"a": "}\\"]"}rest') == 13
+    assert frame_end('{"a": [1, {') is None
+    assert frame_end('xx{') == 2
+    assert frame_end('zz') == 2
+
+def test_malformed_frame_is_answered(client):
+    sock, reply = client
+    sock.sendall(b'{"execute": nope}{"execute": "query-status", "id": 1}')
+    assert reply()['error']['class'] == 'GenericError'
+    assert reply()['id'] == 1
+
+def test_garbage_is_dropped(client):
+    sock, reply = client
+    sock.sendall(b'garbage{"execute": "query-status", "id": 2}')
+    assert 'error' in reply()
+    assert reply()['id'] == 2
+
+def test_split_frame_waits_for_the_rest(client):
+    sock, reply = client
+    frame = '{"execute": "query-status", "id": "é"}'.encode()
+    sock.sendall(frame[:-4])
+    time.sleep(0.05)
+    sock.sendall(frame[-4:])
+    assert reply()['id'] == 'é'
+
+def test_oversized_frame_is_dropped(client):
+    sock, reply = client
+    sock.sendall(b'{"a": "' + b'x' * (MockQMPServer.max_frame + 1024))
+    assert 'error' in reply()
@@ -0,0 +1,83 @@
+from PySide2.QtCore import QObject, Signal
+from contextlib import contextmanager
+
+from package.memblock import MemBlock
+from package.pagecache import PageCache
+
+class FakeQMP(QObject):
+    # just what a PageCache needs, get-pmem-raw commands are recorded
+    pmemBlock = Signal(object)
+    stateChanged = Signal(bool)
+    guestReset = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.running = False
+        self.commands = []
+
+    @contextmanager
+    def batch(self):
+        yield self
+
+    def command(self, cmd, args=None, callback=None):
+        self.commands.append((cmd, args))
+
+def answer(qmp, cache, data):
+    # delivers data as the reply to the last get-pmem-raw
+    cmd, args = qmp.commands[-1]
+    cache.handle_block(MemBlock(args['addr'], data, [(0, len(data))], args['hash']))
+
+def test_no_changes_on_first_read():
+    qmp = FakeQMP()
+    cache = PageCache(qmp)
+    cache.fetch(0, 4096)
+    answer(qmp, cache, bytes(4096))
+    assert list(cache.changes_in(0, 4096)) == []
+
+def test_changed_bytes_are_kept():
+    qmp = FakeQMP()
+    cache = PageCache(qmp)
+    cache.fetch(0x1000, 0x2000)
+    answer(qmp, cache, bytes(0x2000))
+    data = bytearray(0x2000)
+    data[5] = data[0x1ffe] = 1
+    cache.fetch(0x1000, 0x2000, refresh=True)
+    answer(qmp, cache, bytes(data))
+
+    changes = list(cache.changes_in(0, 0x10000))
+    assert [(addr, offsets.tolist()) for addr, _, offsets in changes] == [(0x1000, [5]), (0x2000, [0xffe])]
+    assert [addr for addr, _, _ in cache.changes_in(0x2000, 1)] == [0x2000]
+    assert list(cache.changes_in(0x3000, 0x1000)) == []
+
+def test_unchanged_pages_are_not_reported():
+    qmp = FakeQMP()
+    cache = PageCache(qmp)
+    cache.fetch(0, 4096)
+    answer(qmp, cache, b'\x01' * 4096)
+    cache.fetch(0, 4096, refresh=True)
+    answer(qmp, cache, b'\x01' * 4096)
+    assert list(cache.changes_in(0, 4096)) == []
+
+def test_invalidate_drops_changes():
+    qmp = FakeQMP()
+    cache = PageCache(qmp)
+    cache.fetch(0, 4096)
+    answer(qmp, cache, bytes(4096))
+    cache.fetch(0, 4096, refresh=True)
+    answer(qmp, cache, b'\x02' + bytes(4095))
+    assert len(list(cache.changes_in(0, 4096))) == 1
+    cache.invalidate()
+    assert list(cache.changes_in(0, 4096)) == []
+
+def test_top_of_the_address_space():
+    qmp = FakeQMP()
+    cache = PageCache(qmp)
+    top = (1 << 64) - 4096
+    cache.fetch(top, 4096)
+    cmd, args = qmp.commands[-1]
+    assert args['addr'] == -4096
+    cache.handle_block(MemBlock(top, bytes(4096), [(0, 4096)], args['hash']))
+    cache.fetch(top, 4096, refresh=True)
+    cmd, args = qmp.commands[-1]
+    cache.handle_block(MemBlock(top, bytes(4095) + b'\x01', [(0, 4096)], args['hash']))
+    assert [(addr, offsets.tolist()) for addr, _, offsets in cache.changes_in(top, 1 << 20)] == [(top, [4095])]
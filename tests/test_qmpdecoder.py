@@ -0,0 +1,58 @@
+from package.qmpwrapper import QMPDecoder
+
+def test_messages_split_across_reads():
+    decoder = QMPDecoder(size=16)
+    assert decoder.feed(b'{"return": ') == []
+    messages = decoder.feed(b'{}, "id": 1}\r\n{"event"')
+    assert [(data, nbytes) for data, nbytes, _ in messages] == [({'return': {}, 'id': 1}, 25)]
+    messages = decoder.feed(b': "STOP"}\r\n')
+    assert [data for data, _, _ in messages] == [{'event': 'STOP'}]
+    assert decoder.length == 0
+
+def test_several_messages_in_one_read():
+    decoder = QMPDecoder()
+    messages = decoder.feed(b'{"a": 1}\n{"b": 2}\r\n{"c": 3}\n{"d"')
+    assert [data for data, _, _ in messages] == [{'a': 1}, {'b': 2}, {'c': 3}]
+    assert [nbytes for _, nbytes, _ in messages] == [9, 10, 9]
+    assert bytes(decoder.buffer[:decoder.length]) == b'{"d"'
+
+def test_blank_lines_are_skipped():
+    decoder = QMPDecoder()
+    messages = decoder.feed(b'\r\n\n  \r\n{"a": 1}\r\n')
+    assert [data for data, _, _ in messages] == [{'a': 1}]
+
+def test_buffer_grows_for_large_messages():
+    decoder = QMPDecoder(size=16)
+    payload = b'{"data": "' + b'x' * 100000 + b'"}'
+    for n in range(0, len(payload), 4096):
+        assert decoder.feed(payload[n:n + 4096]) == []
+    assert len(decoder.buffer) >= len(payload)
+    (data, nbytes, _), = decoder.feed(b'\r\n')
+    assert data == {'data': 'x' * 100000}
+    assert nbytes == len(payload) + 2
+
+def test_get_buffer_and_buffer_updated():
+    decoder = QMPDecoder(size=16)
+    view = decoder.get_buffer(64)
+    assert len(view) >= 64
+    view[:9] = b'{"a": 1}\n'
+    assert [data for data, _, _ in decoder.buffer_updated(9)] == [{'a': 1}]
+
+def test_reset_drops_the_partial_tail():
+    decoder = QMPDecoder()
+    decoder.feed(b'{"a": ')
+    decoder.reset()
+    assert [data for data, _, _ in decoder.feed(b'{"b": 2}\n')] == [{'b': 2}]
+
+def test_malformed_lines_are_skipped():
+    skipped = []
+    decoder = QMPDecoder(malformed=skipped.append)
+    messages = decoder.feed(b'{"a": 1}\r\n{"a": \r\n\xff\xfe\n{"b": 2}\r\n')
+    assert [data for data, _, _ in messages] == [{'a': 1}, {'b': 2}]
+    assert skipped == [8, 3]
+
+def test_buffer_shrinks_after_a_large_message():
+    decoder = QMPDecoder(size=16)
+    decoder.feed(b'{"data": "' + b'x' * 100000 + b'"}\r\n{"a"')
+    assert len(decoder.buffer) == 16
+    assert [data for data, _, _ in decoder.feed(b': 1}\n')] == [{'a': 1}]